@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.lexicon import read_cmu_dict, compile_lexicon, load_compiled_lexicon
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+from benchmarks.synthetic import SyntheticCorpus, kaldi_sausages_string
+from data.sample import write_cmu_dict
+
+sys.path.append('../')
+
+
+def summarize(latencies, items=None):
+    """
+    Summarize the latencies of a phase
+    @param latencies: seconds taken by every call
+    @type latencies: [float]
+    @param items: number of items processed, defaults to the number of calls
+    @type items: int
+    @rtype: dict
+    """
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    items = len(ordered) if items is None else items
+
+    def percentile(fraction):
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000
+
+    return {
+        "calls": len(ordered),
+        "total_s": total,
+        "items_per_s": items / total if total > 0 else None,
+        "mean_ms": total / len(ordered) * 1000,
+        "p50_ms": percentile(0.5),
+        "p90_ms": percentile(0.9),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def timed_calls(function, arguments):
+    """
+    Call function on every argument and return the seconds taken by every call
+    """
+    latencies = []
+    for argument in arguments:
+        start = time.perf_counter()
+        function(argument)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def peak_memory(function, arguments):
+    """
+    Peak traced python memory in bytes while calling function on every argument
+    """
+    tracemalloc.start()
+    try:
+        for argument in arguments:
+            function(argument)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(args):
+    """
+    Run all benchmark phases
+    @return: machine readable results
+    @rtype: dict
+    """
+    corpus = SyntheticCorpus(args.vocabulary_size, args.seed)
+    pairs = [corpus.pair(args.slots, args.edges_per_slot, args.eps_density, args.oov_rate, args.insertion_rate,
+                         args.deletion_rate, args.substitution_rate) for _ in range(args.pairs)]
+    kaldi_strings = [kaldi_sausages_string(pair.get_sausages()) for pair in pairs]
+    memory_pairs = pairs[:args.memory_pairs]
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "parameters": vars(args),
+        "phases": {},
+    }
+    phases = results["phases"]
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        cmu_dict_path = os.path.join(data_dir, "cmudict-0.7b")
+        write_cmu_dict(corpus.lexicon, cmu_dict_path)
+        aligner = SausagesTranscriptAligner()
+        phases["lexicon_load"] = summarize(timed_calls(
+            lambda path: aligner.set_lexicon_dict(read_cmu_dict(path)), [cmu_dict_path] * args.repeat))
+        compile_lexicon(cmu_dict_path)
+        phases["compiled_lexicon_load"] = summarize(timed_calls(load_compiled_lexicon, [cmu_dict_path] * args.repeat))
+
+    phases["kaldi_parse"] = summarize(timed_calls(sausages_from_kaldi_sausages_string, kaldi_strings))
+    phases["kaldi_parse"]["peak_memory_bytes"] = peak_memory(sausages_from_kaldi_sausages_string,
+                                                             kaldi_strings[:args.memory_pairs])
+
+    aligner = SausagesTranscriptAligner(corpus.lexicon)
+    for score_func_name in aligner.score_functions:
+        for engine in args.engines:
+            def align(pair):
+                return aligner.align_without_word_repeat(pair, score_func_name, engine)
+
+            aligner.clear_distance_cache()
+            summary = summarize(timed_calls(align, pairs))
+            summary["distance_cache"] = aligner.distance_cache_info()._asdict()
+            aligner.clear_distance_cache()
+            summary["peak_memory_bytes"] = peak_memory(align, memory_pairs)
+            phases[f"align/{score_func_name}/{engine}"] = summary
+
+    # the same alignments from a cold cache, without a distance store and with a store warmed by a first run
+    with tempfile.TemporaryDirectory() as data_dir:
+        store_path = os.path.join(data_dir, "distances.sqlite")
+        for phase, store in [("none", None), ("cold", store_path), ("warm", store_path)]:
+            for engine in args.engines:
+                aligner = SausagesTranscriptAligner(corpus.lexicon)
+                if store is not None:
+                    aligner.open_distance_store(store)
+
+                def align(pair):
+                    return aligner.align_without_word_repeat(pair, "w-avg-dist", engine)
+
+                phases[f"distance_store/{phase}/{engine}"] = summarize(timed_calls(align, pairs))
+                if aligner.distance_store is not None:
+                    aligner.distance_store.close()
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sausage and transcript alignment on synthetic data")
+    parser.add_argument("--pairs", type=int, default=20, help="number of synthetic utterances")
+    parser.add_argument("--slots", type=int, default=50, help="number of spoken words per utterance")
+    parser.add_argument("--edges-per-slot", type=int, default=5, help="maximum number of edges per word slot")
+    parser.add_argument("--eps-density", type=float, default=0.5, help="probability of an <eps> slot after a word")
+    parser.add_argument("--oov-rate", type=float, default=0.0, help="probability of out of vocabulary words")
+    parser.add_argument("--insertion-rate", type=float, default=0.05)
+    parser.add_argument("--deletion-rate", type=float, default=0.05)
+    parser.add_argument("--substitution-rate", type=float, default=0.05)
+    parser.add_argument("--vocabulary-size", type=int, default=2000)
+    parser.add_argument("--engines", nargs="+", default=["python", "numpy"], help="dynamic programming engines")
+    parser.add_argument("--repeat", type=int, default=3, help="number of lexicon loads")
+    parser.add_argument("--memory-pairs", type=int, default=5, help="number of utterances traced for peak memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the json results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with warnings.catch_warnings():
+        # out of vocabulary words warn on every lexicon miss
+        warnings.simplefilter("ignore")
+        results = run_benchmarks(args)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import random
+
+from saucriptaligner.sau_text_pair import Sausages, SausagesTranscriptPair
+
+PHONEMES = ["AA", "AE", "AH", "AO", "AW", "AY", "B", "CH", "D", "DH", "EH", "ER", "EY", "F", "G", "HH", "IH", "IY",
+            "JH", "K", "L", "M", "N", "NG", "OW", "OY", "P", "R", "S", "SH", "T", "TH", "UH", "UW", "V", "W", "Y", "Z",
+            "ZH"]
+EPSILON = "<eps>"
+
+
+class SyntheticCorpus:
+    """
+    Generates random lexicons, confusion networks and transcripts with controlled error rates.
+    Every sausage slot holds the spoken word and confusable alternates, with <eps> slots between words,
+    and every transcript is the spoken words with random insertions, deletions and substitutions.
+    """
+
+    def __init__(self, vocabulary_size=2000, seed=0):
+        """
+        @param vocabulary_size: number of words of the lexicon
+        @type vocabulary_size: int
+        @param seed: seed of the random generator
+        @type seed: int
+        """
+        self.random = random.Random(seed)
+        self.lexicon = {}
+        while len(self.lexicon) < vocabulary_size:
+            self.lexicon["W%d" % len(self.lexicon)] = self.random_pronunciation()
+        self.words = list(self.lexicon)
+        self.oov_count = 0
+
+    def random_pronunciation(self):
+        return " ".join(self.random.choices(PHONEMES, k=self.random.randint(2, 8)))
+
+    def random_word(self, oov_rate):
+        """
+        Draw a word of the lexicon, or a new out of vocabulary word with probability oov_rate
+        """
+        if self.random.random() < oov_rate:
+            self.oov_count += 1
+            return "OOV%d" % self.oov_count
+        return self.random.choice(self.words)
+
+    def sausages(self, spoken_words, edges_per_slot=5, eps_density=0.5, oov_rate=0.0):
+        """
+        Build a confusion network for spoken words
+        @param spoken_words: words actually spoken
+        @type spoken_words: [str]
+        @param edges_per_slot: maximum number of edges of a word slot
+        @type edges_per_slot: int
+        @param eps_density: probability of a pure <eps> slot after every word slot
+        @type eps_density: float
+        @param oov_rate: probability of every alternate to be out of vocabulary
+        @type oov_rate: float
+        @rtype: Sausages
+        """
+        edges_array = []
+        for word in spoken_words:
+            alternates = [self.random_word(oov_rate) for _ in range(self.random.randint(0, edges_per_slot - 1))]
+            # the spoken word usually, but not always, gets the highest weight
+            weights = sorted((self.random.random() ** 3 for _ in alternates), reverse=True)
+            top = self.random.uniform(0.5, 1.0)
+            total = top + sum(weights)
+            edges = [(word, top / total)] + [(alternate, weight / total)
+                                             for alternate, weight in zip(alternates, weights)]
+            edges_array.append(edges)
+            if self.random.random() < eps_density:
+                edges_array.append([(EPSILON, 1.0)])
+        return Sausages.create_from_edges_array(edges_array)
+
+    def transcript(self, spoken_words, insertion_rate=0.05, deletion_rate=0.05, substitution_rate=0.05):
+        """
+        Corrupt spoken words into a transcript
+        @rtype: [str]
+        """
+        transcript = []
+        for word in spoken_words:
+            draw = self.random.random()
+            if draw < deletion_rate:
+                continue
+            if draw < deletion_rate + substitution_rate:
+                transcript.append(self.random_word(0.0))
+            else:
+                transcript.append(word)
+            if self.random.random() < insertion_rate:
+                transcript.append(self.random_word(0.0))
+        return transcript
+
+    def pair(self, slots=50, edges_per_slot=5, eps_density=0.5, oov_rate=0.0, insertion_rate=0.05,
+             deletion_rate=0.05, substitution_rate=0.05):
+        """
+        Generate a sausage and transcript pair of about slots word slots
+        @rtype: SausagesTranscriptPair
+        """
+        spoken_words = [self.random_word(oov_rate) for _ in range(slots)]
+        sau = self.sausages(spoken_words, edges_per_slot, eps_density, oov_rate)
+        words = self.transcript(spoken_words, insertion_rate, deletion_rate, substitution_rate)
+        return SausagesTranscriptPair.create_from_sausages_wordlist(sau, words)
+
+
+def kaldi_sausages_string(sau):
+    """
+    Format sausages the way kaldi prints them
+    """
+    return " ".join("[ " + " ".join("%s %.7g" % (word, weight) for word, weight in sausage) + " ]" for sausage in sau)
+
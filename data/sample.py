@@ -31,3 +31,28 @@ transcript_text_long = "THE REVEREND MEEKIN I'D IS CLERICAL BROTHER WITH HORROR
                        "REVEREND MEEKIN WAS NOT " \
                        "ACCUSTOMED TO CLERGYMAN WHO WORE BLACK NECKTIES SMOKE CLAY PIPES CHEWED TOBACCO AND DRANK " \
                        "NEAT BRANDY OUT OF TUMBLERS "
+
+
+def spelling_lexicon(*texts):
+    """
+    Build a lexicon spelling every word letter by letter, so that samples can be aligned without cmudict
+    """
+    lexicon = {}
+    for text in texts:
+        for token in text.split():
+            if token not in ("[", "]", "<eps>") and not token[0].isdigit():
+                lexicon[token] = " ".join(token)
+    return lexicon
+
+
+def write_cmu_dict(lexicon, path):
+    """
+    Write a lexicon in the cmu dict text format
+    """
+    with open(path, 'w') as cmu_dict_file:
+        cmu_dict_file.write(";;; sample cmu dict\n")
+        for word, pronunciation in sorted(lexicon.items()):
+            cmu_dict_file.write(f"{word}  {pronunciation}\n")
+
+
+sample_lexicon = spelling_lexicon(sausage_text, transcript_text_long)
@@ -1,16 +1,20 @@
-import shutil
-import urllib
-
-import editdistance
+import numpy as np
 import sys
 import os
+import time
 import warnings
-import urllib.request
-from tqdm.auto import tqdm
-from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from collections import namedtuple
+from contextlib import nullcontext
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair, CompactSausage
+from saucriptaligner.distance_cache import PhonemeDistanceCache
+from saucriptaligner import lexicon
+from saucriptaligner.instrumentation import AlignmentStats
 
 sys.path.append('../')
 
+# alignment of one of many transcripts of the same sausages, see align_transcripts
+RankedAlignment = namedtuple("RankedAlignment", ["index", "cost", "alignment"])
+
 
 class SausagesTranscriptAligner:
     """
@@ -18,64 +22,463 @@ class SausagesTranscriptAligner:
     reference, using the sausage as a guide.
     """
 
-    def __init__(self, lexicon_dict=None, conf2vec=None):
+    def __init__(self, lexicon_dict=None, conf2vec=None, distance_cache_size=2 ** 16,
+                 distance_backend="bitparallel", pronunciation_variants=False):
         """
         @param lexicon_dict: a dictionary of lexicon entries
         @type lexicon_dict: dict
-        @param conf2vec: a dictionary of confidence scores to vectors
-        @type conf2vec: dict
+        @param conf2vec: word vectors of the "emb-dist" score function, a Conf2Vec or a dictionary of word to vector
+        @type conf2vec: Conf2Vec | dict
+        @param distance_cache_size: maximum number of cached word pair distances, None for unbounded
+        @type distance_cache_size: int
+        @param distance_backend: "bitparallel" to compute one to many distances with the kernel of bitparallel,
+        "editdistance" to compute them pair by pair
+        @type distance_backend: str
+        @param pronunciation_variants: compare words by the closest of their pronunciations, the alternate
+        pronunciations of a word being the WORD(1), WORD(2), ... entries of the lexicon
+        @type pronunciation_variants: bool
         """
         self.data_dir = "../data"
-        self.lexicon_dict = lexicon_dict
-        self.conf2vec = conf2vec
+        # instrumentation is off until enable_instrumentation is called
+        self.stats = None
+        self.warned_oov_words = set()
+        self.distance_cache = PhonemeDistanceCache(distance_cache_size)
+        self.distance_table = None
+        # persistent distances shared with other processes, see open_distance_store
+        self.distance_store = None
+        self.distance_backend = distance_backend
+        # phoneme to integer id, shared by all pronunciations
+        self.phoneme_inventory = {}
+        self.pronunciations = {}
+        self.pronunciation_ids = {}
+        self.pronunciation_variants = pronunciation_variants
+        # headword to the keys of its pronunciations, for lexicons which do not group them themselves
+        self.variant_groups = {}
+        self.variant_pronunciation_ids = {}
+        self.set_lexicon_dict(lexicon_dict)
         self.score_functions = {
             "w-avg-dist": self.weighted_average_sausage_word_edit_distance,
             "avg-dist": self.average_sausage_word_edit_distance
         }
+        # score functions computing the whole substitution cost matrix at once, used by the numpy engine
+        self.score_matrix_functions = {}
+        self.set_conf2vec(conf2vec)
+        # alternative dynamic programming engines, "python" is the reference engine
+        self.dp_engines = {
+            "numpy": self.align_with_numpy_engine,
+            "banded": self.align_with_banded_engine,
+            "hirschberg": self.align_with_hirschberg_engine
+        }
 
     @staticmethod
     def average_edit_distance(str1: str, str2: str) -> float:
         """
         Compute the average edit distance between two words
         """
+        import editdistance
         distance = editdistance.eval(str1.split(" "), str2.split(" "))
         return distance / max(len(str1), len(str2))
 
-    def phoneme_edit_distance(self, word1: str | int, word2: str | int) -> float:
+    @staticmethod
+    def tokenize_pronunciation(pronunciation: str):
         """
-        Compute the phoneme edit distance between two words
+        Split a pronunciation into phonemes once, keeping its length for normalization
+        @return: tuple of phonemes and length of the pronunciation string
+        @rtype: (tuple, int)
+        """
+        return tuple(pronunciation.split(" ")), len(pronunciation)
+
+    def set_lexicon_dict(self, lexicon_dict):
+        """
+        Set the lexicon and pre-tokenize its pronunciations
+        @param lexicon_dict: a dictionary of lexicon entries
+        @type lexicon_dict: dict
+        """
+        self.lexicon_dict = lexicon_dict
+        # version naming the lexicon in the distance store and distance tables, see lexicon.lexicon_version
+        self.lexicon_version = None if lexicon_dict is None else lexicon.lexicon_version(lexicon_dict)
+        self.pronunciations = {}
+        self.pronunciation_ids = {}
+        self.variant_groups = {}
+        self.variant_pronunciation_ids = {}
+        if isinstance(lexicon_dict, dict):
+            for word, pronunciation in lexicon_dict.items():
+                self.pronunciations[word] = SausagesTranscriptAligner.tokenize_pronunciation(pronunciation)
+            if self.pronunciation_variants:
+                self.variant_groups = lexicon.group_variants(lexicon_dict)
+        # distances computed with the previous lexicon are no longer valid
+        self.distance_cache.clear()
+        self.distance_table = None
+        if self.distance_store is not None:
+            self.distance_store.set_namespace(self.lexicon_version, self.distance_name())
+
+    def get_pronunciation_tokens(self, word: str | int):
+        """
+        Get the tokenized pronunciation of a word
+        @return: tuple of phonemes and length of the pronunciation string
+        @rtype: (tuple, int)
+        """
+        try:
+            tokens = self.pronunciations[word]
+        except KeyError:
+            pass
+        else:
+            if self.stats is not None:
+                self.stats.count("lexicon_hits")
+            return tokens
+        try:
+            pronunciation = self.lexicon_dict[word]
+        except KeyError:
+            if self.stats is not None:
+                self.stats.lexicon_miss(word)
+            # warn only once per word, misses are counted by the instrumentation
+            if word not in self.warned_oov_words:
+                self.warned_oov_words.add(word)
+                warnings.warn(f"Word {word} not found in lexicon continuing with word itself as pronunciation")
+            return SausagesTranscriptAligner.tokenize_pronunciation(word)
+        if self.stats is not None:
+            self.stats.count("lexicon_hits")
+        # lexicons which are not plain dictionaries are tokenized lazily
+        tokens = SausagesTranscriptAligner.tokenize_pronunciation(pronunciation)
+        self.pronunciations[word] = tokens
+        return tokens
+
+    def get_pronunciation_ids(self, word: str | int):
+        """
+        Get the pronunciation of a word as phoneme ids, see phoneme_inventory
+        @return: tuple of phoneme ids and length of the pronunciation string
+        @rtype: (tuple, int)
         """
         try:
-            pronunciation1 = self.lexicon_dict[word1]
+            return self.pronunciation_ids[word]
         except KeyError:
-            # print warning
-            warnings.warn(f"Word {word1} not found in lexicon continuing with word itself as pronunciation")
-            pronunciation1 = word1
+            pass
+        phonemes, length = self.get_pronunciation_tokens(word)
+        inventory = self.phoneme_inventory
+        ids = tuple([inventory.setdefault(phoneme, len(inventory)) for phoneme in phonemes])
+        # words missing from the lexicon are looked up again, so that every miss is accounted for
+        if word in self.pronunciations:
+            self.pronunciation_ids[word] = ids, length
+        return ids, length
+
+    def variant_words(self, word: str | int):
+        """
+        Get the lexicon keys of the pronunciations of a word, the word first
+        @rtype: tuple
+        """
+        if not self.pronunciation_variants:
+            return (word,)
+        if hasattr(self.lexicon_dict, "variant_words"):
+            return self.lexicon_dict.variant_words(word)
+        return self.variant_groups.get(word, (word,))
+
+    def get_pronunciation_variant_tokens(self, word: str | int):
+        """
+        Get the tokenized pronunciations of a word, see get_pronunciation_tokens
+        @rtype: [(tuple, int)]
+        """
+        return [self.get_pronunciation_tokens(key) for key in self.variant_words(word)]
+
+    def get_pronunciation_variant_ids(self, word: str | int):
+        """
+        Get the pronunciations of a word as phoneme ids, see get_pronunciation_ids
+        @rtype: ((tuple, int), ...)
+        """
+        if not self.pronunciation_variants:
+            return (self.get_pronunciation_ids(word),)
         try:
-            pronunciation2 = self.lexicon_dict[word2]
+            return self.variant_pronunciation_ids[word]
         except KeyError:
-            # print warning
-            warnings.warn(f"Word {word2} not found in lexicon continuing with word itself as pronunciation")
-            pronunciation2 = word2
+            pass
+        variants = tuple([self.get_pronunciation_ids(key) for key in self.variant_words(word)])
+        if len(variants) > 1:
+            self.variant_pronunciation_ids[word] = variants
+        return variants
+
+    def phoneme_edit_distance(self, word1: str | int, word2: str | int) -> float:
+        """
+        Compute the phoneme edit distance between two words
+        With pronunciation variants, the distance is the smallest one between their pronunciations.
+        Distances are memoized in a symmetric LRU cache, see distance_cache_info, and written to the distance
+        store if one is open. Stored distances are read into the cache by prefetch_stored_distances.
+        """
+        distance = self.distance_cache.get(word1, word2)
+        if distance is None:
+            import editdistance
+            distance = min(editdistance.eval(phonemes1, phonemes2) / max(length1, length2)
+                           for phonemes1, length1 in self.get_pronunciation_variant_tokens(word1)
+                           for phonemes2, length2 in self.get_pronunciation_variant_tokens(word2))
+            self.distance_cache.put(word1, word2, distance)
+            if self.distance_store is not None:
+                self.distance_store.put(word1, word2, distance)
+            if self.stats is not None:
+                self.stats.count("distance_computations")
+        return distance
+
+    def phoneme_edit_distances(self, word: str | int, other_words) -> [float]:
+        """
+        Compute the phoneme edit distances between a word and many words
+        Distances missing from the cache are computed in one call of the distance backend
+        """
+        distances = [self.distance_cache.get(word, other_word) for other_word in other_words]
+        missing = [index for index, distance in enumerate(distances) if distance is None]
+        if not missing:
+            return distances
+        if self.distance_backend == "bitparallel":
+            from saucriptaligner import bitparallel
+            computed = bitparallel.min_variant_distances(
+                self.get_pronunciation_variant_ids(word),
+                [self.get_pronunciation_variant_ids(other_words[index]) for index in missing])
+        else:
+            import editdistance
+            variants1 = self.get_pronunciation_variant_tokens(word)
+            computed = []
+            for index in missing:
+                computed.append(min(editdistance.eval(phonemes1, phonemes2) / max(length1, length2)
+                                    for phonemes1, length1 in variants1
+                                    for phonemes2, length2 in self.get_pronunciation_variant_tokens(
+                                        other_words[index])))
+        for index, distance in zip(missing, computed):
+            distances[index] = distance
+            self.distance_cache.put(word, other_words[index], distance)
+            if self.distance_store is not None:
+                self.distance_store.put(word, other_words[index], distance)
+        if self.stats is not None:
+            self.stats.count("distance_computations", len(missing))
+        return distances
+
+    def prefetch_distances(self, words, other_words):
+        """
+        Compute the distances of all pairs of words and other words into the cache, one word at a time
+        against all other words, which lets the bitparallel backend vectorize large batches.
+        The pairs stored in the distance store are read first, see prefetch_stored_distances.
+        Does nothing else for the editdistance backend, and nothing when the pairs would not fit in the cache.
+        """
+        maxsize = self.distance_cache.maxsize
+        if maxsize is not None and len(words) * len(other_words) > maxsize:
+            return
+        self.prefetch_stored_distances(words, other_words)
+        if self.distance_backend != "bitparallel":
+            return
+        for word in words:
+            self.phoneme_edit_distances(word, other_words)
+
+    def prefetch_stored_distances(self, words, other_words):
+        """
+        Read the stored distances of all pairs of words and other words into the cache
+        The pairs are looked up in batches, see DistanceStore.get_all, so aligning an utterance queries the
+        distance store a few times instead of once per cell. Does nothing without a distance store or when
+        the pairs would not fit in the cache.
+        """
+        maxsize = self.distance_cache.maxsize
+        if self.distance_store is None or (maxsize is not None and len(words) * len(other_words) > maxsize):
+            return
+        stored = self.distance_store.get_all(words, other_words)
+        for (word, other_word), distance in stored.items():
+            self.distance_cache.put(word, other_word, distance)
+        if self.stats is not None:
+            self.stats.count("distance_store_hits", len(stored))
+
+    def distance_cache_info(self):
+        """
+        Get hit/miss statistics of the phoneme distance cache
+        @return: named tuple of hits, misses, maxsize and currsize
+        @rtype: CacheInfo
+        """
+        return self.distance_cache.info()
+
+    def clear_distance_cache(self):
+        """
+        Remove all memoized phoneme distances
+        """
+        self.distance_cache.clear()
+
+    def set_distance_cache_size(self, maxsize):
+        """
+        Set the maximum number of memoized phoneme distances
+        @param maxsize: maximum number of cached pairs, None for unbounded and 0 to disable caching
+        @type maxsize: int
+        """
+        self.distance_cache.resize(maxsize)
+
+    def distance_name(self):
+        """
+        Name of the word pair distance, under which distances are kept in the distance store
+        @rtype: str
+        """
+        return "phoneme-edit-variants" if self.pronunciation_variants else "phoneme-edit"
+
+    def open_distance_store(self, path, batch_size=4096):
+        """
+        Open a persistent distance store, read before aligning an utterance and written with new distances
+        Distances are kept per lexicon version, so a store can be shared by runs with different lexicons.
+        The store is reopened in every worker process of align_many.
+        @param path: path of the SQLite database, created if missing
+        @type path: str
+        @param batch_size: number of new distances appended to the store at once
+        @type batch_size: int
+        @rtype: DistanceStore
+        """
+        from saucriptaligner.distance_store import DistanceStore
+        if self.lexicon_dict is None:
+            raise ValueError("a distance store needs a lexicon")
+        self.set_distance_store(DistanceStore(path, self.lexicon_version, self.distance_name(), batch_size))
+        return self.distance_store
+
+    def set_distance_store(self, distance_store):
+        """
+        Set the persistent distance store, None to stop using it
+        The store must hold the distances of the lexicon of the aligner, see open_distance_store
+        @type distance_store: DistanceStore
+        """
+        self.distance_store = distance_store
+
+    def flush_distance_store(self):
+        """
+        Append the distances computed since the last append to the distance store, if one is open
+        """
+        if self.distance_store is not None:
+            self.distance_store.flush()
+
+    def enable_instrumentation(self):
+        """
+        Start collecting alignment statistics, see AlignmentStats
+        @return: the statistics, which are updated by every following alignment
+        @rtype: AlignmentStats
+        """
+        if self.stats is None:
+            self.stats = AlignmentStats()
+        return self.stats
+
+    def disable_instrumentation(self):
+        """
+        Stop collecting alignment statistics
+        @return: the statistics collected so far
+        @rtype: AlignmentStats
+        """
+        stats, self.stats = self.stats, None
+        return stats
+
+    def get_stats(self):
+        """
+        Get the alignment statistics, None if instrumentation is disabled
+        @rtype: AlignmentStats
+        """
+        return self.stats
+
+    def timer(self, name):
+        """
+        Time a block into the named timer of the statistics, does nothing if instrumentation is disabled
+        """
+        if self.stats is None:
+            return nullcontext()
+        return self.stats.timer(name)
+
+    def precompute_distance_table(self, pairs):
+        """
+        Compute the phoneme distances of all transcript and sausage word pairs of a batch at once
+        The score functions then look distances up in the table, see WordPairDistanceTable
+        @param pairs: iterable of SausagesTranscriptPair
+        @type pairs: iterable
+        @rtype: WordPairDistanceTable
+        """
+        from saucriptaligner.distance_table import WordPairDistanceTable
+        self.distance_table = WordPairDistanceTable.build(self, pairs)
+        return self.distance_table
 
-        return SausagesTranscriptAligner.average_edit_distance(pronunciation1, pronunciation2)
+    def set_distance_table(self, distance_table):
+        """
+        Set a precomputed distance table, e.g. loaded with WordPairDistanceTable.load, None to stop using it
+        @type distance_table: WordPairDistanceTable
+        @raise ValueError: if the table was computed with another lexicon or distance than the aligner
+        """
+        if distance_table is not None:
+            distance_table.check_version(self.lexicon_version, self.distance_name())
+        self.distance_table = distance_table
+
+    def edge_distances(self, word: str, edges) -> [float]:
+        """
+        Compute the phoneme edit distances between a word and the words of the edges of a sausage
+        """
+        if self.distance_table is not None:
+            distances = self.distance_table.edge_distances(word, edges)
+            if distances is not None:
+                return distances
+        if isinstance(edges, CompactSausage):
+            return self.phoneme_edit_distances(word, edges.get_words())
+        return self.phoneme_edit_distances(word, [edge[0] for edge in edges])
 
     def average_sausage_word_edit_distance(self, edges, word: str) -> float:
         """
         Compute the average edit between a word's phoneme sequence and list of words in a sausage
         """
-        words = [edge[0] for edge in edges]
-        return sum([self.phoneme_edit_distance(word, w) for w in words]) / len(words)
+        distances = self.edge_distances(word, edges)
+        return sum(distances) / len(distances)
 
     def weighted_average_sausage_word_edit_distance(self, edges, word):
         """
         Compute the weighted average edit between a word's phoneme sequence and list of words in a sausage
         """
-        words = [edge[0] for edge in edges]
+        distances = self.edge_distances(word, edges)
+        if isinstance(edges, CompactSausage):
+            # read the weights straight from the weight array of the compact sausages
+            weights = edges.get_weights_array()
+            return float(np.dot(distances, weights) / weights.sum(dtype=np.float64))
         weights = [edge[1] for edge in edges]
-        return sum([self.phoneme_edit_distance(word, w[0]) * w[1] for w in edges]) / sum(weights)
+        return sum([distance * edge[1] for distance, edge in zip(distances, edges)]) / sum(weights)
+
+    def set_conf2vec(self, conf2vec):
+        """
+        Set the word vectors of the "emb-dist" score function, registering it if vectors are given
+        @param conf2vec: a Conf2Vec or a dictionary of word to vector
+        @type conf2vec: Conf2Vec | dict
+        """
+        self.conf2vec = None
+        # "emb-dist" is only available with word vectors
+        self.score_functions.pop("emb-dist", None)
+        self.score_matrix_functions.pop("emb-dist", None)
+        if conf2vec is None:
+            return
+        if isinstance(conf2vec, dict):
+            from saucriptaligner.conf2vec import Conf2Vec
+            conf2vec = Conf2Vec.create_from_dict(conf2vec)
+        self.conf2vec = conf2vec
+        self.score_functions["emb-dist"] = self.embedding_sausage_word_distance
+        self.score_matrix_functions["emb-dist"] = self.embedding_cost_matrix
+
+    def embedding_cost_matrix(self, sau, words) -> np.ndarray:
+        """
+        Compute the embedding cost of every sausage against every word, see Conf2Vec.cost_matrix
+        Cells of words or sausages without a vector fall back to the weighted average phoneme edit distance.
+        @param sau: list of sausages
+        @type sau: Sausages
+        @param words: list of transcript words
+        @type words: [str]
+        @rtype: np.ndarray
+        """
+        if self.conf2vec is None:
+            raise ValueError("the emb-dist score function needs conf2vec word vectors")
+        with self.timer("scoring"):
+            costs, unknown = self.conf2vec.cost_matrix(sau, words)
+        for i, j in zip(*np.nonzero(unknown)):
+            costs[i, j] = self.weighted_average_sausage_word_edit_distance(sau[i], words[j])
+        return costs
+
+    def embedding_sausage_word_distance(self, edges, word) -> float:
+        """
+        Compute the embedding cost between a word and a sausage
+        The cost is (1 - cosine similarity) / 2 between the word vector and the confidence weighted average
+        of the vectors of the words of the sausage.
+        """
+        if self.conf2vec is None:
+            raise ValueError("the emb-dist score function needs conf2vec word vectors")
+        costs, unknown = self.conf2vec.cost_matrix([edges], [word])
+        if unknown[0, 0]:
+            return self.weighted_average_sausage_word_edit_distance(edges, word)
+        return float(costs[0, 0])
 
-    def align_without_word_repeat(self, sau_and_text: SausagesTranscriptPair, score_func_name: str):
+    def align_without_word_repeat(self, sau_and_text: SausagesTranscriptPair, score_func_name: str,
+                                  engine: str = "python", pruner=None, **engine_options):
 
         """
         Align a sausage and a transcript without repeating words in the transcript
@@ -83,12 +486,40 @@ class SausagesTranscriptAligner:
         @type sau_and_text: SausageAndTranscriptPair
         @param score_func_name: function keyword to use score function
         @type score_func_name: str
+        @param engine: dynamic programming engine, "python" or one of the keys of dp_engines
+        @type engine: str
+        @param pruner: if given, the sausages are pruned before alignment and the alignment mapped back
+        onto the original sausages, see SausagePruner
+        @type pruner: SausagePruner
+        @param engine_options: keyword arguments of the engine, e.g. band_width for the banded engine
         @return: a list of tuples of the form (word, sausage)
         """
         score_func = self.score_functions[score_func_name]
         sau, words = sau_and_text.get_sausages_wordlist()
         if len(sau) == 0 or len(words) == 0:
             return []
+        if pruner is not None:
+            pruned = pruner.prune(sau)
+            if len(pruned.sausages) == 0:
+                # every word is inserted, the dropped sausages are restored as deletions
+                alignment = SausagesTranscriptPair.create_from_sausages_wordlist(["-"] * len(words), list(words))
+            else:
+                alignment = self.align_without_word_repeat(
+                    SausagesTranscriptPair.create_from_sausages_wordlist(pruned.sausages, words), score_func_name,
+                    engine, **engine_options)
+            return pruned.restore(alignment)
+        if self.stats is not None:
+            self.stats.count("alignments")
+            score_func = self.stats.timed_score_func(score_func)
+        if engine == "numpy" and score_func_name in self.score_matrix_functions:
+            engine_options.setdefault("score_matrix_func", self.score_matrix_functions[score_func_name])
+        if (engine != "numpy" and self.distance_store is not None and self.distance_table is None and
+                score_func_name not in self.score_matrix_functions):
+            # the numpy engine reads the store while prefetching all distances
+            self.prefetch_stored_distances(list(set(words)),
+                                           list({word for sausage in sau for word in sausage.get_words()}))
+        if engine != "python":
+            return self.dp_engines[engine](sau, words, score_func, **engine_options)
         # we need custom alignment algorithm which will align words with sausages without repeating words
         # we will use a score calculated by score_func
         # the alignment algorithm will be a dynamic programming algorithm
@@ -114,11 +545,15 @@ class SausagesTranscriptAligner:
         for j in range(1, len(words) + 1):
             alignment_matrix[0][j] = alignment_matrix[0][j - 1] + 1
 
+        fill_start = time.perf_counter()
         for i in range(1, len(sau) + 1):
             for j in range(1, len(words) + 1):
                 alignment_matrix[i][j] = min(alignment_matrix[i - 1][j] + deletion_cost,
                                              alignment_matrix[i - 1][j - 1] + score_func(sau[i - 1], words[j - 1]),
                                              alignment_matrix[i][j - 1] + 1)
+        if self.stats is not None:
+            self.stats.add_time("dp_fill", time.perf_counter() - fill_start)
+            self.stats.count("dp_cells", len(sau) * len(words))
 
         # now we will use the alignment matrix to get the alignment
         # we will start from the bottom right corner of the matrix
@@ -138,6 +573,7 @@ class SausagesTranscriptAligner:
 
         # we will move to the cell with minimum cost
         # if the cost is same, we will move to the cell with minimum cost
+        traceback_start = time.perf_counter()
         while i > 0 and j > 0:
             if alignment_matrix[i][j] == alignment_matrix[i - 1][j] + deletion_cost:
                 current_sau.append(sau[i - 1])
@@ -172,11 +608,255 @@ class SausagesTranscriptAligner:
         # reverse the current sausage and transcript
         current_sau.reverse()
         current_text.reverse()
+        if self.stats is not None:
+            self.stats.add_time("traceback", time.perf_counter() - traceback_start)
 
         alignment = SausagesTranscriptPair.create_from_sausages_wordlist(current_sau, current_text)
 
         return alignment
 
+    def score_alignment(self, alignment, score_func_name: str) -> [float]:
+        """
+        Compute the cost of every position of an alignment, the costs add up to the cost of the alignment
+        @param alignment: alignment returned by align_without_word_repeat
+        @type alignment: SausagesTranscriptPair
+        @param score_func_name: function keyword of the score function used to align
+        @type score_func_name: str
+        @return: score of the sausage and the word of aligned positions, 1 for a deletion or an insertion
+        @rtype: [float]
+        """
+        if not alignment:
+            return []
+        score_func = self.score_functions[score_func_name]
+        scores = []
+        for sausage, word in zip(alignment.get_sausages(), alignment.get_wordlist()):
+            if (isinstance(sausage, str) and sausage == "-") or (isinstance(word, str) and word == "-"):
+                scores.append(1.)
+            else:
+                scores.append(score_func(sausage, word))
+        return scores
+
+    def align_with_numpy_engine(self, sau, words, score_func, score_matrix_func=None):
+        """
+        Align sausages and words with the vectorized engine
+        The substitution costs are computed once and the traceback follows stored backpointers,
+        so no cell is scored twice. The alignment is the same as the one of the python engine.
+        @param sau: list of sausages
+        @type sau: Sausages
+        @param words: list of transcript words
+        @type words: [str]
+        @param score_func: function scoring a sausage against a word
+        @type score_func: callable
+        @param score_matrix_func: function computing all substitution costs at once, replacing score_func
+        @type score_matrix_func: callable
+        @rtype: SausagesTranscriptPair
+        """
+        from saucriptaligner import dp_engines
+        if score_matrix_func is not None:
+            sub_costs = score_matrix_func(sau, words)
+        else:
+            if self.distance_table is None:
+                sausage_words = list({word for sausage in sau for word in sausage.get_words()})
+                self.prefetch_distances(list(set(words)), sausage_words)
+            sub_costs = dp_engines.substitution_cost_matrix(sau, words, score_func)
+        with self.timer("dp_fill"):
+            _, backpointers = dp_engines.numpy_dp(sub_costs)
+        if self.stats is not None:
+            self.stats.count("dp_cells", len(sau) * len(words))
+        with self.timer("traceback"):
+            path = dp_engines.traceback(backpointers)
+        current_sau, current_text = dp_engines.path_to_sausages_wordlist(sau, words, path)
+        return SausagesTranscriptPair.create_from_sausages_wordlist(current_sau, current_text)
+
+    def align_transcripts(self, sau, transcripts, score_func_name: str) -> [RankedAlignment]:
+        """
+        Align many transcripts, e.g. normalization variants or n-best references, against the same sausages
+        Every sausage is scored once against the union of the words of all transcripts, and each transcript
+        is aligned by the numpy engine on the columns of its words. The alignments are the ones of
+        align_without_word_repeat with the numpy engine.
+        @param sau: list of sausages
+        @type sau: Sausages
+        @param transcripts: transcripts as lists of words or sentences
+        @type transcripts: [[str] | str]
+        @param score_func_name: function keyword to use score function
+        @type score_func_name: str
+        @return: alignment and total cost of every transcript, cheapest first, ties in input order
+        @rtype: [RankedAlignment]
+        """
+        from saucriptaligner import dp_engines
+        score_func = self.score_functions[score_func_name]
+        transcripts = [transcript.split() if isinstance(transcript, str) else list(transcript)
+                       for transcript in transcripts]
+        vocabulary = {}
+        for words in transcripts:
+            for word in words:
+                vocabulary.setdefault(word, len(vocabulary))
+        union_words = list(vocabulary)
+        if self.stats is not None:
+            score_func = self.stats.timed_score_func(score_func)
+        if len(sau) == 0 or len(union_words) == 0:
+            union_costs = np.empty((len(sau), len(union_words)), dtype=np.float64)
+        elif score_func_name in self.score_matrix_functions:
+            union_costs = self.score_matrix_functions[score_func_name](sau, union_words)
+        else:
+            if self.distance_table is None:
+                sausage_words = list({word for sausage in sau for word in sausage.get_words()})
+                self.prefetch_distances(union_words, sausage_words)
+            union_costs = dp_engines.substitution_cost_matrix(sau, union_words, score_func)
+
+        results = []
+        for index, words in enumerate(transcripts):
+            if len(sau) == 0 or len(words) == 0:
+                # nothing to align, every sausage is deleted or every word inserted
+                results.append(RankedAlignment(index, float(len(sau) + len(words)), []))
+                continue
+            if self.stats is not None:
+                self.stats.count("alignments")
+                self.stats.count("dp_cells", len(sau) * len(words))
+            with self.timer("dp_fill"):
+                costs, backpointers = dp_engines.numpy_dp(union_costs[:, [vocabulary[word] for word in words]])
+            with self.timer("traceback"):
+                path = dp_engines.traceback(backpointers)
+            current_sau, current_text = dp_engines.path_to_sausages_wordlist(sau, words, path)
+            results.append(RankedAlignment(index, float(costs[-1, -1]),
+                                           SausagesTranscriptPair.create_from_sausages_wordlist(current_sau,
+                                                                                                current_text)))
+        results.sort(key=lambda result: (result.cost, result.index))
+        return results
+
+    def cell_score_func(self, sau, words, score_func):
+        """
+        Score function of the cell (i, j) of the alignment matrix, counting computed cells when instrumented
+        """
+        stats = self.stats
+
+        def score(i, j):
+            if stats is not None:
+                stats.count("dp_cells")
+            return score_func(sau[i], words[j])
+
+        return score
+
+    def align_with_banded_engine(self, sau, words, score_func, band_width=32):
+        """
+        Align sausages and words computing only a band of diagonals of the alignment matrix
+        When the band may have cut off a cheaper path, the band width is doubled, reusing the cells of the
+        narrower band, up to the full matrix. The alignment is the same as the one of the python engine.
+        @param sau: list of sausages
+        @type sau: Sausages
+        @param words: list of transcript words
+        @type words: [str]
+        @param score_func: function scoring a sausage against a word
+        @type score_func: callable
+        @param band_width: initial number of diagonals kept on each side of the band
+        @type band_width: int
+        @rtype: SausagesTranscriptPair
+        """
+        from saucriptaligner import dp_engines
+        n, m = len(sau), len(words)
+        score = self.cell_score_func(sau, words, score_func)
+
+        # the traceback is interleaved with the fill and timed with it
+        with self.timer("dp_fill"):
+            band = None
+            while True:
+                _, path, is_optimal, band = dp_engines.banded_dp(n, m, score, band_width, previous_band=band)
+                # a band wider than the matrix is the full dynamic programming
+                if is_optimal or band_width >= max(n, m):
+                    break
+                band_width = max(1, band_width * 2)
+        current_sau, current_text = dp_engines.path_to_sausages_wordlist(sau, words, path)
+        return SausagesTranscriptPair.create_from_sausages_wordlist(current_sau, current_text)
+
+    def align_with_hirschberg_engine(self, sau, words, score_func):
+        """
+        Align sausages and words with a divide and conquer engine using linear memory
+        The alignment is the same as the one of the python engine.
+        @param sau: list of sausages
+        @type sau: Sausages
+        @param words: list of transcript words
+        @type words: [str]
+        @param score_func: function scoring a sausage against a word
+        @type score_func: callable
+        @rtype: SausagesTranscriptPair
+        """
+        from saucriptaligner import dp_engines
+        score = self.cell_score_func(sau, words, score_func)
+        # the traceback is interleaved with the fill and timed with it
+        with self.timer("dp_fill"):
+            _, path = dp_engines.hirschberg_dp(len(sau), len(words), score)
+        current_sau, current_text = dp_engines.path_to_sausages_wordlist(sau, words, path)
+        return SausagesTranscriptPair.create_from_sausages_wordlist(current_sau, current_text)
+
+    def align_many(self, pairs, score_func_name: str, engine: str = "python", workers=None, chunk_size=16,
+                   max_in_flight=None, ordered=True, **engine_options):
+        """
+        Align many sausage and transcript pairs over a process pool
+        Every worker receives the aligner, and so the lexicon, once when it starts. Pairs are read lazily
+        and sent in chunks, with at most max_in_flight chunks submitted at a time, so memory stays bounded
+        for any number of pairs.
+        @param pairs: iterable of SausagesTranscriptPair
+        @type pairs: iterable
+        @param score_func_name: function keyword to use score function
+        @type score_func_name: str
+        @param engine: dynamic programming engine, see align_without_word_repeat
+        @type engine: str
+        @param workers: number of worker processes, defaults to the number of CPUs, 1 aligns in this process
+        @type workers: int
+        @param chunk_size: number of pairs sent to a worker at once
+        @type chunk_size: int
+        @param max_in_flight: maximum number of submitted chunks, defaults to twice the number of workers
+        @type max_in_flight: int
+        @param ordered: yield alignments in input order, otherwise yield (index, alignment) as chunks finish
+        @type ordered: bool
+        @return: generator of alignments, or of (index, alignment) if not ordered
+        """
+        from saucriptaligner import batch
+        return batch.align_many(self, pairs, score_func_name, engine, workers, chunk_size, max_in_flight, ordered,
+                                **engine_options)
+
+    def align_with_anchors(self, sau_and_text: SausagesTranscriptPair, score_func_name: str, engine: str = "python",
+                           segmenter=None, workers=1, **engine_options):
+        """
+        Align a sausage and a transcript split at anchors, aligning the segments between anchors independently
+        The dynamic programming runs on the segments only, which is much smaller for long utterances with many
+        confident sausages. Alignments through anchors are kept, so the result can differ from
+        align_without_word_repeat when the best full alignment does not go through an anchor.
+        @param sau_and_text: a SausageAndTranscriptPair object
+        @type sau_and_text: SausagesTranscriptPair
+        @param score_func_name: function keyword to use score function
+        @type score_func_name: str
+        @param engine: dynamic programming engine, see align_without_word_repeat
+        @type engine: str
+        @param segmenter: segmenter finding the anchors, defaults to AnchorSegmenter()
+        @type segmenter: AnchorSegmenter
+        @param workers: number of worker processes aligning the segments, see align_many
+        @type workers: int
+        @rtype: SausagesTranscriptPair
+        """
+        from saucriptaligner.anchors import AnchorSegmenter
+        sau, words = sau_and_text.get_sausages_wordlist()
+        if len(sau) == 0 or len(words) == 0:
+            return []
+        segments = (segmenter or AnchorSegmenter()).segment(sau_and_text)
+        alignments = self.align_many(segments.segments, score_func_name, engine, workers=workers, **engine_options)
+        return segments.stitch(list(alignments))
+
+    def align_incrementally(self, score_func_name: str, words=(), words_complete=True, **options):
+        """
+        Start an alignment of sausages arriving chunk by chunk, see IncrementalAligner
+        @param score_func_name: function keyword to use score function
+        @type score_func_name: str
+        @param words: transcript words
+        @type words: [str]
+        @param words_complete: whether words is the whole transcript, otherwise words are appended later
+        @type words_complete: bool
+        @param options: beam and window of IncrementalAligner
+        @rtype: IncrementalAligner
+        """
+        from saucriptaligner.incremental import IncrementalAligner
+        return IncrementalAligner(self, score_func_name, words, words_complete, **options)
+
     def set_data_dir(self, data_dir):
         """
         Set the data directory
@@ -191,6 +871,11 @@ class SausagesTranscriptAligner:
         @param cmu_dict_path: path to cmu dict
         @type cmu_dict_path: str
         """
+        # imported here, only needed to download
+        import shutil
+        import urllib.request
+        from tqdm.auto import tqdm
+
         # download cmu dict file
         cmu_dict_file = "cmudict-0.7b"
         cmu_dict_file_path = os.path.join(self.data_dir, cmu_dict_file)
@@ -214,7 +899,6 @@ class SausagesTranscriptAligner:
         """
         cmu_dict_file = "cmudict-0.7b"
         cmu_dict_file_path = os.path.join(self.data_dir, cmu_dict_file)
-        cmu_dict = {}
         # check if cmu dict file exists
         if not os.path.exists(cmu_dict_file_path):
             # download cmu dict file
@@ -222,15 +906,25 @@ class SausagesTranscriptAligner:
             self.load_lexicon_from_cmu_dict()
 
         # read cmu dict file as text file
-        with open(cmu_dict_file_path, 'r') as cmu_dict_file:
-            for line in cmu_dict_file:
-                # ignore comments
-                if not line.startswith(";;;"):
-                    # split the line into word and pronunciation
-                    word, pronunciation = line.split("  ")
-                    # remove the newline character from the pronunciation
-                    pronunciation = pronunciation[:-1]
-                    # add word and pronunciation to cmu dict dictionary
-                    cmu_dict[word] = pronunciation
-        self.lexicon_dict = cmu_dict
+        with self.timer("lexicon_load"):
+            cmu_dict = lexicon.read_cmu_dict(cmu_dict_file_path)
+            self.set_lexicon_dict(cmu_dict)
         return cmu_dict
+
+    def get_compiled_lexicon_from_cmu_file(self):
+        """
+        Load the cmu dict file through its memory-mapped binary lexicon
+        The binary lexicon is compiled next to the cmu dict file on first use
+        and recompiled whenever the cmu dict file changes.
+        @return: compiled lexicon, usable as the lexicon dictionary
+        @rtype: CompiledLexicon
+        """
+        cmu_dict_file = "cmudict-0.7b"
+        cmu_dict_file_path = os.path.join(self.data_dir, cmu_dict_file)
+        if not os.path.exists(cmu_dict_file_path):
+            print("CMU dict file not found.")
+            self.load_lexicon_from_cmu_dict()
+        with self.timer("lexicon_load"):
+            compiled_lexicon = lexicon.load_compiled_lexicon(cmu_dict_file_path)
+            self.set_lexicon_dict(compiled_lexicon)
+        return compiled_lexicon
@@ -0,0 +1,279 @@
+import collections
+import json
+import os
+
+import numpy as np
+
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair, Vocabulary
+
+STORE_FORMAT_VERSION = 2
+# gap flags of an aligned position
+WORD_GAP = 1
+SAUSAGE_GAP = 2
+# one append-only file per column, positions of all utterances concatenated
+COLUMNS = {
+    "slot_indices": np.int32,
+    "word_ids": np.int32,
+    "gap_flags": np.uint8,
+    "scores": np.float32,
+}
+OFFSETS_FILE = "offsets.i64"
+# size of the vocabulary once every utterance is written
+VOCABULARY_SIZES_FILE = "vocabulary_sizes.i64"
+UTTERANCE_IDS_FILE = "utterance_ids.txt"
+VOCABULARY_FILE = "vocabulary.txt"
+HEADER_FILE = "header.json"
+
+StoredAlignment = collections.namedtuple("StoredAlignment", ["slot_indices", "word_ids", "gap_flags", "scores"])
+
+
+def column_path(directory, name):
+    return os.path.join(directory, name + "." + np.dtype(COLUMNS[name]).str.lstrip("<>|="))
+
+
+def alignment_columns(alignment, vocabulary):
+    """
+    Convert an alignment into its columns
+    Sausages are numbered in their order of the alignment, which holds every sausage of the utterance.
+    @param alignment: alignment returned by align_without_word_repeat
+    @type alignment: SausagesTranscriptPair
+    @param vocabulary: vocabulary giving the word ids, new words are added to it
+    @type vocabulary: Vocabulary
+    @return: slot indices, word ids and gap flags, -1 for the index of a gap
+    @rtype: (np.ndarray, np.ndarray, np.ndarray)
+    """
+    if not alignment:
+        return tuple(np.empty(0, dtype=COLUMNS[name]) for name in ["slot_indices", "word_ids", "gap_flags"])
+    slot_indices = []
+    word_ids = []
+    gap_flags = []
+    slot = 0
+    for sausage, word in zip(alignment.get_sausages(), alignment.get_wordlist()):
+        if isinstance(sausage, str) and sausage == "-":
+            slot_indices.append(-1)
+            gap_flags.append(SAUSAGE_GAP)
+        else:
+            slot_indices.append(slot)
+            gap_flags.append(0)
+            slot += 1
+        if isinstance(word, str) and word == "-":
+            word_ids.append(-1)
+            gap_flags[-1] |= WORD_GAP
+        else:
+            word_ids.append(vocabulary.add(word))
+    return (np.array(slot_indices, dtype=COLUMNS["slot_indices"]), np.array(word_ids, dtype=COLUMNS["word_ids"]),
+            np.array(gap_flags, dtype=COLUMNS["gap_flags"]))
+
+
+class AlignmentWriter:
+    """
+    Append-only writer of alignments in a columnar store
+    The store is a directory with one binary file per column (aligned slot indices, word ids, gap flags and
+    scores of all positions), the end offset of every utterance, the utterance ids, the word vocabulary and
+    its size after every utterance. Opening an existing store appends to it. An utterance is only read once
+    its id, offset, columns and words are all written, so an interrupted writer leaves a readable store.
+    """
+
+    def __init__(self, directory):
+        """
+        @param directory: directory of the store, created if missing
+        @type directory: str
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        header_path = os.path.join(directory, HEADER_FILE)
+        if os.path.exists(header_path):
+            check_header(header_path)
+        else:
+            with open(header_path, 'w') as header_file:
+                json.dump({"version": STORE_FORMAT_VERSION,
+                           "columns": {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()}}, header_file)
+        # a partially written last word is dropped before appending
+        words = read_lines(os.path.join(directory, VOCABULARY_FILE))
+        truncate(os.path.join(directory, VOCABULARY_FILE), sum(len(word.encode("utf-8")) + 1 for word in words))
+        self.vocabulary = Vocabulary(words)
+        utterance_ids = read_lines(os.path.join(directory, UTTERANCE_IDS_FILE))
+        offsets = read_complete_offsets(directory, len(utterance_ids), len(words))
+        self.utterance_count = len(offsets)
+        self.position_count = int(offsets[-1]) if len(offsets) else 0
+        # anything written after the last complete utterance is dropped
+        for name in COLUMNS:
+            truncate(column_path(directory, name), self.position_count * np.dtype(COLUMNS[name]).itemsize)
+        for name in [OFFSETS_FILE, VOCABULARY_SIZES_FILE]:
+            truncate(os.path.join(directory, name), self.utterance_count * np.dtype(np.int64).itemsize)
+        truncate(os.path.join(directory, UTTERANCE_IDS_FILE),
+                 sum(len(line.encode("utf-8")) + 1 for line in utterance_ids[:self.utterance_count]))
+        self.column_files = {name: open(column_path(directory, name), 'ab') for name in COLUMNS}
+        self.offsets_file = open(os.path.join(directory, OFFSETS_FILE), 'ab')
+        self.vocabulary_sizes_file = open(os.path.join(directory, VOCABULARY_SIZES_FILE), 'ab')
+        self.utterance_ids_file = open(os.path.join(directory, UTTERANCE_IDS_FILE), 'a', encoding="utf-8")
+        self.vocabulary_file = open(os.path.join(directory, VOCABULARY_FILE), 'a', encoding="utf-8")
+
+    def write(self, utterance_id, alignment, scores=None):
+        """
+        Append the alignment of an utterance
+        @param utterance_id: id of the utterance, without white space
+        @type utterance_id: str
+        @param alignment: alignment returned by align_without_word_repeat
+        @type alignment: SausagesTranscriptPair
+        @param scores: cost of every aligned position, see SausagesTranscriptAligner.score_alignment,
+        NaN if not given
+        @type scores: [float]
+        """
+        new_words = len(self.vocabulary)
+        slot_indices, word_ids, gap_flags = alignment_columns(alignment, self.vocabulary)
+        if scores is None:
+            scores = np.full(len(gap_flags), np.nan, dtype=COLUMNS["scores"])
+        elif len(scores) != len(gap_flags):
+            raise ValueError(f"{len(scores)} scores for {len(gap_flags)} aligned positions")
+        for word in self.vocabulary.words[new_words:]:
+            self.vocabulary_file.write(word + "\n")
+        columns = {"slot_indices": slot_indices, "word_ids": word_ids, "gap_flags": gap_flags,
+                   "scores": np.asarray(scores, dtype=COLUMNS["scores"])}
+        for name, column in columns.items():
+            self.column_files[name].write(column.tobytes())
+        self.position_count += len(gap_flags)
+        self.offsets_file.write(np.int64(self.position_count).tobytes())
+        self.vocabulary_sizes_file.write(np.int64(len(self.vocabulary)).tobytes())
+        self.utterance_ids_file.write(utterance_id + "\n")
+        self.utterance_count += 1
+
+    def flush(self):
+        """
+        Flush the written alignments, making them visible to readers opened afterwards
+        """
+        for stored_file in self.files():
+            stored_file.flush()
+
+    def close(self):
+        self.flush()
+        for stored_file in self.files():
+            stored_file.close()
+
+    def files(self):
+        return [self.vocabulary_file, *self.column_files.values(), self.offsets_file, self.vocabulary_sizes_file,
+                self.utterance_ids_file]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class AlignmentReader:
+    """
+    Memory-mapped reader of a columnar alignment store written by AlignmentWriter
+    Only the utterance ids and the vocabulary are read when opening, the columns are read
+    from the memory maps on access.
+    """
+
+    def __init__(self, directory):
+        """
+        @param directory: directory of the store
+        @type directory: str
+        """
+        self.directory = directory
+        check_header(os.path.join(directory, HEADER_FILE))
+        utterance_ids = read_lines(os.path.join(directory, UTTERANCE_IDS_FILE))
+        self.vocabulary = Vocabulary(read_lines(os.path.join(directory, VOCABULARY_FILE)))
+        offsets = read_complete_offsets(directory, len(utterance_ids), len(self.vocabulary))
+        self.utterance_ids = utterance_ids[:len(offsets)]
+        self.utterance_index = {utterance_id: index for index, utterance_id in enumerate(self.utterance_ids)}
+        self.offsets = np.concatenate([np.zeros(1, dtype=np.int64), offsets])
+        position_count = int(self.offsets[-1])
+        self.columns = {name: memmap_column(column_path(directory, name), COLUMNS[name], position_count)
+                        for name in COLUMNS}
+
+    def get_columns(self, utterance_id):
+        """
+        Get the columns of an utterance, as views of the memory maps
+        @rtype: StoredAlignment
+        """
+        index = self.utterance_index[utterance_id]
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return StoredAlignment(*(self.columns[name][start:end] for name in StoredAlignment._fields))
+
+    def get_wordlist(self, utterance_id):
+        """
+        Get the aligned transcript words of an utterance, "-" for gaps
+        @rtype: [str]
+        """
+        return ["-" if word_id < 0 else self.vocabulary[word_id]
+                for word_id in self.get_columns(utterance_id).word_ids.tolist()]
+
+    def get_alignment(self, utterance_id, sausages):
+        """
+        Rebuild the alignment of an utterance from its sausages
+        @param sausages: sausages of the utterance, as given to the aligner
+        @type sausages: Sausages
+        @rtype: SausagesTranscriptPair
+        """
+        slot_indices = self.get_columns(utterance_id).slot_indices.tolist()
+        aligned_sau = ["-" if slot < 0 else sausages[slot] for slot in slot_indices]
+        return SausagesTranscriptPair.create_from_sausages_wordlist(aligned_sau, self.get_wordlist(utterance_id))
+
+    def __getitem__(self, utterance_id):
+        return self.get_columns(utterance_id)
+
+    def __contains__(self, utterance_id):
+        return utterance_id in self.utterance_index
+
+    def __iter__(self):
+        return iter(self.utterance_ids)
+
+    def __len__(self):
+        return len(self.utterance_ids)
+
+
+def check_header(header_path):
+    with open(header_path, 'r') as header_file:
+        header = json.load(header_file)
+    if header.get("version") != STORE_FORMAT_VERSION:
+        raise ValueError(f"unsupported alignment store version {header.get('version')}")
+
+
+def read_lines(path):
+    """
+    Read the complete lines of an append-only text file, a partially written last line is ignored
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding="utf-8", newline="\n") as text_file:
+        lines = text_file.read().split("\n")
+    return lines[:-1]
+
+
+def read_complete_offsets(directory, utterance_count, vocabulary_size):
+    """
+    Read the end offsets of the utterances whose id, offset, columns and words are all written
+    Files flushed independently can be ahead of each other after an interruption.
+    @param utterance_count: number of written utterance ids
+    @type utterance_count: int
+    @param vocabulary_size: number of written vocabulary words
+    @type vocabulary_size: int
+    """
+    offsets_path = os.path.join(directory, OFFSETS_FILE)
+    vocabulary_sizes_path = os.path.join(directory, VOCABULARY_SIZES_FILE)
+    if not os.path.exists(offsets_path) or not os.path.exists(vocabulary_sizes_path):
+        return np.empty(0, dtype=np.int64)
+    offsets = np.fromfile(offsets_path, dtype=np.int64, count=utterance_count)
+    vocabulary_sizes = np.fromfile(vocabulary_sizes_path, dtype=np.int64, count=len(offsets))
+    written_positions = min(os.path.getsize(column_path(directory, name)) // np.dtype(dtype).itemsize
+                            if os.path.exists(column_path(directory, name)) else 0
+                            for name, dtype in COLUMNS.items())
+    # utterances referencing words beyond the written vocabulary are incomplete
+    complete = min(np.searchsorted(offsets[:len(vocabulary_sizes)], written_positions, side="right"),
+                   np.searchsorted(vocabulary_sizes, vocabulary_size, side="right"))
+    return offsets[:complete]
+
+
+def memmap_column(path, dtype, length):
+    if length == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(length,))
+
+
+def truncate(path, size):
+    if os.path.exists(path) and os.path.getsize(path) > size:
+        os.truncate(path, size)
@@ -0,0 +1,147 @@
+import bisect
+import collections
+
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+
+
+def longest_increasing_subsequence(values):
+    """
+    Find a longest strictly increasing subsequence
+    @param values: sequence of comparable values
+    @type values: list
+    @return: indices of the values of the subsequence
+    @rtype: [int]
+    """
+    # tails[k] is the index of the smallest last value of an increasing subsequence of length k + 1
+    tails = []
+    tail_values = []
+    previous = [None] * len(values)
+    for index, value in enumerate(values):
+        length = bisect.bisect_left(tail_values, value)
+        if length:
+            previous[index] = tails[length - 1]
+        if length == len(tails):
+            tails.append(index)
+            tail_values.append(value)
+        else:
+            tails[length] = index
+            tail_values[length] = value
+    subsequence = []
+    index = tails[-1] if tails else None
+    while index is not None:
+        subsequence.append(index)
+        index = previous[index]
+    subsequence.reverse()
+    return subsequence
+
+
+class AnchoredSegments:
+    """
+    Sausages and transcript split at anchors, pairs of a sausage and a word aligned to each other up front.
+    The segments between anchors are aligned independently and stitched back together with the anchors.
+    """
+
+    def __init__(self, sau, words, anchors):
+        """
+        @param sau: list of sausages
+        @type sau: Sausages
+        @param words: list of transcript words
+        @type words: [str]
+        @param anchors: (sausage index, word index) of the anchors, increasing in both indices
+        @type anchors: [(int, int)]
+        """
+        self.sau = sau
+        self.words = words
+        self.anchors = anchors
+        self.segments = []
+        previous_slot, previous_word = -1, -1
+        for slot, word in anchors + [(len(sau), len(words))]:
+            self.segments.append(SausagesTranscriptPair.create_from_sausages_wordlist(
+                [sau[index] for index in range(previous_slot + 1, slot)], list(words[previous_word + 1:word])))
+            previous_slot, previous_word = slot, word
+
+    def stitch(self, alignments):
+        """
+        Join the alignments of the segments and the anchors
+        @param alignments: alignment of every segment, in order
+        @type alignments: [SausagesTranscriptPair]
+        @rtype: SausagesTranscriptPair
+        """
+        stitched_sau = []
+        stitched_text = []
+        for index, (segment, alignment) in enumerate(zip(self.segments, alignments)):
+            if alignment:
+                stitched_sau.extend(alignment.get_sausages())
+                stitched_text.extend(alignment.get_wordlist())
+            else:
+                # the aligner does not align a segment without sausages or without words
+                segment_sau, segment_words = segment.get_sausages_wordlist()
+                stitched_sau.extend(list(segment_sau) + ["-"] * len(segment_words))
+                stitched_text.extend(["-"] * len(segment_sau) + list(segment_words))
+            if index < len(self.anchors):
+                slot, word = self.anchors[index]
+                stitched_sau.append(self.sau[slot])
+                stitched_text.append(self.words[word])
+        return SausagesTranscriptPair.create_from_sausages_wordlist(stitched_sau, stitched_text)
+
+
+class AnchorSegmenter:
+    """
+    Pre-alignment stage splitting long utterances at anchors.
+    An anchor is a sausage whose best word has at least min_weight of the weight of the sausage, and which
+    is the only such sausage for a word occurring once in the transcript. The largest set of anchors in the
+    same order in the sausages and in the transcript is kept.
+    """
+
+    def __init__(self, min_weight=0.9, epsilon_symbols=("<eps>",)):
+        """
+        @param min_weight: minimum fraction of the weight of a sausage on its best word
+        @type min_weight: float
+        @param epsilon_symbols: words standing for no word, never anchors
+        @type epsilon_symbols: tuple
+        """
+        self.min_weight = min_weight
+        self.epsilon_symbols = set(epsilon_symbols)
+
+    def dominant_word(self, sausage):
+        """
+        Get the best word of a sausage if it carries at least min_weight of the weight of the sausage
+        @rtype: str
+        """
+        weights = sausage.get_weights()
+        total = sum(weights)
+        if total <= 0:
+            return None
+        best = max(range(len(weights)), key=weights.__getitem__)
+        if weights[best] < self.min_weight * total:
+            return None
+        word = sausage.get_words()[best]
+        return None if word in self.epsilon_symbols else word
+
+    def find_anchors(self, sau, words):
+        """
+        Find the anchors of sausages and a transcript
+        @param sau: list of sausages
+        @type sau: Sausages
+        @param words: list of transcript words
+        @type words: [str]
+        @return: (sausage index, word index) of the anchors, increasing in both indices
+        @rtype: [(int, int)]
+        """
+        word_counts = collections.Counter(words)
+        candidates = [(slot, self.dominant_word(sausage)) for slot, sausage in enumerate(sau)]
+        candidates = [(slot, word) for slot, word in candidates if word is not None and word_counts[word] == 1]
+        slot_counts = collections.Counter(word for _, word in candidates)
+        word_index = {word: index for index, word in enumerate(words)}
+        candidates = [(slot, word_index[word]) for slot, word in candidates if slot_counts[word] == 1]
+        return [candidates[index] for index in longest_increasing_subsequence([word for _, word in candidates])]
+
+    def segment(self, sau_and_text):
+        """
+        Split sausages and a transcript at their anchors
+        @param sau_and_text: a SausageAndTranscriptPair object
+        @type sau_and_text: SausagesTranscriptPair
+        @rtype: AnchoredSegments
+        """
+        sau, words = sau_and_text.get_sausages_wordlist()
+        return AnchoredSegments(sau, words, self.find_anchors(sau, words))
@@ -0,0 +1,91 @@
+import collections
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+# aligner of a worker process, set once by init_worker
+worker_aligner = None
+
+
+def init_worker(aligner):
+    """
+    Keep the aligner, and with it the lexicon, in the worker process for all of its tasks
+    """
+    global worker_aligner
+    worker_aligner = aligner
+    # the worker only reports what it counts itself
+    if aligner.stats is not None:
+        aligner.stats.reset()
+
+
+def align_chunk(chunk, score_func_name, engine, engine_options):
+    """
+    Align a chunk of (index, SausagesTranscriptPair) in a worker process
+    @return: list of (index, alignment) and the statistics of the chunk if instrumentation is enabled
+    @rtype: ([(int, SausagesTranscriptPair)], AlignmentStats)
+    """
+    results = [(index, worker_aligner.align_without_word_repeat(sau_and_text, score_func_name, engine,
+                                                                **engine_options))
+               for index, sau_and_text in chunk]
+    # workers may be stopped without cleanup, their new distances are appended after every chunk
+    worker_aligner.flush_distance_store()
+    stats = worker_aligner.disable_instrumentation()
+    if stats is not None:
+        worker_aligner.enable_instrumentation()
+    return results, stats
+
+
+def chunked(iterable, chunk_size):
+    """
+    Lazily split an iterable into lists of chunk_size items
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def align_many(aligner, pairs, score_func_name, engine="python", workers=None, chunk_size=16,
+               max_in_flight=None, ordered=True, **engine_options):
+    """
+    Align pairs over a process pool, see SausagesTranscriptAligner.align_many
+    """
+    if workers == 1:
+        for index, sau_and_text in enumerate(pairs):
+            alignment = aligner.align_without_word_repeat(sau_and_text, score_func_name, engine, **engine_options)
+            yield alignment if ordered else (index, alignment)
+        return
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+
+    def chunk_results(future):
+        results, stats = future.result()
+        # statistics of the workers are added to the ones of the aligner
+        if stats is not None and aligner.stats is not None:
+            aligner.stats.merge(stats)
+        return results
+
+    def finished_results(in_flight):
+        # results of the oldest chunk, or of any finished chunk if the order does not matter
+        if ordered:
+            return [alignment for _, alignment in chunk_results(in_flight.popleft())]
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        results = []
+        for future in done:
+            in_flight.remove(future)
+            results.extend(chunk_results(future))
+        return results
+
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(aligner,)) as pool:
+        in_flight = collections.deque()
+        for chunk in chunked(enumerate(pairs), chunk_size):
+            in_flight.append(pool.submit(align_chunk, chunk, score_func_name, engine, engine_options))
+            if len(in_flight) >= max_in_flight:
+                yield from finished_results(in_flight)
+        while in_flight:
+            yield from finished_results(in_flight)
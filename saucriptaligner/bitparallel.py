@@ -0,0 +1,134 @@
+import numpy as np
+
+# below this many candidates, numpy call overhead outweighs the bit-parallel kernel
+VECTORIZED_MIN_CANDIDATES = 256
+# longest query handled with 64 bit words, longer queries fall back to editdistance
+MAX_QUERY_LENGTH = 64
+
+
+def pack_sequences(sequences):
+    """
+    Pack integer sequences into a matrix padded with -1
+    @param sequences: sequences of non negative integer symbols
+    @type sequences: [[int]]
+    @return: padded matrix of shape (len(sequences), longest length) and the length of every sequence
+    @rtype: (np.ndarray, np.ndarray)
+    """
+    lengths = np.fromiter((len(sequence) for sequence in sequences), dtype=np.int64, count=len(sequences))
+    padded = np.full((len(sequences), int(lengths.max()) if len(sequences) else 0), -1, dtype=np.int64)
+    for index, sequence in enumerate(sequences):
+        padded[index, :len(sequence)] = sequence
+    return padded, lengths
+
+
+def edit_distances_packed(query, padded, lengths):
+    """
+    Levenshtein distances from a query to many packed candidates
+    Myers' bit-parallel algorithm, in the formulation of Hyyro, with the top row of the matrix counting
+    insertions so that it computes the global edit distance. Bit i of a 64 bit word holds row i of
+    the column of the matrix, and all candidates advance one symbol per step as numpy vectors.
+    @param query: sequence of 1 to 64 non negative integer symbols
+    @type query: [int]
+    @param padded: candidates packed by pack_sequences
+    @type padded: np.ndarray
+    @param lengths: length of every candidate
+    @type lengths: np.ndarray
+    @rtype: np.ndarray
+    """
+    m = len(query)
+    # symbol -> bitmask of its positions in the query, the padding symbol -1 maps to the last, empty, entry
+    largest_symbol = max(max(query), int(padded.max()) if padded.size else 0)
+    masks = np.zeros(largest_symbol + 2, dtype=np.uint64)
+    for position, symbol in enumerate(query):
+        masks[symbol] |= np.uint64(1 << position)
+    eq_matrix = masks[padded]
+
+    all_ones = np.uint64((1 << m) - 1)
+    high_bit = np.uint64(1 << (m - 1))
+    one = np.uint64(1)
+    vp = np.full(len(lengths), all_ones, dtype=np.uint64)
+    vn = np.zeros(len(lengths), dtype=np.uint64)
+    distances = np.full(len(lengths), m, dtype=np.int64)
+    for position in range(padded.shape[1]):
+        active = position < lengths
+        eq = eq_matrix[:, position]
+        xv = eq | vn
+        xh = (((eq & vp) + vp) ^ vp) | eq
+        hp = vn | (~(xh | vp) & all_ones)
+        hn = vp & xh
+        hp_high = (hp & high_bit) != 0
+        distances += active & hp_high
+        distances -= active & ((hn & high_bit) != 0) & ~hp_high
+        hp = ((hp << one) | one) & all_ones
+        hn = (hn << one) & all_ones
+        vp = np.where(active, hn | (~(xv | hp) & all_ones), vp)
+        vn = np.where(active, hp & xv, vn)
+    return distances
+
+
+def edit_distances(query, candidates):
+    """
+    Levenshtein distances from one query to many candidates
+    Large batches run through the bit-parallel kernel, small ones through editdistance, which is
+    faster than any vectorized kernel for a handful of candidates.
+    @param query: sequence of non negative integer symbols
+    @type query: [int]
+    @param candidates: sequences of non negative integer symbols
+    @type candidates: [[int]]
+    @rtype: [int]
+    """
+    if len(candidates) >= VECTORIZED_MIN_CANDIDATES and 0 < len(query) <= MAX_QUERY_LENGTH:
+        return edit_distances_packed(query, *pack_sequences(candidates)).tolist()
+    import editdistance
+    return [editdistance.eval(query, candidate) for candidate in candidates]
+
+
+def normalized_edit_distances(query, query_length, candidates, candidate_lengths):
+    """
+    Edit distances from one pronunciation to many, normalized like average_edit_distance
+    by the longest pronunciation string of every pair
+    @param query: phoneme ids of the query pronunciation
+    @type query: [int]
+    @param query_length: length of the query pronunciation string
+    @type query_length: int
+    @param candidates: phoneme ids of the candidate pronunciations
+    @type candidates: [[int]]
+    @param candidate_lengths: lengths of the candidate pronunciation strings
+    @type candidate_lengths: [int]
+    @rtype: [float]
+    """
+    return [distance / max(query_length, length)
+            for distance, length in zip(edit_distances(query, candidates), candidate_lengths)]
+
+
+def min_variant_distances(query_variants, candidate_variants):
+    """
+    Normalized edit distances from a word to many words, the minimum over all their pronunciation pairs
+    The first pronunciations are compared in one batch. The other pairs are then compared one batch per
+    query pronunciation, leaving out the pairs whose lower bound, the difference of their numbers of phonemes,
+    cannot beat the best distance found so far.
+    @param query_variants: (phoneme ids, pronunciation string length) of every pronunciation of the query
+    @type query_variants: [([int], int)]
+    @param candidate_variants: pronunciations of every candidate, like query_variants
+    @type candidate_variants: [[([int], int)]]
+    @rtype: [float]
+    """
+    query, query_length = query_variants[0]
+    best = normalized_edit_distances(query, query_length, [variants[0][0] for variants in candidate_variants],
+                                     [variants[0][1] for variants in candidate_variants])
+    for query_index, (query, query_length) in enumerate(query_variants):
+        owners = []
+        candidates = []
+        candidate_lengths = []
+        for owner, variants in enumerate(candidate_variants):
+            for candidate, length in variants[1:] if query_index == 0 else variants:
+                if abs(len(query) - len(candidate)) / max(query_length, length) < best[owner]:
+                    owners.append(owner)
+                    candidates.append(candidate)
+                    candidate_lengths.append(length)
+        if owners:
+            distances = normalized_edit_distances(query, query_length, candidates, candidate_lengths)
+            for owner, distance in zip(owners, distances):
+                if distance < best[owner]:
+                    best[owner] = distance
+    return best
@@ -0,0 +1,222 @@
+"""
+Command line tool aligning kaldi sausages and transcripts in bulk.
+
+    saucriptaligner SAUSAGES TRANSCRIPTS --lexicon cmudict-0.7b --workers 4 --format jsonl -o alignments.jsonl
+
+SAUSAGES and TRANSCRIPTS are kaldi files, optionally gzip compressed, or directories of them paired by file name.
+Only the argument parsing is done at import time, everything else is imported when the alignment starts.
+"""
+import argparse
+import collections
+import json
+import os
+import sys
+import warnings
+
+OUTPUT_FORMATS = ["jsonl", "ctm", "columnar"]
+
+
+def input_file_pairs(sausages_path, transcripts_path):
+    """
+    List the sausages and transcript files to align
+    Two directories are paired by file name, files without a counterpart are skipped with a warning.
+    @param sausages_path: kaldi sausages file or directory of them
+    @type sausages_path: str
+    @param transcripts_path: kaldi text file or directory of them
+    @type transcripts_path: str
+    @rtype: [(str, str)]
+    """
+    if os.path.isdir(sausages_path) != os.path.isdir(transcripts_path):
+        raise ValueError("sausages and transcripts must both be files or both be directories")
+    if not os.path.isdir(sausages_path):
+        return [(sausages_path, transcripts_path)]
+    sausages_names = set(os.listdir(sausages_path))
+    transcripts_names = set(os.listdir(transcripts_path))
+    unpaired = sausages_names ^ transcripts_names
+    if unpaired:
+        warnings.warn(f"{len(unpaired)} files have no counterpart and were skipped: {', '.join(sorted(unpaired))}")
+    return [(os.path.join(sausages_path, name), os.path.join(transcripts_path, name))
+            for name in sorted(sausages_names & transcripts_names)]
+
+
+def iter_utterances(file_pairs, null_symbols=()):
+    """
+    Lazily read the utterances of all file pairs
+    @return: generator of (utterance id, SausagesTranscriptPair)
+    """
+    from saucriptaligner.create_sausages import iter_sausages_word_pairs_from_kaldi_files
+
+    for sausages_file, transcript_file in file_pairs:
+        yield from iter_sausages_word_pairs_from_kaldi_files(sausages_file, transcript_file, null_symbols)
+
+
+def is_gap(item):
+    return isinstance(item, str) and item == "-"
+
+
+def aligned_positions(alignment):
+    """
+    Get the (sausage, word) positions of an alignment, none for the empty alignment of an empty utterance
+    """
+    if not alignment:
+        return []
+    return zip(alignment.get_sausages(), alignment.get_wordlist())
+
+
+def alignment_to_records(alignment):
+    """
+    Convert an alignment to json serializable records, one per aligned position, gaps are null
+    @type alignment: SausagesTranscriptPair
+    @rtype: [dict]
+    """
+    positions = []
+    for sausage, word in aligned_positions(alignment):
+        positions.append({
+            "word": None if is_gap(word) else word,
+            "edges": None if is_gap(sausage) else [[edge_word, float(weight)] for edge_word, weight in
+                                                   zip(sausage.get_words(), sausage.get_weights())]
+        })
+    return positions
+
+
+def alignment_to_json(utterance_id, alignment):
+    """
+    Format an alignment as a json line, gaps are null
+    @type utterance_id: str
+    @type alignment: SausagesTranscriptPair
+    @rtype: str
+    """
+    return json.dumps({"utterance_id": utterance_id, "alignment": alignment_to_records(alignment)})
+
+
+def alignment_to_ctm(utterance_id, alignment):
+    """
+    Format an alignment as CTM style lines, one per transcript word
+    Sausages stand in for time: the start of a word is the index of its sausage and its duration 1,
+    a word aligned to no sausage starts after the previous sausage and lasts 0. The confidence is the
+    weight of the word in its sausage.
+    @type utterance_id: str
+    @type alignment: SausagesTranscriptPair
+    @rtype: str
+    """
+    lines = []
+    slot = 0
+    for sausage, word in aligned_positions(alignment):
+        if is_gap(sausage):
+            duration, confidence = 0, 0.
+        else:
+            duration = 1
+            confidence = sum(float(weight) for edge_word, weight in zip(sausage.get_words(), sausage.get_weights())
+                             if edge_word == word)
+        if not is_gap(word):
+            lines.append(f"{utterance_id} 1 {slot} {duration} {word} {confidence:.6f}\n")
+        slot += duration
+    return "".join(lines)
+
+
+def add_aligner_arguments(parser):
+    """
+    Add the arguments configuring the aligner, see create_aligner
+    @type parser: argparse.ArgumentParser
+    """
+    parser.add_argument("--lexicon", help="cmu dict file, downloaded into --data-dir if not given")
+    parser.add_argument("--data-dir", default="../data", help="directory of the downloaded cmu dict")
+    parser.add_argument("--score-func", default="w-avg-dist", help="score function, w-avg-dist, avg-dist or emb-dist")
+    parser.add_argument("--conf2vec", nargs=2, metavar=("VECTORS", "WORDS"),
+                        help="word vectors .npy file and word list of the emb-dist score function")
+    parser.add_argument("--distance-store",
+                        help="SQLite database of phoneme distances, reused by later runs and shared by the workers")
+    parser.add_argument("--engine", default="numpy", help="dynamic programming engine")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, 0 for one per cpu")
+    parser.add_argument("--null-symbol", action="append", default=[],
+                        help="skip sausages made only of this symbol, can be repeated")
+
+
+def create_aligner(args):
+    """
+    Create the aligner configured by the arguments of add_aligner_arguments, loading the lexicon
+    @rtype: SausagesTranscriptAligner
+    """
+    from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+    from saucriptaligner.conf2vec import Conf2Vec
+    from saucriptaligner import lexicon
+
+    aligner = SausagesTranscriptAligner(conf2vec=Conf2Vec.load(*args.conf2vec) if args.conf2vec else None)
+    if args.lexicon is not None:
+        aligner.set_lexicon_dict(lexicon.load_compiled_lexicon(args.lexicon))
+    else:
+        aligner.set_data_dir(args.data_dir)
+        aligner.get_compiled_lexicon_from_cmu_file()
+    if args.distance_store is not None:
+        aligner.open_distance_store(args.distance_store)
+    return aligner
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="saucriptaligner",
+                                     description="Align kaldi sausages (confusion networks) and transcripts")
+    parser.add_argument("sausages", help="kaldi sausages file, or directory of them")
+    parser.add_argument("transcripts", help="kaldi text file, or directory of them named like the sausages files")
+    add_aligner_arguments(parser)
+    parser.add_argument("--chunk-size", type=int, default=16, help="utterances sent to a worker at once")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="jsonl", help="output format")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file, - for standard output, or store directory of the columnar format")
+    parser.add_argument("--no-progress", action="store_true", help="do not show the progress")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    file_pairs = input_file_pairs(args.sausages, args.transcripts)
+
+    from tqdm.auto import tqdm
+
+    aligner = create_aligner(args)
+    if args.score_func not in aligner.score_functions:
+        print(f"unknown score function {args.score_func}", file=sys.stderr)
+        return 2
+
+    # alignments come back in order, the utterance ids of the pairs in flight wait for them here
+    utterance_ids = collections.deque()
+
+    def pairs():
+        for utterance_id, sau_and_text in iter_utterances(file_pairs, args.null_symbol):
+            utterance_ids.append(utterance_id)
+            yield sau_and_text
+
+    if args.format == "columnar":
+        if args.output == "-":
+            print("the columnar format needs an output directory", file=sys.stderr)
+            return 2
+        from saucriptaligner.alignment_store import AlignmentWriter
+        writer = AlignmentWriter(args.output)
+
+        def write(utterance_id, alignment):
+            writer.write(utterance_id, alignment, aligner.score_alignment(alignment, args.score_func))
+
+        close = writer.close
+    else:
+        format_alignment = alignment_to_json if args.format == "jsonl" else alignment_to_ctm
+        output = sys.stdout if args.output == "-" else open(args.output, 'w')
+
+        def write(utterance_id, alignment):
+            record = format_alignment(utterance_id, alignment)
+            output.write(record if args.format == "ctm" else record + "\n")
+
+        close = output.flush if output is sys.stdout else output.close
+    try:
+        alignments = aligner.align_many(pairs(), args.score_func, args.engine, workers=args.workers or None,
+                                        chunk_size=args.chunk_size)
+        with tqdm(alignments, unit="utt", file=sys.stderr, disable=args.no_progress) as progress:
+            for alignment in progress:
+                write(utterance_ids.popleft(), alignment)
+    finally:
+        close()
+        if aligner.distance_store is not None:
+            aligner.distance_store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
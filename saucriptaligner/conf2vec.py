@@ -0,0 +1,136 @@
+import numpy as np
+
+from saucriptaligner.sau_text_pair import CompactSausages, Vocabulary
+
+
+class Conf2Vec:
+    """
+    Word vectors used to score sausages against words.
+    Vectors are rows of a matrix, which can be a memory map of a .npy file, indexed through a vocabulary.
+    """
+
+    def __init__(self, vocabulary, vectors):
+        """
+        @param vocabulary: words, ids index the rows of vectors
+        @type vocabulary: Vocabulary
+        @param vectors: matrix of shape (len(vocabulary), dimension)
+        @type vectors: np.ndarray
+        """
+        self.vocabulary = vocabulary
+        self.vectors = vectors
+        # files the vectors were loaded from, see load
+        self.paths = None
+
+    @staticmethod
+    def create_from_dict(word_vectors):
+        """
+        Create Conf2Vec from a dictionary of word to vector
+        @type word_vectors: dict
+        """
+        vocabulary = Vocabulary(word_vectors)
+        vectors = np.array([word_vectors[word] for word in vocabulary], dtype=np.float32)
+        return Conf2Vec(vocabulary, vectors.reshape(len(vocabulary), -1))
+
+    @staticmethod
+    def load(vectors_path, words_path):
+        """
+        Load vectors saved by save, the vectors are memory-mapped
+        @param vectors_path: .npy file of the vectors
+        @type vectors_path: str
+        @param words_path: text file with the word of every vector, one per line
+        @type words_path: str
+        """
+        with open(words_path, 'r') as words_file:
+            vocabulary = Vocabulary(line.rstrip("\n") for line in words_file)
+        conf2vec = Conf2Vec(vocabulary, np.load(vectors_path, mmap_mode='r'))
+        conf2vec.paths = (vectors_path, words_path)
+        return conf2vec
+
+    def save(self, vectors_path, words_path):
+        """
+        Save the vectors as a .npy file and the words as a text file
+        """
+        np.save(vectors_path, np.asarray(self.vectors))
+        with open(words_path, 'w') as words_file:
+            for word in self.vocabulary:
+                words_file.write(word + "\n")
+
+    def unit_vectors(self, words):
+        """
+        Get the normalized vectors of words
+        @return: matrix of unit vectors and whether every word has a non zero vector
+        @rtype: (np.ndarray, np.ndarray)
+        """
+        word_ids = self.vocabulary.word_ids
+        known = np.array([word in word_ids for word in words], dtype=bool)
+        vectors = np.zeros((len(words), self.vectors.shape[1]), dtype=np.float64)
+        if known.any():
+            vectors[known] = self.vectors[[word_ids[word] for word, is_known in zip(words, known) if is_known]]
+        norms = np.linalg.norm(vectors, axis=1)
+        known &= norms > 0
+        vectors[known] /= norms[known, None]
+        return vectors, known
+
+    def slot_unit_vectors(self, sau):
+        """
+        Get the normalized, confidence weighted average vector of every sausage
+        Edges of unknown words are left out of the average. The weighted vectors of the edges are summed
+        into their sausage, reading the edge arrays of CompactSausages directly.
+        @return: matrix of unit vectors and whether every sausage has a known edge
+        @rtype: (np.ndarray, np.ndarray)
+        """
+        if isinstance(sau, CompactSausages):
+            start, end = sau.offsets[0], sau.offsets[-1]
+            edge_slots = np.repeat(np.arange(len(sau)), np.diff(sau.offsets))
+            used_ids, edge_words = np.unique(sau.word_ids[start:end], return_inverse=True)
+            words = [sau.vocabulary[word_id] for word_id in used_ids]
+            edge_weights = sau.weights[start:end].astype(np.float64)
+        else:
+            vocabulary = Vocabulary()
+            edge_slots = []
+            edge_words = []
+            edge_weights = []
+            for i, sausage in enumerate(sau):
+                for word, weight in zip(sausage.get_words(), sausage.get_weights()):
+                    edge_slots.append(i)
+                    edge_words.append(vocabulary.add(word))
+                    edge_weights.append(weight)
+            words = vocabulary.words
+            edge_weights = np.array(edge_weights, dtype=np.float64)
+        word_vectors, _ = self.unit_vectors(words)
+        edge_words = np.asarray(edge_words, dtype=np.int64).reshape(-1)
+        # vectors of unknown words are zero, they add nothing to the average
+        slot_vectors = np.zeros((len(sau), word_vectors.shape[1]), dtype=np.float64)
+        np.add.at(slot_vectors, np.asarray(edge_slots, dtype=np.int64),
+                  edge_weights[:, None] * word_vectors[edge_words])
+        norms = np.linalg.norm(slot_vectors, axis=1)
+        known = norms > 0
+        slot_vectors[known] /= norms[known, None]
+        return slot_vectors, known
+
+    def cost_matrix(self, sau, words):
+        """
+        Compute the cosine cost of every sausage against every word with one matrix product
+        The cost is (1 - cosine similarity) / 2, between 0 and 1.
+        @return: cost matrix of shape (len(sau), len(words)) and the matrix of cells having no vector
+        @rtype: (np.ndarray, np.ndarray)
+        """
+        slot_vectors, known_slots = self.slot_unit_vectors(sau)
+        word_vectors, known_words = self.unit_vectors(words)
+        costs = np.clip((1 - slot_vectors @ word_vectors.T) / 2, 0, 1)
+        return costs, ~(known_slots[:, None] & known_words[None, :])
+
+    def __contains__(self, word):
+        return word in self.vocabulary
+
+    def __getitem__(self, word):
+        return self.vectors[self.vocabulary.index(word)]
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def __reduce__(self):
+        # workers reopen the memory map instead of receiving a copy of the vectors
+        if self.paths is not None:
+            return Conf2Vec.load, self.paths
+        return Conf2Vec, (self.vocabulary, np.asarray(self.vectors))
@@ -0,0 +1,158 @@
+import gzip
+import sys
+import warnings
+from saucriptaligner.sau_text_pair import Sausages, SausagesTranscriptPair, CompactSausages
+
+sys.path.append('../')
+
+
+def sausages_from_tokens(tokens, null_symbols=(), vocabulary=None):
+    """
+    This function builds sausages from the whitespace separated tokens of a kaldi sausages string
+    :param tokens: tokens of the sausages, starting with the "[" of the first sausage
+    :param null_symbols: sausages made only of one of these symbols are skipped
+    :param vocabulary: if given, CompactSausages sharing this vocabulary are returned
+    :return: Sausages
+    """
+    sau = []
+    word_weight_pair = None
+    word = None
+    for token in tokens:
+        if token == "[":
+            word_weight_pair = []
+        elif token == "]":
+            if not (len(word_weight_pair) == 1 and word_weight_pair[0][0] in null_symbols):
+                sau.append(word_weight_pair)
+        elif word is None:
+            word = token
+        else:
+            word_weight_pair.append((word, float(token)))
+            word = None
+    if vocabulary is not None:
+        return CompactSausages.create_from_edges_array(sau, vocabulary)
+    return Sausages.create_from_edges_array(sau)
+
+
+def sausages_from_kaldi_sausages_string(kaldi_sausages_string, null_symbols=(), vocabulary=None):
+    """
+    This function takes a string of sausages in kaldi format and returns a list of sausages
+    :param kaldi_sausages_string: a string of sausages in kaldi format
+    see test/test_aligner.py for example
+    :param null_symbols: sausages made only of one of these symbols are skipped
+    :param vocabulary: if given, CompactSausages sharing this vocabulary are returned
+    :return: Sausages
+    """
+    return sausages_from_tokens(kaldi_sausages_string.split(), null_symbols, vocabulary)
+
+
+def open_text_file(path):
+    """
+    This function opens a text file for reading, gzip compressed if its name ends with .gz
+    """
+    if str(path).endswith(".gz"):
+        return gzip.open(path, 'rt')
+    return open(path, 'r')
+
+
+def read_kaldi_sausages(sausages_file, null_symbols=(), vocabulary=None):
+    """
+    This function lazily reads a kaldi sausages file, one "utterance-id [ word weight ... ] ..." line at a time
+    :param sausages_file: a file of sausages in kaldi format, optionally gzip compressed
+    :param null_symbols: sausages made only of one of these symbols are skipped
+    :param vocabulary: if given, CompactSausages sharing this vocabulary are returned
+    :return: generator of (utterance id, Sausages)
+    """
+    with open_text_file(sausages_file) as f:
+        for line in f:
+            tokens = line.split()
+            if tokens:
+                yield tokens[0], sausages_from_tokens(tokens[1:], null_symbols, vocabulary)
+
+
+def read_kaldi_transcripts(transcript_file):
+    """
+    This function lazily reads a kaldi text file, one "utterance-id word word ..." line at a time
+    :param transcript_file: a file of words in kaldi format, optionally gzip compressed
+    :return: generator of (utterance id, [str])
+    """
+    with open_text_file(transcript_file) as f:
+        for line in f:
+            tokens = line.split()
+            if tokens:
+                yield tokens[0], tokens[1:]
+
+
+def iter_sausages_word_pairs_from_kaldi_files(sausages_file, transcript_file, null_symbols=(), vocabulary=None):
+    """
+    This function lazily pairs the sausages and the transcripts of two kaldi files by utterance id
+    Both files are read in lockstep, utterances only kept in memory until their counterpart is found.
+    Memory use is constant when both files list the utterances in the same order, as kaldi does.
+    Once one file is exhausted, the other file's utterances without a pending counterpart are discarded.
+    :param sausages_file: a file of sausages in kaldi format, optionally gzip compressed
+    :param transcript_file: a file of words in kaldi format, optionally gzip compressed
+    :param null_symbols: sausages made only of one of these symbols are skipped
+    :param vocabulary: if given, CompactSausages sharing this vocabulary are used
+    :return: generator of (utterance id, SausagesTranscriptPair)
+    """
+    sausages_reader = read_kaldi_sausages(sausages_file, null_symbols, vocabulary)
+    transcript_reader = read_kaldi_transcripts(transcript_file)
+    pending_sausages = {}
+    pending_transcripts = {}
+    skipped_sausages = 0
+    skipped_transcripts = 0
+    while sausages_reader is not None or transcript_reader is not None:
+        if sausages_reader is not None:
+            try:
+                utterance_id, sau = next(sausages_reader)
+            except StopIteration:
+                sausages_reader = None
+            else:
+                if utterance_id in pending_transcripts:
+                    wordlist = pending_transcripts.pop(utterance_id)
+                    yield utterance_id, SausagesTranscriptPair.create_from_sausages_wordlist(sau, wordlist)
+                elif transcript_reader is None:
+                    skipped_sausages += 1
+                else:
+                    pending_sausages[utterance_id] = sau
+        if transcript_reader is not None:
+            try:
+                utterance_id, wordlist = next(transcript_reader)
+            except StopIteration:
+                transcript_reader = None
+            else:
+                if utterance_id in pending_sausages:
+                    sau = pending_sausages.pop(utterance_id)
+                    yield utterance_id, SausagesTranscriptPair.create_from_sausages_wordlist(sau, wordlist)
+                elif sausages_reader is None:
+                    skipped_transcripts += 1
+                else:
+                    pending_transcripts[utterance_id] = wordlist
+    skipped_sausages += len(pending_sausages)
+    skipped_transcripts += len(pending_transcripts)
+    if skipped_sausages or skipped_transcripts:
+        warnings.warn(f"{skipped_sausages} sausages and {skipped_transcripts} transcripts "
+                      f"have no counterpart and were skipped")
+
+
+def create_sausages_word_pair_from_kaldi_files(sausages_file, transcript_file):
+    """
+    This function takes a file of sausages and a file of words and returns a list of sausages
+    :param sausages_file: a file of sausages in kaldi format
+    :param transcript_file: a file of words in kaldi format
+    :return: [SausagesTranscriptPair]
+    """
+    sausages = []
+    with open(sausages_file, 'r') as f:
+        for line in f:
+            sausages.append(sausages_from_kaldi_sausages_string(line))
+
+    texts = []
+    with open(transcript_file, 'r') as f:
+        for line in f:
+            texts.append(line.strip())
+
+    sausage_transcript_pair = []
+    for i in range(len(sausages)):
+        sausage_transcript_pair.append(SausagesTranscriptPair.create_from_sausages_wordlist(sausages[i], texts[i]))
+
+    return sausage_transcript_pair
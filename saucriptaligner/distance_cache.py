@@ -0,0 +1,88 @@
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class PhonemeDistanceCache:
+    """
+    Bounded LRU cache of word pair distances.
+    The cache is symmetric, distance(a, b) and distance(b, a) share one entry.
+    """
+
+    def __init__(self, maxsize=2 ** 16):
+        """
+        @param maxsize: maximum number of cached pairs, None for unbounded and 0 to disable caching
+        @type maxsize: int
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(word1, word2):
+        """
+        Build an order independent key for a word pair
+        """
+        # ordering by hash keeps the key symmetric without comparing str with int
+        if hash(word1) <= hash(word2):
+            return word1, word2
+        return word2, word1
+
+    def get(self, word1, word2):
+        """
+        Get the cached distance of a word pair
+        @return: the cached distance or None if the pair is not cached
+        @rtype: float
+        """
+        key = self.make_key(word1, word2)
+        try:
+            distance = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return distance
+
+    def put(self, word1, word2, distance):
+        """
+        Store the distance of a word pair, evicting the least recently used pair if the cache is full
+        """
+        if self.maxsize == 0:
+            return
+        self.entries[self.make_key(word1, word2)] = distance
+        if self.maxsize is not None and len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def resize(self, maxsize):
+        """
+        Change the maximum number of cached pairs, evicting the least recently used pairs if needed
+        @param maxsize: maximum number of cached pairs, None for unbounded and 0 to disable caching
+        @type maxsize: int
+        """
+        self.maxsize = maxsize
+        if maxsize is not None:
+            while len(self.entries) > maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove all cached pairs and reset the statistics
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """
+        Get hit/miss statistics of the cache
+        @rtype: CacheInfo
+        """
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.entries))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, pair):
+        return self.make_key(*pair) in self.entries
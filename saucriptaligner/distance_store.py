@@ -0,0 +1,157 @@
+import sqlite3
+
+# largest number of words of each side of the pairs looked up in one query, below the SQLite limit of bound parameters
+LOOKUP_CHUNK_SIZE = 400
+
+
+class DistanceStore:
+    """
+    Persistent word pair distances shared by processes and runs, in an SQLite database.
+    Distances are stored under a namespace naming what they were computed from, the version of the lexicon
+    and the name of the distance, so a store can hold the distances of several lexicons. The database uses
+    a write-ahead log: processes read while another one appends, and appends of concurrent processes wait
+    for each other. Distances are looked up a batch of pairs at a time, see get_all, and new distances
+    are buffered and appended in batches, one transaction per batch; only the buffer is kept in memory.
+    The store is symmetric like PhonemeDistanceCache.
+    """
+
+    def __init__(self, path, lexicon_version, distance_name, batch_size=4096, timeout=60.):
+        """
+        @param path: path of the database, created if missing
+        @type path: str
+        @param lexicon_version: version of the lexicon the distances are computed with, see lexicon.lexicon_version
+        @type lexicon_version: str
+        @param distance_name: name of the distance, e.g. "phoneme-edit"
+        @type distance_name: str
+        @param batch_size: number of new distances buffered before they are appended
+        @type batch_size: int
+        @param timeout: seconds to wait for the appends of other processes
+        @type timeout: float
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.connection = sqlite3.connect(path, timeout=timeout)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # a crash can lose the last batches but never corrupts the database
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS namespaces (id INTEGER PRIMARY KEY, "
+                                    "lexicon_version TEXT NOT NULL, distance_name TEXT NOT NULL, "
+                                    "UNIQUE (lexicon_version, distance_name))")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS distances (namespace INTEGER NOT NULL, "
+                                    "word1 TEXT NOT NULL, word2 TEXT NOT NULL, distance REAL NOT NULL, "
+                                    "PRIMARY KEY (namespace, word1, word2)) WITHOUT ROWID")
+        self.pending = {}
+        self.set_namespace(lexicon_version, distance_name)
+
+    def set_namespace(self, lexicon_version, distance_name):
+        """
+        Read and write the distances of another lexicon or distance, appending the pending distances first
+        """
+        self.flush()
+        self.lexicon_version = lexicon_version
+        self.distance_name = distance_name
+        with self.connection:
+            self.connection.execute("INSERT OR IGNORE INTO namespaces (lexicon_version, distance_name) VALUES (?, ?)",
+                                    (lexicon_version, distance_name))
+        self.namespace = self.connection.execute(
+            "SELECT id FROM namespaces WHERE lexicon_version = ? AND distance_name = ?",
+            (lexicon_version, distance_name)).fetchone()[0]
+
+    @staticmethod
+    def make_key(word1, word2):
+        """
+        Build an order independent key for a word pair
+        """
+        # unlike the hash ordering of PhonemeDistanceCache, string ordering is the same in every process
+        word1, word2 = str(word1), str(word2)
+        if word1 <= word2:
+            return word1, word2
+        return word2, word1
+
+    def get(self, word1, word2):
+        """
+        Get the stored distance of a word pair
+        @return: the distance or None if the pair is not stored
+        @rtype: float
+        """
+        return self.get_all([word1], [word2]).get((word1, word2))
+
+    def get_many(self, word, other_words):
+        """
+        Get the stored distances between a word and many words
+        @return: dictionary of the other words whose distance is stored to their distance
+        @rtype: dict
+        """
+        return {other_word: distance for (_, other_word), distance in self.get_all([word], other_words).items()}
+
+    def get_all(self, words, other_words):
+        """
+        Get the stored distances of all pairs of words and other words, e.g. of the transcript and the sausages
+        of an utterance, with one query per LOOKUP_CHUNK_SIZE words of each side and key order
+        @return: dictionary of the stored (word, other word) pairs to their distance
+        @rtype: dict
+        """
+        words_by_key = {str(word): word for word in words}
+        other_words_by_key = {str(other_word): other_word for other_word in other_words}
+        found = {}
+        for word_keys, other_word_keys, swapped in [(list(words_by_key), list(other_words_by_key), False),
+                                                    (list(other_words_by_key), list(words_by_key), True)]:
+            for start in range(0, len(word_keys), LOOKUP_CHUNK_SIZE):
+                chunk = word_keys[start:start + LOOKUP_CHUNK_SIZE]
+                for other_start in range(0, len(other_word_keys), LOOKUP_CHUNK_SIZE):
+                    other_chunk = other_word_keys[other_start:other_start + LOOKUP_CHUNK_SIZE]
+                    rows = self.connection.execute(
+                        "SELECT word1, word2, distance FROM distances WHERE namespace = ? AND word1 IN (%s) "
+                        "AND word2 IN (%s)" % (",".join("?" * len(chunk)), ",".join("?" * len(other_chunk))),
+                        (self.namespace, *chunk, *other_chunk))
+                    for word1, word2, distance in rows:
+                        if swapped:
+                            word1, word2 = word2, word1
+                        found[words_by_key[word1], other_words_by_key[word2]] = distance
+        for (key1, key2), distance in self.pending.items():
+            if key1 in words_by_key and key2 in other_words_by_key:
+                found[words_by_key[key1], other_words_by_key[key2]] = distance
+            if key2 in words_by_key and key1 in other_words_by_key:
+                found[words_by_key[key2], other_words_by_key[key1]] = distance
+        return found
+
+    def put(self, word1, word2, distance):
+        """
+        Buffer the distance of a word pair, appending the buffered distances once there are batch_size of them
+        """
+        self.pending[self.make_key(word1, word2)] = distance
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Append the buffered distances in one transaction, pairs appended meanwhile by other processes are kept
+        """
+        if not self.pending:
+            return
+        with self.connection:
+            self.connection.executemany("INSERT OR IGNORE INTO distances VALUES (?, ?, ?, ?)",
+                                        [(self.namespace, word1, word2, distance)
+                                         for (word1, word2), distance in self.pending.items()])
+        self.pending.clear()
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        count = self.connection.execute("SELECT COUNT(*) FROM distances WHERE namespace = ?",
+                                        (self.namespace,)).fetchone()[0]
+        return count + len(self.pending)
+
+    def __reduce__(self):
+        # workers open their own connection, distances buffered here are appended by this process
+        return DistanceStore, (self.path, self.lexicon_version, self.distance_name, self.batch_size, self.timeout)
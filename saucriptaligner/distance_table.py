@@ -0,0 +1,155 @@
+import numpy as np
+
+from saucriptaligner import bitparallel
+from saucriptaligner.sau_text_pair import Vocabulary, CompactSausage
+
+
+class WordPairDistanceTable:
+    """
+    Phoneme distances between every transcript word and every sausage word of a batch.
+    The table is computed once per batch, score functions then look distances up by integer id
+    instead of computing them cell by cell.
+    """
+
+    def __init__(self, transcript_vocabulary, sausage_vocabulary, distances, lexicon_version=None,
+                 distance_name=None):
+        """
+        @param transcript_vocabulary: words of the transcripts, ids index the rows of distances
+        @type transcript_vocabulary: Vocabulary
+        @param sausage_vocabulary: words of the sausages, ids index the columns of distances
+        @type sausage_vocabulary: Vocabulary
+        @param distances: matrix of shape (len(transcript_vocabulary), len(sausage_vocabulary))
+        @type distances: np.ndarray
+        @param lexicon_version: version of the lexicon the distances are computed with, see lexicon.lexicon_version
+        @type lexicon_version: str
+        @param distance_name: name of the distance, see SausagesTranscriptAligner.distance_name
+        @type distance_name: str
+        """
+        self.transcript_vocabulary = transcript_vocabulary
+        self.sausage_vocabulary = sausage_vocabulary
+        self.distances = distances
+        self.lexicon_version = lexicon_version
+        self.distance_name = distance_name
+
+    @staticmethod
+    def collect_vocabularies(pairs):
+        """
+        Collect the transcript and sausage vocabularies of a batch
+        @param pairs: iterable of SausagesTranscriptPair
+        @type pairs: iterable
+        @rtype: (Vocabulary, Vocabulary)
+        """
+        transcript_vocabulary = Vocabulary()
+        sausage_vocabulary = Vocabulary()
+        for sau_and_text in pairs:
+            sau, words = sau_and_text.get_sausages_wordlist()
+            for word in words:
+                transcript_vocabulary.add(word)
+            for sausage in sau:
+                for word in sausage.get_words():
+                    sausage_vocabulary.add(word)
+        return transcript_vocabulary, sausage_vocabulary
+
+    @staticmethod
+    def build(aligner, pairs):
+        """
+        Compute the distance table of a batch
+        Every pronunciation is tokenized once and every transcript word is compared to all distinct
+        sausage pronunciations in one call of the bit-parallel kernel, see min_variant_distances for words
+        with alternate pronunciations.
+        @param aligner: aligner whose lexicon gives the pronunciations
+        @type aligner: SausagesTranscriptAligner
+        @param pairs: iterable of SausagesTranscriptPair
+        @type pairs: iterable
+        @rtype: WordPairDistanceTable
+        """
+        transcript_vocabulary, sausage_vocabulary = WordPairDistanceTable.collect_vocabularies(pairs)
+        # words sharing their pronunciations share a column
+        pronunciation_ids = {}
+        pronunciations = []
+        columns = np.empty(len(sausage_vocabulary), dtype=np.int64)
+        for index, word in enumerate(sausage_vocabulary):
+            pronunciation = aligner.get_pronunciation_variant_ids(word)
+            if pronunciation not in pronunciation_ids:
+                pronunciation_ids[pronunciation] = len(pronunciations)
+                pronunciations.append(pronunciation)
+            columns[index] = pronunciation_ids[pronunciation]
+
+        distances = np.empty((len(transcript_vocabulary), len(pronunciations)), dtype=np.float64)
+        for row, word in enumerate(transcript_vocabulary):
+            distances[row] = bitparallel.min_variant_distances(aligner.get_pronunciation_variant_ids(word),
+                                                               pronunciations)
+        return WordPairDistanceTable(transcript_vocabulary, sausage_vocabulary, distances[:, columns],
+                                     aligner.lexicon_version, aligner.distance_name())
+
+    def distance(self, transcript_word, sausage_word):
+        """
+        Get the distance of a word pair
+        @return: the distance or None if a word is not in the table
+        @rtype: float
+        """
+        try:
+            return float(self.distances[self.transcript_vocabulary.index(transcript_word),
+                                        self.sausage_vocabulary.index(sausage_word)])
+        except KeyError:
+            return None
+
+    def edge_distances(self, word, edges):
+        """
+        Get the distances from a transcript word to the words of the edges of a sausage
+        @return: list of distances or None if a word is not in the table
+        @rtype: [float]
+        """
+        try:
+            row = self.distances[self.transcript_vocabulary.index(word)]
+        except KeyError:
+            return None
+        if isinstance(edges, CompactSausage) and edges.sausages.vocabulary is self.sausage_vocabulary:
+            # compact sausages sharing the sausage vocabulary index the table with their word ids
+            return row[edges.get_word_ids()].tolist()
+        sausage_ids = self.sausage_vocabulary.word_ids
+        try:
+            return row[[sausage_ids[edge[0]] for edge in edges]].tolist()
+        except KeyError:
+            return None
+
+    def check_version(self, lexicon_version, distance_name):
+        """
+        Check that the table holds the distances of a lexicon version and distance
+        @raise ValueError: if the table was computed with another lexicon or distance
+        """
+        if (self.lexicon_version, self.distance_name) != (lexicon_version, distance_name):
+            raise ValueError(f"the distance table holds the {self.distance_name} distances of lexicon "
+                             f"{self.lexicon_version}, not the {distance_name} distances of lexicon {lexicon_version}")
+
+    def save(self, path):
+        """
+        Save the table to a .npz file, with the lexicon version and the name of the distance
+        """
+        versions = {name: np.array(value, dtype=str) for name, value in
+                    [("lexicon_version", self.lexicon_version), ("distance_name", self.distance_name)]
+                    if value is not None}
+        np.savez(path, distances=self.distances,
+                 transcript_words=np.array(self.transcript_vocabulary.words, dtype=str),
+                 sausage_words=np.array(self.sausage_vocabulary.words, dtype=str), **versions)
+
+    @staticmethod
+    def load(path, lexicon_version=None, distance_name=None):
+        """
+        Load a table saved by save
+        @param lexicon_version: expected lexicon version, not checked if None
+        @type lexicon_version: str
+        @param distance_name: expected name of the distance, not checked if None
+        @type distance_name: str
+        @raise ValueError: if the table was computed with another lexicon or distance
+        @rtype: WordPairDistanceTable
+        """
+        with np.load(path) as saved:
+            saved_version = str(saved["lexicon_version"]) if "lexicon_version" in saved else None
+            saved_name = str(saved["distance_name"]) if "distance_name" in saved else None
+            table = WordPairDistanceTable(Vocabulary(saved["transcript_words"].tolist()),
+                                          Vocabulary(saved["sausage_words"].tolist()), saved["distances"],
+                                          saved_version, saved_name)
+        table.check_version(saved_version if lexicon_version is None else lexicon_version,
+                            saved_name if distance_name is None else distance_name)
+        return table
@@ -0,0 +1,375 @@
+import numpy as np
+
+# backpointer codes, in the order of preference used by the traceback
+DELETION = 0
+SUBSTITUTION = 1
+INSERTION = 2
+
+
+def substitution_cost_matrix(sau, words, score_func):
+    """
+    Build the sausage x word substitution cost matrix in one pass
+    Every distinct word of the transcript is scored once against every sausage
+    @param sau: list of sausages
+    @type sau: Sausages
+    @param words: list of transcript words
+    @type words: [str]
+    @param score_func: function scoring a sausage against a word
+    @type score_func: callable
+    @return: matrix of shape (len(sau), len(words))
+    @rtype: np.ndarray
+    """
+    vocabulary = {}
+    word_ids = np.empty(len(words), dtype=np.int64)
+    for j, word in enumerate(words):
+        word_ids[j] = vocabulary.setdefault(word, len(vocabulary))
+    unique_words = list(vocabulary)
+    costs = np.empty((len(sau), len(unique_words)), dtype=np.float64)
+    for i, sausage in enumerate(sau):
+        costs[i] = [score_func(sausage, word) for word in unique_words]
+    return costs[:, word_ids]
+
+
+def numpy_dp(sub_costs, deletion_cost=1, insertion_cost=1):
+    """
+    Fill the alignment matrix over anti-diagonals and store backpointers
+    Cells of one anti-diagonal only depend on the two previous anti-diagonals,
+    so every anti-diagonal is computed with a single set of array operations.
+    @param sub_costs: substitution cost matrix of shape (number of sausages, number of words)
+    @type sub_costs: np.ndarray
+    @return: alignment cost matrix and backpointer matrix, both of shape (n + 1, m + 1)
+    @rtype: (np.ndarray, np.ndarray)
+    """
+    n, m = sub_costs.shape
+    costs = np.zeros((n + 1, m + 1), dtype=np.float64)
+    backpointers = np.empty((n + 1, m + 1), dtype=np.uint8)
+    # same cumulative sums as the python engine so that the costs are bit identical
+    for i in range(1, n + 1):
+        costs[i, 0] = costs[i - 1, 0] + deletion_cost
+    for j in range(1, m + 1):
+        costs[0, j] = costs[0, j - 1] + insertion_cost
+    backpointers[:, 0] = DELETION
+    backpointers[0, :] = INSERTION
+
+    for d in range(2, n + m + 1):
+        i = np.arange(max(1, d - m), min(n, d - 1) + 1)
+        j = d - i
+        up = costs[i - 1, j] + deletion_cost
+        diagonal = costs[i - 1, j - 1] + sub_costs[i - 1, j - 1]
+        left = costs[i, j - 1] + insertion_cost
+        best = np.minimum(np.minimum(up, diagonal), left)
+        costs[i, j] = best
+        backpointers[i, j] = np.where(up == best, DELETION, np.where(diagonal == best, SUBSTITUTION, INSERTION))
+    return costs, backpointers
+
+
+def traceback(backpointers):
+    """
+    Follow the backpointers from the bottom right corner
+    @param backpointers: backpointer matrix of shape (n + 1, m + 1)
+    @type backpointers: np.ndarray
+    @return: list of (sausage index, word index) pairs from start to end, None marks a gap
+    @rtype: [(int, int)]
+    """
+    i = backpointers.shape[0] - 1
+    j = backpointers.shape[1] - 1
+    path = []
+    while i > 0 or j > 0:
+        move = backpointers[i, j]
+        if move == DELETION:
+            i -= 1
+            path.append((i, None))
+        elif move == SUBSTITUTION:
+            i -= 1
+            j -= 1
+            path.append((i, j))
+        else:
+            j -= 1
+            path.append((None, j))
+    path.reverse()
+    return path
+
+
+def path_to_sausages_wordlist(sau, words, path):
+    """
+    Convert an alignment path to aligned sausage and word lists with "-" for gaps
+    @return: aligned sausages and aligned words
+    @rtype: (list, list)
+    """
+    aligned_sau = []
+    aligned_words = []
+    for i, j in path:
+        aligned_sau.append("-" if i is None else sau[i])
+        aligned_words.append("-" if j is None else words[j])
+    return aligned_sau, aligned_words
+
+
+def _path_from_rows(leave_moves, n, m):
+    """
+    Build an alignment path from the move leaving every row
+    @param leave_moves: for every row r > 0, the column and move (DELETION or SUBSTITUTION) leaving row r
+    @type leave_moves: [(int, int)]
+    @rtype: [(int, int)]
+    """
+    path = []
+    j = m
+    for r in range(n, 0, -1):
+        column, move = leave_moves[r]
+        while j > column:
+            j -= 1
+            path.append((None, j))
+        if move == DELETION:
+            path.append((r - 1, None))
+        else:
+            j -= 1
+            path.append((r - 1, j))
+    while j > 0:
+        j -= 1
+        path.append((None, j))
+    path.reverse()
+    return path
+
+
+def banded_dp(n, m, score, band_width, deletion_cost=1, insertion_cost=1, previous_band=None):
+    """
+    Fill the alignment matrix only inside a band around the diagonal
+    Cells with an offset j - i outside of [min(0, m - n) - band_width, max(0, m - n) + band_width]
+    are not computed. A path leaving the band leaves it from a cell on its edge, so it costs at least
+    the cost of that cell, of the move out of the band and of the gaps left to reach the last cell.
+    The banded alignment is the optimal one whenever its cost is strictly smaller than this bound
+    for every edge cell.
+    @param n: number of sausages
+    @type n: int
+    @param m: number of words
+    @type m: int
+    @param score: function returning the substitution cost of sausage i and word j
+    @type score: callable
+    @param band_width: number of diagonals kept on each side of the band
+    @type band_width: int
+    @param previous_band: band returned by a call with a narrower band on the same matrix, whose cells
+    are reused: no cell is scored twice and only the cells next to a cell whose cost changed are recomputed
+    @return: alignment cost, alignment path, whether the alignment is guaranteed optimal and the band
+    @rtype: (float, [(int, int)], bool, list)
+    """
+    inf = float("inf")
+    low = min(0, m - n) - band_width
+    high = max(0, m - n) + band_width
+    # every row of the band: first column, costs, backpointers, substitution costs and whether the cost
+    # of the cell differs from the one in the previous band
+    rows = []
+
+    for i in range(n + 1):
+        start = max(0, i + low)
+        end = min(m, i + high)
+        current = [inf] * (end - start + 1)
+        backpointers = bytearray(end - start + 1)
+        scores = [None] * (end - start + 1)
+        changed = bytearray(end - start + 1)
+        if previous_band is not None:
+            old_start, old_costs, old_backpointers, old_scores, _ = previous_band[i]
+            old_end = old_start + len(old_costs) - 1
+        else:
+            old_start, old_end = 0, -1
+        if i > 0:
+            previous_start, previous, _, _, previous_changed = rows[i - 1]
+            previous_end = previous_start + len(previous) - 1
+        for j in range(start, end + 1):
+            k = j - start
+            if old_start <= j <= old_end:
+                old_k = j - old_start
+                scores[k] = old_scores[old_k]
+                # a cell whose neighbours kept their costs keeps its cost and backpointer
+                if not ((k > 0 and changed[k - 1]) or
+                        (i > 0 and previous_start <= j <= previous_end and previous_changed[j - previous_start]) or
+                        (i > 0 and previous_start <= j - 1 <= previous_end and
+                         previous_changed[j - 1 - previous_start])):
+                    current[k] = old_costs[old_k]
+                    backpointers[k] = old_backpointers[old_k]
+                    continue
+            if i == 0:
+                best = current[k - 1] + insertion_cost if k > 0 else 0.
+                current[k] = best
+                backpointers[k] = INSERTION
+            else:
+                if previous_start <= j <= previous_end:
+                    up = previous[j - previous_start] + deletion_cost
+                else:
+                    up = inf
+                if j == 0:
+                    current[0] = best = up
+                    backpointers[0] = DELETION
+                else:
+                    if previous_start <= j - 1 <= previous_end:
+                        if scores[k] is None:
+                            scores[k] = score(i - 1, j - 1)
+                        diagonal = previous[j - 1 - previous_start] + scores[k]
+                    else:
+                        diagonal = inf
+                    left = current[k - 1] + insertion_cost if j > start else inf
+                    best = min(up, diagonal, left)
+                    current[k] = best
+                    if up == best:
+                        backpointers[k] = DELETION
+                    elif diagonal == best:
+                        backpointers[k] = SUBSTITUTION
+                    else:
+                        backpointers[k] = INSERTION
+            changed[k] = not old_start <= j <= old_end or bool(best != old_costs[j - old_start])
+        rows.append((start, current, backpointers, scores, changed))
+    cost = rows[n][1][m - rows[n][0]]
+
+    leave_moves = [None] * (n + 1)
+    j = m
+    for r in range(n, 0, -1):
+        row_start, _, backpointers, _, _ = rows[r]
+        while backpointers[j - row_start] == INSERTION:
+            j -= 1
+        move = backpointers[j - row_start]
+        leave_moves[r] = (j, move)
+        if move == SUBSTITUTION:
+            j -= 1
+    path = _path_from_rows(leave_moves, n, m)
+
+    # cheapest path leaving the band, by an insertion above it or a deletion below it
+    gap_cost = min(deletion_cost, insertion_cost)
+    outside = inf
+    for i, (start, current, _, _, _) in enumerate(rows):
+        if i + high < m:
+            outside = min(outside, current[-1] + insertion_cost + abs(m - n - high - 1) * gap_cost)
+        if i < n and i + low >= 0:
+            outside = min(outside, current[0] + deletion_cost + abs(m - n - low + 1) * gap_cost)
+    is_optimal = cost + 1e-9 < outside
+    return cost, path, is_optimal, rows
+
+
+def _forward_block(score, top, left, first_row, first_column, last_row, last_column, deletion_cost=1,
+                   insertion_cost=1):
+    """
+    Fill a block of the alignment matrix row by row keeping only the current row
+    The block starts from the costs of the row above it and of the column left of it, so every cell gets
+    the cost of the full matrix, computed with the same operations as by a fill of the full matrix.
+    @param top: costs of row first_row over the columns first_column - 1 to last_column,
+    from column 0 if first_column is 0
+    @type top: [float]
+    @param left: costs of column first_column - 1 over the rows first_row to last_row, None if first_column is 0
+    @type left: [float]
+    @return: generator of (row index, row costs, row backpointers) for the rows first_row + 1 to last_row,
+    the costs over the columns of top and the backpointers over the columns first_column to last_column
+    """
+    # index of the column first_column in the rows of costs
+    offset = 1 if first_column > 0 else 0
+    costs = top
+    for i in range(first_row + 1, last_row + 1):
+        previous = costs
+        costs = [0.] * len(previous)
+        backpointers = bytearray(last_column - first_column + 1)
+        if offset:
+            costs[0] = left[i - first_row]
+        for j in range(first_column, last_column + 1):
+            k = j - first_column + offset
+            up = previous[k] + deletion_cost
+            if j == 0:
+                costs[k] = up
+                backpointers[0] = DELETION
+                continue
+            diagonal = previous[k - 1] + score(i - 1, j - 1)
+            left_cost = costs[k - 1] + insertion_cost
+            best = min(up, diagonal, left_cost)
+            costs[k] = best
+            if up == best:
+                backpointers[j - first_column] = DELETION
+            elif diagonal == best:
+                backpointers[j - first_column] = SUBSTITUTION
+            else:
+                backpointers[j - first_column] = INSERTION
+        yield i, costs, backpointers
+
+
+def hirschberg_dp(n, m, score, deletion_cost=1, insertion_cost=1):
+    """
+    Divide and conquer alignment using linear memory
+    Instead of storing backpointers, a forward pass carries for every cell the column at which
+    its traceback leaves a middle row. This splits the traceback of the full matrix into two halves
+    which are solved recursively, so the path is exactly the one of the full matrix traceback.
+    A half only covers the rows and the columns the path crosses in it, and starts from the costs of the
+    row above and of the column left of it, which are kept with the half until it is solved. The halves of
+    a level cover about n * m / 2 ** level cells, so the running time is O(n * m) and the memory
+    O((n + m) * log(n)).
+    @param n: number of sausages
+    @type n: int
+    @param m: number of words
+    @type m: int
+    @param score: function returning the substitution cost of sausage i and word j
+    @type score: callable
+    @return: alignment cost and alignment path
+    @rtype: (float, [(int, int)])
+    """
+    leave_moves = [None] * (n + 1)
+    top = [0.] * (m + 1)
+    for j in range(1, m + 1):
+        top[j] = top[j - 1] + insertion_cost
+    full_cost = None
+
+    def forward(low, high, first_column, last_column, top, left):
+        return _forward_block(score, top, left, low, first_column, high, last_column, deletion_cost, insertion_cost)
+
+    # halves of the matrix whose path is still unknown: first and last row, first column, which is the column
+    # where the path reaches the first row, last column, where it enters the last row, and the boundary costs
+    stack = [(0, n, 0, m, top, None)]
+    while stack:
+        low, high, first_column, entry_column, top, left = stack.pop()
+        offset = 1 if first_column > 0 else 0
+        if high - low == 1:
+            for _, costs, backpointers in forward(low, high, first_column, entry_column, top, left):
+                pass
+            j = entry_column
+            while backpointers[j - first_column] == INSERTION:
+                j -= 1
+            leave_moves[high] = (j, backpointers[j - first_column])
+            if full_cost is None:
+                full_cost = costs[-1]
+            continue
+
+        # move leaving the row middle + 1 on the traceback from (high, entry_column)
+        middle = (low + high) // 2
+        labels = None
+        for i, costs, backpointers in forward(low, high, first_column, entry_column, top, left):
+            if i == middle:
+                middle_costs = costs
+            if i <= middle:
+                continue
+            previous_labels = labels
+            labels = [None] * (entry_column - first_column + 1)
+            for k, move in enumerate(backpointers):
+                if move == INSERTION:
+                    # cells leaving the block are not on the path
+                    labels[k] = labels[k - 1] if k > 0 else None
+                elif i == middle + 1:
+                    labels[k] = (k + first_column, move)
+                elif move == DELETION:
+                    labels[k] = previous_labels[k]
+                else:
+                    labels[k] = previous_labels[k - 1] if k > 0 else None
+        if full_cost is None:
+            full_cost = costs[-1]
+        column, move = labels[entry_column - first_column]
+        middle_entry = column if move == DELETION else column - 1
+
+        # the upper half starts at the column where the path reaches the middle row
+        if middle_entry == 0:
+            upper_top, upper_left = middle_costs, None
+        else:
+            upper_top = middle_costs[middle_entry - 1 - first_column + offset:]
+            if middle_entry == first_column:
+                upper_left = left[middle - low:]
+            else:
+                # costs of the column left of the upper half, from the rows below the middle row
+                upper_left = [middle_costs[middle_entry - 1 - first_column + offset]]
+                for _, costs, _ in forward(middle, high, first_column, middle_entry - 1,
+                                           middle_costs[:middle_entry - first_column + offset],
+                                           left and left[middle - low:]):
+                    upper_left.append(costs[-1])
+        stack.append((middle, high, middle_entry, entry_column, upper_top, upper_left))
+        stack.append((low, middle, first_column, middle_entry, top[:middle_entry - first_column + offset + 1],
+                      left and left[:middle - low + 1]))
+    return full_cost, _path_from_rows(leave_moves, n, m)
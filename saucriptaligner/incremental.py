@@ -0,0 +1,353 @@
+import math
+
+from saucriptaligner import dp_engines
+from saucriptaligner.dp_engines import DELETION, SUBSTITUTION, INSERTION
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+
+# cells costing more than the cheapest cell of their row plus the beam are pruned
+DEFAULT_BEAM = 8.
+# number of sausages the emitted alignment lags behind the last sausage, at most twice as many are pending
+DEFAULT_WINDOW = 32
+
+
+class FrontierRow:
+    """
+    Costs and backpointers of the cells of one row of the alignment matrix, from column lo on.
+    Cells outside of the row are pruned, their cost is infinite.
+    """
+    __slots__ = ["lo", "costs", "backpointers", "best"]
+
+    def __init__(self, lo, costs, backpointers, best):
+        self.lo = lo
+        self.costs = costs
+        self.backpointers = backpointers
+        self.best = best
+
+    @property
+    def hi(self):
+        return self.lo + len(self.costs) - 1
+
+    def cost(self, j):
+        if self.lo <= j <= self.hi:
+            return self.costs[j - self.lo]
+        return math.inf
+
+    def backpointer(self, j):
+        return self.backpointers[j - self.lo]
+
+    def prune(self, threshold, start):
+        """
+        Set the cost of the cells from column start costing more than threshold to infinity
+        and drop the infinite cells at both ends of the row
+        """
+        for index in range(max(0, start - self.lo), len(self.costs)):
+            if self.costs[index] > threshold:
+                self.costs[index] = math.inf
+        while self.costs and self.costs[-1] == math.inf:
+            self.costs.pop()
+            self.backpointers.pop()
+        first = 0
+        while first < len(self.costs) and self.costs[first] == math.inf:
+            first += 1
+        if first:
+            self.lo += first
+            del self.costs[:first]
+            del self.backpointers[:first]
+
+
+class IncrementalAligner:
+    """
+    Aligns sausages arriving chunk by chunk, e.g. from a streaming decoder, with a transcript.
+    The rows of the alignment matrix since the last emitted position are kept between calls and every new
+    sausage only computes one new row. Transcript words can also be appended. Cells costing more than the
+    best cell of their row plus a beam are pruned, and the alignment is emitted up to the cell where the
+    tracebacks of all remaining cells of the frontier meet, which no later sausage or word can change.
+    Cells which consumed more words look cheaper until the sausages of those words arrive, so the beam alone
+    lets the frontier drift away from the best path. The window bounds the drift and the latency: whenever
+    twice window sausages are pending, the alignment is emitted up to window sausages behind the frontier,
+    through the cell shared by the tracebacks of most frontier cells, and the pending rows are computed
+    again from there.
+    Without beam and window the alignment is the one of align_without_word_repeat, emitted by finish.
+    """
+
+    def __init__(self, aligner, score_func_name, words=(), words_complete=True, beam=DEFAULT_BEAM,
+                 window=DEFAULT_WINDOW):
+        """
+        @param aligner: aligner providing the score function
+        @type aligner: SausagesTranscriptAligner
+        @param score_func_name: function keyword to use score function
+        @type score_func_name: str
+        @param words: transcript words
+        @type words: [str]
+        @param words_complete: whether words is the whole transcript, otherwise words are appended with add_words
+        @type words_complete: bool
+        @param beam: cost above the best cell of a row beyond which cells are pruned, None to keep all cells
+        @type beam: float
+        @param window: number of sausages the emitted alignment lags behind, None to only emit stable prefixes
+        @type window: int
+        """
+        self.aligner = aligner
+        self.score_func = aligner.score_functions[score_func_name]
+        if aligner.stats is not None:
+            aligner.stats.count("alignments")
+            self.score_func = aligner.stats.timed_score_func(self.score_func)
+        self.words = list(words)
+        self.words_complete = words_complete
+        self.beam = beam
+        self.window = window
+        self.finished = False
+        # sausages of the rows after the origin row, rows[k] is the row of sausages[k - 1]
+        self.sausages = []
+        self.origin_column = 0
+        self.rows = [self.origin_row(0, 0)]
+        self.aligned_sau = []
+        self.aligned_words = []
+
+    def threshold(self, best):
+        return math.inf if self.beam is None else best + self.beam
+
+    def fill(self, prev, sausage, start, left, best):
+        """
+        Compute the cells of a row from column start on
+        @param prev: previous row, None for the origin row
+        @type prev: FrontierRow
+        @param left: cost of the cell before column start
+        @type left: float
+        @param best: cost of the best cell of the row before column start
+        @type best: float
+        @return: costs, backpointers and best cost of the row
+        @rtype: ([float], [int], float)
+        """
+        m = len(self.words)
+        end = min(m, prev.hi + 1) if prev is not None else start - 1
+        costs = []
+        backpointers = []
+        # same operations as the python engine so that the costs are bit identical
+        for j in range(start, end + 1):
+            up = prev.cost(j) + 1
+            diagonal = prev.cost(j - 1) if j > 0 else math.inf
+            if diagonal != math.inf:
+                diagonal = diagonal + self.score_func(sausage, self.words[j - 1])
+            cost = min(up, diagonal, left + 1)
+            costs.append(cost)
+            backpointers.append(DELETION if up == cost else SUBSTITUTION if diagonal == cost else INSERTION)
+            left = cost
+            best = min(best, cost)
+        # insertions continue the row past the cells reachable from the previous row
+        for j in range(max(start, end + 1), m + 1):
+            if left + 1 > self.threshold(best):
+                break
+            left = left + 1
+            costs.append(left)
+            backpointers.append(INSERTION)
+        if self.aligner.stats is not None:
+            self.aligner.stats.count("dp_cells", len(costs))
+        return costs, backpointers, best
+
+    def origin_row(self, column, cost):
+        """
+        Row of the last emitted cell, only reaching the cells after it through insertions
+        """
+        costs, backpointers, best = self.fill(None, None, column + 1, cost, cost)
+        return FrontierRow(column, [cost] + costs, [INSERTION] + backpointers, best)
+
+    def next_row(self, prev, sausage):
+        costs, backpointers, best = self.fill(prev, sausage, prev.lo, math.inf, math.inf)
+        row = FrontierRow(prev.lo, costs, backpointers, best)
+        row.prune(self.threshold(best), row.lo)
+        return row
+
+    def add_sausages(self, sausages):
+        """
+        Append sausages
+        @param sausages: new sausages
+        @type sausages: Sausages
+        @return: newly emitted part of the alignment
+        @rtype: SausagesTranscriptPair
+        """
+        emitted = len(self.aligned_sau)
+        for sausage in sausages:
+            self.sausages.append(sausage)
+            self.rows.append(self.next_row(self.rows[-1], sausage))
+            if self.window is not None and len(self.sausages) >= 2 * self.window:
+                self.emit_best_path(len(self.sausages) - self.window)
+        self.emit_stable_prefix()
+        return self.aligned_since(emitted)
+
+    def add_words(self, words, complete=False):
+        """
+        Append transcript words, extending the pending rows
+        @param words: new words
+        @type words: [str]
+        @param complete: whether these are the last words of the transcript
+        @type complete: bool
+        @return: newly emitted part of the alignment
+        @rtype: SausagesTranscriptPair
+        """
+        if self.words_complete:
+            raise ValueError("the transcript is complete")
+        emitted = len(self.aligned_sau)
+        old_m = len(self.words)
+        self.words.extend(words)
+        self.words_complete = complete
+        prev = None
+        for k, row in enumerate(self.rows):
+            # pruned cells stay pruned, only the new columns are computed
+            padding = old_m - row.hi
+            row.costs.extend([math.inf] * padding)
+            row.backpointers.extend([INSERTION] * padding)
+            costs, backpointers, best = self.fill(prev, self.sausages[k - 1] if k else None, old_m + 1,
+                                                  row.cost(old_m), row.best)
+            row.costs.extend(costs)
+            row.backpointers.extend(backpointers)
+            row.best = best
+            row.prune(self.threshold(best), old_m + 1)
+            prev = row
+        self.emit_stable_prefix()
+        return self.aligned_since(emitted)
+
+    def finish(self):
+        """
+        Emit the rest of the alignment once all sausages and words are added
+        @return: newly emitted part of the alignment
+        @rtype: SausagesTranscriptPair
+        """
+        emitted = len(self.aligned_sau)
+        self.words_complete = True
+        last = self.rows[-1]
+        m = len(self.words)
+        # the alignment ends in the last cell, reached through insertions if it was pruned
+        while last.hi < m:
+            last.costs.append(last.costs[-1] + 1)
+            last.backpointers.append(INSERTION)
+        self.emit(len(self.rows) - 1, m)
+        self.finished = True
+        return self.aligned_since(emitted)
+
+    def traceback(self, k, column):
+        """
+        Follow the backpointers from the cell (k, column) to the origin row
+        @return: alignment path in indices of the pending sausages and of the words, see dp_engines.traceback
+        @rtype: [(int, int)]
+        """
+        path = []
+        j = column
+        while k > 0:
+            move = self.rows[k].backpointer(j)
+            if move == DELETION:
+                k -= 1
+                path.append((k, None))
+            elif move == SUBSTITUTION:
+                k -= 1
+                j -= 1
+                path.append((k, j))
+            else:
+                j -= 1
+                path.append((None, j))
+        # the origin row is only left through insertions
+        while j > self.origin_column:
+            j -= 1
+            path.append((None, j))
+        path.reverse()
+        return path
+
+    def emit(self, k, column):
+        """
+        Emit the alignment up to the cell (k, column), which becomes the origin
+        """
+        path = self.traceback(k, column)
+        aligned_sau, aligned_words = dp_engines.path_to_sausages_wordlist(self.sausages, self.words, path)
+        self.aligned_sau.extend(aligned_sau)
+        self.aligned_words.extend(aligned_words)
+        origin = self.rows[k]
+        origin.costs = origin.costs[column - origin.lo:]
+        origin.backpointers = origin.backpointers[column - origin.lo:]
+        origin.lo = column
+        self.rows = self.rows[k:]
+        self.sausages = self.sausages[k:]
+        self.origin_column = column
+
+    @staticmethod
+    def frontier_tokens(row):
+        """
+        One traced cell for every cell of a row which is not pruned
+        """
+        return {row.lo + index: 1 for index, cost in enumerate(row.costs) if cost != math.inf}
+
+    def traceback_row(self, k, tokens):
+        """
+        Follow the tracebacks of cells of row k to the previous row
+        @param tokens: number of traced cells merged into every cell of row k, by column
+        @type tokens: dict
+        @return: number of traced cells reaching every cell of row k - 1, by column
+        @rtype: dict
+        """
+        row = self.rows[k]
+        # exit column of the traceback of every visited cell
+        visited = {}
+        exits = {}
+        # tokens walk left along insertions, a token reaching a visited cell joins the token which visited it
+        for start in sorted(tokens, reverse=True):
+            j = start
+            walked = []
+            while j not in visited and row.backpointer(j) == INSERTION:
+                walked.append(j)
+                j -= 1
+            if j in visited:
+                exit_column = visited[j]
+            else:
+                walked.append(j)
+                exit_column = j if row.backpointer(j) == DELETION else j - 1
+            for column in walked:
+                visited[column] = exit_column
+            exits[exit_column] = exits.get(exit_column, 0) + tokens[start]
+        return exits
+
+    def emit_stable_prefix(self):
+        """
+        Emit the alignment up to the last cell shared by the tracebacks of all cells of the frontier
+        The frontier is the last row and, while words can be appended, the last column.
+        """
+        # without a beam no cell is ever pruned and the tracebacks only meet at the origin
+        if self.beam is None:
+            return
+        m = len(self.words)
+        k = len(self.rows) - 1
+        tokens = self.frontier_tokens(self.rows[k])
+        last_column = set() if self.words_complete else {r for r in range(k) if self.rows[r].cost(m) != math.inf}
+        while k > 0 and (len(tokens) > 1 or last_column):
+            if k in last_column:
+                tokens[m] = tokens.get(m, 0) + 1
+                last_column.discard(k)
+            tokens = self.traceback_row(k, tokens)
+            k -= 1
+        column = min(tokens)
+        if len(tokens) == 1 and not last_column and (k > 0 or column > self.origin_column):
+            self.emit(k, column)
+
+    def emit_best_path(self, k):
+        """
+        Emit the alignment up to the cell of row k shared by the tracebacks of most cells of the last row
+        and prune all other paths
+        """
+        tokens = self.frontier_tokens(self.rows[-1])
+        for r in range(len(self.rows) - 1, k, -1):
+            tokens = self.traceback_row(r, tokens)
+        # ties go to the cheapest cell
+        column = min(tokens, key=lambda j: (-tokens[j], self.rows[k].cost(j)))
+        self.emit(k, column)
+        # pending rows are computed again, starting from the emitted cell only
+        self.rows = [self.origin_row(column, self.rows[0].cost(column))]
+        for sausage in self.sausages:
+            self.rows.append(self.next_row(self.rows[-1], sausage))
+
+    def aligned_since(self, start):
+        return SausagesTranscriptPair.create_from_sausages_wordlist(self.aligned_sau[start:],
+                                                                    self.aligned_words[start:])
+
+    def get_alignment(self):
+        """
+        Get the alignment emitted so far
+        @rtype: SausagesTranscriptPair
+        """
+        return SausagesTranscriptPair.create_from_sausages_wordlist(list(self.aligned_sau), list(self.aligned_words))
@@ -0,0 +1,111 @@
+import collections
+import contextlib
+import json
+import time
+
+COUNTERS = ["alignments", "dp_cells", "score_calls", "distance_computations", "distance_store_hits", "lexicon_hits",
+            "lexicon_misses"]
+TIMERS = ["scoring", "dp_fill", "traceback", "lexicon_load"]
+
+
+class AlignmentStats:
+    """
+    Counters and timers of an aligner, collected only while instrumentation is enabled.
+    Counts DP cells, score function calls, phoneme distance computations, lexicon hits and misses
+    (with the missing words), and seconds spent scoring, filling the DP matrix, tracing back and loading
+    the lexicon.
+    """
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.seconds = dict.fromkeys(TIMERS, 0.)
+        self.missing_words = collections.Counter()
+
+    def count(self, name, amount=1):
+        """
+        Increment a counter
+        """
+        self.counters[name] += amount
+
+    def add_time(self, name, seconds):
+        """
+        Add seconds to a timer
+        """
+        self.seconds[name] += seconds
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """
+        Context manager adding the seconds spent in its block to a timer
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+
+    def lexicon_miss(self, word):
+        """
+        Record a word missing from the lexicon
+        """
+        self.counters["lexicon_misses"] += 1
+        self.missing_words[word] += 1
+
+    def timed_score_func(self, score_func):
+        """
+        Wrap a score function to count its calls and time them
+        """
+
+        def timed(edges, word):
+            start = time.perf_counter()
+            score = score_func(edges, word)
+            self.seconds["scoring"] += time.perf_counter() - start
+            self.counters["score_calls"] += 1
+            return score
+
+        return timed
+
+    def merge(self, other):
+        """
+        Add the counters and timers of another AlignmentStats, e.g. collected by a worker process
+        """
+        for name, value in other.counters.items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        for name, value in other.seconds.items():
+            self.seconds[name] = self.seconds.get(name, 0.) + value
+        self.missing_words.update(other.missing_words)
+
+    def reset(self):
+        """
+        Set all counters and timers back to zero
+        """
+        self.__init__()
+
+    def as_dict(self, top_n=20):
+        """
+        Get the statistics as a dictionary
+        @param top_n: number of most frequent missing words to include
+        @type top_n: int
+        @rtype: dict
+        """
+        return {
+            "counters": dict(self.counters),
+            "seconds": dict(self.seconds),
+            "distinct_missing_words": len(self.missing_words),
+            "top_missing_words": self.missing_words.most_common(top_n),
+        }
+
+    def dump_json(self, path=None, top_n=20):
+        """
+        Dump the statistics as json
+        @param path: file to write, if None the json string is returned
+        @type path: str
+        @param top_n: number of most frequent missing words to include
+        @type top_n: int
+        @rtype: str
+        """
+        stats_json = json.dumps(self.as_dict(top_n), indent=2)
+        if path is not None:
+            with open(path, 'w') as stats_file:
+                stats_file.write(stats_json)
+        return stats_json
@@ -0,0 +1,294 @@
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+COMPILED_LEXICON_MAGIC = b"SAULEX2\n"
+COMPILED_LEXICON_SUFFIX = ".saulex"
+# arrays of the compiled lexicon are aligned to this many bytes
+ARRAY_ALIGNMENT = 64
+# alternate pronunciations of a word are stored as WORD(1), WORD(2), ...
+VARIANT_PATTERN = re.compile(r"^(.+)\((\d+)\)$")
+
+
+def read_cmu_dict(cmu_dict_file_path):
+    """
+    Read a cmu dict text file
+    @param cmu_dict_file_path: path to the cmu dict file
+    @type cmu_dict_file_path: str
+    @return: dictionary of word to space separated phonemes
+    @rtype: dict
+    """
+    cmu_dict = {}
+    # cmudict-0.7b is not valid utf-8, latin-1 decodes every byte
+    with open(cmu_dict_file_path, 'r', encoding="latin-1") as cmu_dict_file:
+        for line in cmu_dict_file:
+            # ignore comments
+            if not line.startswith(";;;"):
+                # split the line into word and pronunciation
+                word, pronunciation = line.split("  ")
+                # remove the newline character from the pronunciation
+                cmu_dict[word] = pronunciation.rstrip("\r\n")
+    return cmu_dict
+
+
+def variant_headword(word):
+    """
+    Get the word of an alternate pronunciation key, e.g. READ for READ(1)
+    @return: the headword and the variant number, 0 for the headword itself
+    @rtype: (str, int)
+    """
+    match = VARIANT_PATTERN.match(word)
+    if match is None:
+        return word, 0
+    return match.group(1), int(match.group(2))
+
+
+def group_variants(words):
+    """
+    Group the alternate pronunciation keys of a lexicon by headword
+    @param words: words of the lexicon
+    @type words: iterable
+    @return: dictionary of headword to its keys, the headword first and then by variant number,
+    for the headwords having alternate pronunciations
+    @rtype: dict
+    """
+    groups = {}
+    for word in words:
+        headword, variant = variant_headword(word)
+        groups.setdefault(headword, []).append((variant, word))
+    variants = {}
+    for headword, keys in groups.items():
+        keys.sort()
+        # alternate pronunciations of a word missing from the lexicon are left alone
+        if len(keys) > 1 and keys[0][0] == 0:
+            variants[headword] = tuple(word for _, word in keys)
+    return variants
+
+
+def lexicon_version(lexicon_dict):
+    """
+    Version of a lexicon, a hash of its entries
+    The text and the compiled lexicon of the same cmu dict have the same version.
+    @param lexicon_dict: lexicon dictionary or CompiledLexicon
+    @type lexicon_dict: dict | CompiledLexicon
+    @rtype: str
+    """
+    if isinstance(lexicon_dict, CompiledLexicon) and "lexicon_version" in lexicon_dict.header:
+        return lexicon_dict.header["lexicon_version"]
+    digest = hashlib.sha1()
+    # sorting the entries rather than the words also orders lexicons whose keys are not all strings
+    for entry in sorted(f"{word}\t{pronunciation}\n" for word, pronunciation in lexicon_dict.items()):
+        digest.update(entry.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def source_signature(source_path):
+    """
+    Signature of a lexicon source file used to invalidate its compiled lexicon
+    @rtype: dict
+    """
+    stat = os.stat(source_path)
+    return {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+
+
+def compile_lexicon(source_path, compiled_path=None):
+    """
+    Compile a cmu dict text file into a binary lexicon
+    The binary lexicon holds the phoneme inventory, the phoneme ids of all pronunciations
+    concatenated with their offsets, the sorted words, and the positions of the alternate pronunciations
+    of every headword concatenated with their offsets. It is written to a temporary file
+    and renamed, so that concurrent readers never see a partially written lexicon.
+    @param source_path: path to the cmu dict file
+    @type source_path: str
+    @param compiled_path: path of the binary lexicon, defaults to the source path with a .saulex suffix
+    @type compiled_path: str
+    @return: path of the binary lexicon
+    @rtype: str
+    """
+    if compiled_path is None:
+        compiled_path = source_path + COMPILED_LEXICON_SUFFIX
+    signature = source_signature(source_path)
+    cmu_dict = read_cmu_dict(source_path)
+
+    encoded_words = sorted(word.encode("utf-8") for word in cmu_dict)
+    inventory = sorted({phoneme for pronunciation in cmu_dict.values() for phoneme in pronunciation.split(" ")})
+    phoneme_index = {phoneme: index for index, phoneme in enumerate(inventory)}
+    offsets = np.zeros(len(encoded_words) + 1, dtype=np.int64)
+    phoneme_ids = []
+    for index, word in enumerate(encoded_words):
+        phonemes = cmu_dict[word.decode("utf-8")].split(" ")
+        phoneme_ids.extend(phoneme_index[phoneme] for phoneme in phonemes)
+        offsets[index + 1] = len(phoneme_ids)
+    # the positions of the pronunciations of a headword with variants, none for other words
+    positions = {word: index for index, word in enumerate(encoded_words)}
+    variants = group_variants(cmu_dict)
+    variant_offsets = np.zeros(len(encoded_words) + 1, dtype=np.int64)
+    variant_positions = []
+    for index, word in enumerate(encoded_words):
+        variant_positions.extend(positions[key.encode("utf-8")] for key in variants.get(word.decode("utf-8"), ()))
+        variant_offsets[index + 1] = len(variant_positions)
+    arrays = {
+        "words": np.array(encoded_words, dtype="S%d" % max((len(word) for word in encoded_words), default=1)),
+        "offsets": offsets,
+        "phoneme_ids": np.array(phoneme_ids, dtype=np.uint16),
+        "variant_offsets": variant_offsets,
+        "variant_positions": np.array(variant_positions, dtype=np.int32),
+    }
+
+    header = dict(signature, lexicon_version=lexicon_version(cmu_dict), inventory=inventory, arrays={})
+    position = 0
+    for name, array in arrays.items():
+        header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position += -(-array.nbytes // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+    header_bytes = json.dumps(header).encode("utf-8")
+    # the arrays start after the magic, the header length and the padded header
+    data_start = -(-(len(COMPILED_LEXICON_MAGIC) + 8 + len(header_bytes)) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+    temporary_path = "%s.%d.tmp" % (compiled_path, os.getpid())
+    with open(temporary_path, 'wb') as compiled_file:
+        compiled_file.write(COMPILED_LEXICON_MAGIC)
+        compiled_file.write(len(header_bytes).to_bytes(8, "little"))
+        compiled_file.write(header_bytes)
+        for name, array in arrays.items():
+            compiled_file.seek(data_start + header["arrays"][name]["offset"])
+            compiled_file.write(array.tobytes())
+    os.replace(temporary_path, compiled_path)
+    return compiled_path
+
+
+class CompiledLexicon:
+    """
+    Read-only, memory-mapped lexicon compiled by compile_lexicon
+    It behaves like the lexicon dictionary (word to space separated phonemes) and additionally
+    gives the phoneme ids of a word. Opening it only reads the header, the arrays are shared
+    between processes through the page cache.
+    """
+
+    def __init__(self, compiled_path):
+        """
+        @param compiled_path: path of the binary lexicon
+        @type compiled_path: str
+        """
+        self.compiled_path = compiled_path
+        with open(compiled_path, 'rb') as compiled_file:
+            if compiled_file.read(len(COMPILED_LEXICON_MAGIC)) != COMPILED_LEXICON_MAGIC:
+                raise ValueError(f"{compiled_path} is not a compiled lexicon")
+            header_length = int.from_bytes(compiled_file.read(8), "little")
+            self.header = json.loads(compiled_file.read(header_length).decode("utf-8"))
+        data_start = -(-(len(COMPILED_LEXICON_MAGIC) + 8 + header_length) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+        arrays = {}
+        for name, layout in self.header["arrays"].items():
+            if 0 in layout["shape"]:
+                arrays[name] = np.empty(layout["shape"], dtype=layout["dtype"])
+                continue
+            arrays[name] = np.memmap(compiled_path, dtype=layout["dtype"], mode='r',
+                                     offset=data_start + layout["offset"], shape=tuple(layout["shape"]))
+        self.words = arrays["words"]
+        self.offsets = arrays["offsets"]
+        self.phoneme_ids_array = arrays["phoneme_ids"]
+        self.variant_offsets = arrays["variant_offsets"]
+        self.variant_positions = arrays["variant_positions"]
+        self.inventory = self.header["inventory"]
+
+    def is_stale(self, source_path):
+        """
+        Whether the source file changed since the lexicon was compiled
+        @rtype: bool
+        """
+        signature = source_signature(source_path)
+        return any(self.header.get(key) != value for key, value in signature.items())
+
+    def index(self, word):
+        """
+        Get the position of a word in the sorted word index
+        @raise KeyError: if the word is not in the lexicon
+        @rtype: int
+        """
+        if not isinstance(word, str):
+            raise KeyError(word)
+        key = word.encode("utf-8")
+        if len(key) > self.words.dtype.itemsize:
+            raise KeyError(word)
+        position = int(np.searchsorted(self.words, key))
+        if position == len(self.words) or self.words[position] != key:
+            raise KeyError(word)
+        return position
+
+    def phoneme_ids(self, word):
+        """
+        Get the phoneme ids of the pronunciation of a word, see inventory for the phonemes
+        @rtype: np.ndarray
+        """
+        position = self.index(word)
+        return self.phoneme_ids_array[self.offsets[position]:self.offsets[position + 1]]
+
+    def variant_words(self, word):
+        """
+        Get the keys of all pronunciations of a word, the word first and then its alternate pronunciations
+        @return: the keys, only the word itself if it has no alternate pronunciation or is not in the lexicon
+        @rtype: tuple
+        """
+        try:
+            position = self.index(word)
+        except KeyError:
+            return (word,)
+        positions = self.variant_positions[self.variant_offsets[position]:self.variant_offsets[position + 1]]
+        if len(positions) == 0:
+            return (word,)
+        return tuple(self.words[variant].decode("utf-8") for variant in positions.tolist())
+
+    def __getitem__(self, word):
+        return " ".join([self.inventory[phoneme_id] for phoneme_id in self.phoneme_ids(word)])
+
+    def get(self, word, default=None):
+        try:
+            return self[word]
+        except KeyError:
+            return default
+
+    def __contains__(self, word):
+        try:
+            self.index(word)
+        except KeyError:
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.words)
+
+    def __iter__(self):
+        return (word.decode("utf-8") for word in self.words)
+
+    def keys(self):
+        return iter(self)
+
+    def items(self):
+        return ((word, self[word]) for word in self)
+
+    def __reduce__(self):
+        # workers reopen the memory map instead of receiving a copy of the arrays
+        return CompiledLexicon, (self.compiled_path,)
+
+
+def load_compiled_lexicon(source_path, compiled_path=None):
+    """
+    Open the compiled lexicon of a cmu dict file, compiling it first if it is missing or stale
+    @param source_path: path to the cmu dict file
+    @type source_path: str
+    @param compiled_path: path of the binary lexicon, defaults to the source path with a .saulex suffix
+    @type compiled_path: str
+    @rtype: CompiledLexicon
+    """
+    if compiled_path is None:
+        compiled_path = source_path + COMPILED_LEXICON_SUFFIX
+    if os.path.exists(compiled_path):
+        try:
+            lexicon = CompiledLexicon(compiled_path)
+        except ValueError:
+            lexicon = None
+        if lexicon is not None and not lexicon.is_stale(source_path):
+            return lexicon
+    return CompiledLexicon(compile_lexicon(source_path, compiled_path))
@@ -0,0 +1,142 @@
+from saucriptaligner.sau_text_pair import Sausages, SausagesTranscriptPair
+
+
+class PrunedSausages:
+    """
+    Sausages left by a SausagePruner together with the index of every kept sausage in the original sausages
+    """
+
+    def __init__(self, sausages, slot_indices, original_sausages):
+        """
+        @param sausages: kept sausages
+        @type sausages: Sausages
+        @param slot_indices: original index of every kept sausage
+        @type slot_indices: [int]
+        @param original_sausages: sausages before pruning
+        @type original_sausages: Sausages
+        """
+        self.sausages = sausages
+        self.slot_indices = slot_indices
+        self.original_sausages = original_sausages
+
+    def aligned_slot_indices(self, alignment):
+        """
+        Map an alignment of the pruned sausages to original sausage indices
+        @param alignment: alignment of the pruned sausages
+        @type alignment: SausagesTranscriptPair
+        @return: original index of the sausage of every aligned position, None for gaps
+        @rtype: [int]
+        """
+        indices = []
+        kept = 0
+        for sausage in alignment.get_sausages():
+            if isinstance(sausage, str) and sausage == "-":
+                indices.append(None)
+            else:
+                indices.append(self.slot_indices[kept])
+                kept += 1
+        return indices
+
+    def restore(self, alignment):
+        """
+        Map an alignment of the pruned sausages back onto the original sausages
+        Kept sausages are replaced by their unpruned original, dropped sausages are inserted
+        back in order, aligned to "-".
+        @param alignment: alignment of the pruned sausages
+        @type alignment: SausagesTranscriptPair
+        @rtype: SausagesTranscriptPair
+        """
+        restored_sau = []
+        restored_text = []
+        next_original = 0
+        for index, word in zip(self.aligned_slot_indices(alignment), alignment.get_wordlist()):
+            if index is None:
+                restored_sau.append("-")
+                restored_text.append(word)
+                continue
+            # dropped sausages before this one
+            for dropped in range(next_original, index):
+                restored_sau.append(self.original_sausages[dropped])
+                restored_text.append("-")
+            restored_sau.append(self.original_sausages[index])
+            restored_text.append(word)
+            next_original = index + 1
+        for dropped in range(next_original, len(self.original_sausages)):
+            restored_sau.append(self.original_sausages[dropped])
+            restored_text.append("-")
+        return SausagesTranscriptPair.create_from_sausages_wordlist(restored_sau, restored_text)
+
+
+class SausagePruner:
+    """
+    Pre-pass shrinking sausages before alignment.
+    Edges can be pruned by weight threshold, cumulative mass or top-k, the remaining weights renormalized,
+    and sausages left with only epsilon edges dropped. The highest weighted edge of a sausage is always kept.
+    """
+
+    def __init__(self, drop_epsilon_slots=True, min_weight=None, cumulative_mass=None, top_k=None,
+                 renormalize=True, epsilon_symbols=("<eps>",)):
+        """
+        @param drop_epsilon_slots: drop sausages whose remaining edges are all epsilon symbols
+        @type drop_epsilon_slots: bool
+        @param min_weight: drop edges with a lower weight
+        @type min_weight: float
+        @param cumulative_mass: keep the fewest highest weighted edges reaching this fraction of the weight
+        @type cumulative_mass: float
+        @param top_k: keep at most this many highest weighted edges
+        @type top_k: int
+        @param renormalize: make the weights of the remaining edges sum to one
+        @type renormalize: bool
+        @param epsilon_symbols: words standing for no word
+        @type epsilon_symbols: tuple
+        """
+        self.drop_epsilon_slots = drop_epsilon_slots
+        self.min_weight = min_weight
+        self.cumulative_mass = cumulative_mass
+        self.top_k = top_k
+        self.renormalize = renormalize
+        self.epsilon_symbols = set(epsilon_symbols)
+
+    def prune_edges(self, edges):
+        """
+        Prune the edges of a single sausage
+        @param edges: edges of the sausage
+        @type edges: [(str, float)]
+        @return: kept edges, sorted by decreasing weight
+        @rtype: [(str, float)]
+        """
+        edges = sorted(((edge[0], edge[1]) for edge in edges), key=lambda edge: edge[1], reverse=True)
+        total = sum(edge[1] for edge in edges)
+        if self.top_k is not None:
+            edges = edges[:max(1, self.top_k)]
+        if self.min_weight is not None:
+            edges = edges[:1] + [edge for edge in edges[1:] if edge[1] >= self.min_weight]
+        if self.cumulative_mass is not None:
+            mass = 0.
+            for kept, edge in enumerate(edges):
+                mass += edge[1]
+                if mass >= self.cumulative_mass * total:
+                    edges = edges[:kept + 1]
+                    break
+        if self.renormalize:
+            kept_total = sum(edge[1] for edge in edges)
+            if kept_total > 0:
+                edges = [(word, weight / kept_total) for word, weight in edges]
+        return edges
+
+    def prune(self, sausages):
+        """
+        Prune sausages
+        @param sausages: sausages to prune
+        @type sausages: Sausages
+        @rtype: PrunedSausages
+        """
+        edges_array = []
+        slot_indices = []
+        for index, sausage in enumerate(sausages):
+            edges = self.prune_edges(sausage.get_edges())
+            if self.drop_epsilon_slots and all(edge[0] in self.epsilon_symbols for edge in edges):
+                continue
+            edges_array.append(edges)
+            slot_indices.append(index)
+        return PrunedSausages(Sausages.create_from_edges_array(edges_array), slot_indices, sausages)
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class SausagesTranscriptPair:
     """
     This class stores sausages and corresponding transcript
@@ -157,3 +160,220 @@ class Sausage:
 
     def __add__(self, other):
         return Sausage(self.edges + other.edges, to_sort=True)
+
+
+class Vocabulary:
+    """
+    Vocabulary maps words to integer ids.
+    A vocabulary can be shared by many CompactSausages.
+    """
+
+    def __init__(self, words=()):
+        self.words = []
+        self.word_ids = {}
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        """
+        Add a word to the vocabulary if it is not in it
+        @return: id of the word
+        @rtype: int
+        """
+        try:
+            return self.word_ids[word]
+        except KeyError:
+            self.word_ids[word] = len(self.words)
+            self.words.append(word)
+            return len(self.words) - 1
+
+    def index(self, word):
+        """
+        Get the id of a word
+        @raise KeyError: if the word is not in the vocabulary
+        """
+        return self.word_ids[word]
+
+    def __getitem__(self, word_id):
+        return self.words[word_id]
+
+    def __contains__(self, word):
+        return word in self.word_ids
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __len__(self):
+        return len(self.words)
+
+
+class CompactSausages:
+    """
+    Array backed Sausages.
+    Edges of all sausages are stored in a word id array (int32) and a weight array (float32),
+    sausage i owns the edges offsets[i]:offsets[i + 1]. Indexing and iteration give CompactSausage views,
+    which have the same interface as Sausage, and slicing gives a CompactSausages view sharing the edge arrays.
+    """
+
+    def __init__(self, offsets, word_ids, weights, vocabulary):
+        """
+        @param offsets: start of the edges of every sausage followed by the total number of edges
+        @type offsets: np.ndarray
+        @param word_ids: word ids of all edges
+        @type word_ids: np.ndarray
+        @param weights: weights of all edges
+        @type weights: np.ndarray
+        @param vocabulary: vocabulary of the word ids
+        @type vocabulary: Vocabulary
+        """
+        self.offsets = offsets
+        self.word_ids = word_ids
+        self.weights = weights
+        self.vocabulary = vocabulary
+
+    @staticmethod
+    def create_from_edges_array(edges_array, vocabulary=None):
+        """
+        Create CompactSausages from a list of lists of [word, weight] edges
+
+        @param edges_array: list of edges of every sausage
+        @type edges_array: [[(str, float)]]
+        @param vocabulary: vocabulary to share, a new one is created if None
+        @type vocabulary: Vocabulary
+        """
+        if vocabulary is None:
+            vocabulary = Vocabulary()
+        offsets = [0]
+        word_ids = []
+        weights = []
+        for edges in edges_array:
+            for edge in edges:
+                word_ids.append(vocabulary.add(edge[0]))
+                weights.append(edge[1])
+            offsets.append(len(word_ids))
+        return CompactSausages(np.array(offsets, dtype=np.int64), np.array(word_ids, dtype=np.int32),
+                               np.array(weights, dtype=np.float32), vocabulary)
+
+    @staticmethod
+    def create_from_sausages(sausages, vocabulary=None):
+        """
+        Create CompactSausages from Sausages
+
+        @param sausages: sausages to convert
+        @type sausages: Sausages
+        @param vocabulary: vocabulary to share, a new one is created if None
+        @type vocabulary: Vocabulary
+        """
+        return CompactSausages.create_from_edges_array([sausage.get_edges() for sausage in sausages], vocabulary)
+
+    def to_sausages(self):
+        """
+        Convert to Sausages, weights are converted back to python floats
+        @rtype: Sausages
+        """
+        return Sausages.create_from_edges_array([sausage.get_edges() for sausage in self])
+
+    def __iter__(self):
+        return (CompactSausage(self, index) for index in range(len(self)))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                # a view over the same edge arrays, the offsets still index them
+                return CompactSausages(self.offsets[start:max(start, stop) + 1], self.word_ids, self.weights,
+                                       self.vocabulary)
+            indices = np.arange(start, stop, step)
+            edges = np.concatenate([np.arange(self.offsets[i], self.offsets[i + 1]) for i in indices] +
+                                   [np.empty(0, dtype=np.int64)])
+            offsets = np.concatenate([[0], np.cumsum(self.offsets[indices + 1] - self.offsets[indices])])
+            return CompactSausages(offsets.astype(np.int64), self.word_ids[edges], self.weights[edges],
+                                   self.vocabulary)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sausage index out of range")
+        return CompactSausage(self, index)
+
+    def __str__(self):
+        return str(list(self))
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __eq__(self, other):
+        return len(self) == len(other) and all(sausage == other_sausage for sausage, other_sausage in zip(self, other))
+
+
+class CompactSausage:
+    """
+    View of a single sausage of CompactSausages
+    Edges are returned as (word, weight) tuples
+    """
+
+    def __init__(self, sausages, index):
+        self.sausages = sausages
+        self.index = index
+        self.start = int(sausages.offsets[index])
+        self.end = int(sausages.offsets[index + 1])
+
+    def get_word_ids(self):
+        """
+        Get the word ids of the edges, a view on the word id array
+        """
+        return self.sausages.word_ids[self.start:self.end]
+
+    def get_weights_array(self):
+        """
+        Get the weights of the edges, a view on the weight array
+        """
+        return self.sausages.weights[self.start:self.end]
+
+    def get_words(self):
+        """
+        Get the words in the sausage
+        """
+        words = self.sausages.vocabulary.words
+        return [words[word_id] for word_id in self.get_word_ids().tolist()]
+
+    def get_weights(self):
+        """
+        Get the weights in the sausage
+        """
+        return self.get_weights_array().tolist()
+
+    def get_edges(self):
+        """
+        Get the edges in the sausage
+        """
+        return list(zip(self.get_words(), self.get_weights()))
+
+    def to_sausage(self):
+        """
+        Convert to a Sausage
+        """
+        return Sausage.create_from_edges(self.get_edges())
+
+    def __iter__(self):
+        return iter(self.get_edges())
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        return self.get_edges()[index]
+
+    def __str__(self):
+        return str(self.get_edges())
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __eq__(self, other):
+        return [tuple(edge) for edge in self] == [tuple(edge) for edge in other]
+
+    def __hash__(self):
+        return hash(tuple(self.get_edges()))
@@ -0,0 +1,475 @@
+"""
+Alignment server loading the lexicon once and aligning requests in micro-batches.
+
+    saucriptaligner-server --lexicon cmudict-0.7b --workers 4                      # json lines on stdin and stdout
+    saucriptaligner-server --lexicon cmudict-0.7b --http 127.0.0.1:8080            # POST /align, GET /metrics
+
+A request is a json object {"id": ..., "sausages": "[ THE 1 ] [ A 0.6 AN 0.4 ]", "transcript": "THE A"} and its
+response {"id": ..., "alignment": [...]}, with the positions of the jsonl output of saucriptaligner, or
+{"id": ..., "error": ...}. The json line {"command": "metrics"} and GET /metrics give the latency percentiles,
+the queue depth and the counters of the server.
+"""
+import argparse
+import asyncio
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+from saucriptaligner import batch
+from saucriptaligner.cli import add_aligner_arguments, create_aligner, alignment_to_records
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+
+DEFAULT_MAX_BATCH_SIZE = 32
+# seconds the first request of a batch waits for more requests
+DEFAULT_MAX_WAIT = 0.005
+DEFAULT_MAX_QUEUE_SIZE = 1024
+# number of most recent latencies the percentiles are computed on
+LATENCY_WINDOW = 10000
+
+
+class ServerOverloaded(Exception):
+    """
+    Raised when a request is rejected because the queue of the server is full
+    """
+
+
+class RequestError(Exception):
+    """
+    Raised when a request is invalid or its alignment failed
+    """
+
+
+def align_requests(requests, score_func_name, engine, null_symbols=(), aligner=None):
+    """
+    Align a batch of requests, with the aligner of the worker process if no aligner is given
+    @param requests: sausages in kaldi format and transcript of every request
+    @type requests: [(str, str)]
+    @return: alignment records, or error message, of every request
+    @rtype: [(list, str)]
+    """
+    from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+    if aligner is None:
+        aligner = batch.worker_aligner
+    results = []
+    for sausages, transcript in requests:
+        try:
+            sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(
+                sausages_from_kaldi_sausages_string(sausages, null_symbols), transcript)
+            alignment = aligner.align_without_word_repeat(sau_and_text, score_func_name, engine)
+        except Exception as error:
+            # a bad request fails alone, not its whole batch
+            results.append((None, f"{type(error).__name__}: {error}"))
+        else:
+            results.append((alignment_to_records(alignment), None))
+    aligner.flush_distance_store()
+    return results
+
+
+class ServerMetrics:
+    """
+    Counters and latencies of an AlignmentServer
+    The latency of a request is the time from its submission to its result, including the time it waits
+    in the queue.
+    """
+
+    def __init__(self):
+        self.counters = dict.fromkeys(["requests", "completed", "errors", "rejected", "batches"], 0)
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def record_batch(self, results, submitted_times):
+        """
+        Record the results of a batch
+        @param results: alignment records, or error message, of every request of the batch
+        @type results: [(list, str)]
+        @param submitted_times: perf_counter time at which every request was submitted
+        @type submitted_times: [float]
+        """
+        now = time.perf_counter()
+        self.counters["batches"] += 1
+        for (_, error), submitted in zip(results, submitted_times):
+            self.counters["completed" if error is None else "errors"] += 1
+            self.latencies.append(now - submitted)
+
+    def latency_percentiles(self, percentiles=(50, 90, 99)):
+        """
+        Get percentiles of the recent latencies, in milliseconds
+        @rtype: dict
+        """
+        if not self.latencies:
+            return {}
+        latencies = np.array(self.latencies) * 1000
+        summary = {f"p{percentile}": float(value)
+                   for percentile, value in zip(percentiles, np.percentile(latencies, percentiles))}
+        summary["max"] = float(latencies.max())
+        return summary
+
+
+class AlignmentServer:
+    """
+    Aligns requests submitted concurrently in micro-batches
+    Requests wait in a bounded queue. A batch is taken from the queue as soon as a worker is free, with up to
+    max_batch_size requests, waiting at most max_wait seconds for the queue to fill up. A full queue either
+    makes submitters wait, or rejects their requests with ServerOverloaded.
+    """
+
+    def __init__(self, aligner, score_func_name="w-avg-dist", engine="numpy", workers=1,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait=DEFAULT_MAX_WAIT, max_queue_size=DEFAULT_MAX_QUEUE_SIZE,
+                 null_symbols=()):
+        """
+        @param aligner: aligner with its lexicon loaded, sent once to every worker process
+        @type aligner: SausagesTranscriptAligner
+        @param score_func_name: function keyword to use score function
+        @type score_func_name: str
+        @param engine: dynamic programming engine, see align_without_word_repeat
+        @type engine: str
+        @param workers: number of worker processes, 1 aligns in a thread of this process
+        @type workers: int
+        @param max_batch_size: maximum number of requests of a batch
+        @type max_batch_size: int
+        @param max_wait: seconds the first request of a batch waits for more requests
+        @type max_wait: float
+        @param max_queue_size: maximum number of requests waiting for a worker
+        @type max_queue_size: int
+        @param null_symbols: sausages made only of one of these symbols are skipped
+        @type null_symbols: tuple
+        """
+        if score_func_name not in aligner.score_functions:
+            raise ValueError(f"unknown score function {score_func_name}")
+        self.aligner = aligner
+        self.score_func_name = score_func_name
+        self.engine = engine
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue_size = max_queue_size
+        self.null_symbols = tuple(null_symbols)
+        self.metrics = ServerMetrics()
+        self.queue = None
+        self.executor = None
+        self.align_batch = None
+        self.worker_slots = None
+        self.batcher = None
+        self.in_flight = set()
+
+    async def start(self):
+        """
+        Start the workers and the batching of requests
+        """
+        self.queue = asyncio.Queue(self.max_queue_size)
+        if self.workers == 1:
+            # the event loop keeps accepting requests while the thread aligns
+            self.executor = ThreadPoolExecutor(1)
+            self.align_batch = functools.partial(align_requests, score_func_name=self.score_func_name,
+                                                 engine=self.engine, null_symbols=self.null_symbols,
+                                                 aligner=self.aligner)
+        else:
+            self.executor = ProcessPoolExecutor(self.workers, initializer=batch.init_worker, initargs=(self.aligner,))
+            self.align_batch = functools.partial(align_requests, score_func_name=self.score_func_name,
+                                                 engine=self.engine, null_symbols=self.null_symbols)
+        self.worker_slots = asyncio.Semaphore(self.workers)
+        self.batcher = asyncio.create_task(self.run_batcher())
+
+    async def stop(self):
+        """
+        Stop batching, wait for the batches being aligned and stop the workers
+        """
+        self.batcher.cancel()
+        try:
+            await self.batcher
+        except asyncio.CancelledError:
+            pass
+        if self.in_flight:
+            await asyncio.wait(self.in_flight)
+        self.executor.shutdown()
+        self.aligner.flush_distance_store()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.stop()
+
+    async def submit(self, sausages, transcript, wait=True):
+        """
+        Queue a request
+        @param sausages: sausages in kaldi format
+        @type sausages: str
+        @param transcript: transcript sentence
+        @type transcript: str
+        @param wait: wait for room in a full queue, otherwise raise ServerOverloaded
+        @type wait: bool
+        @return: future of the alignment records of the request, see cli.alignment_to_records
+        @rtype: asyncio.Future
+        """
+        if not isinstance(sausages, str) or not isinstance(transcript, str):
+            raise RequestError("sausages and transcript must be strings")
+        future = asyncio.get_running_loop().create_future()
+        item = (sausages, transcript, time.perf_counter(), future)
+        if wait:
+            await self.queue.put(item)
+        else:
+            try:
+                self.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                self.metrics.counters["rejected"] += 1
+                raise ServerOverloaded(f"{self.max_queue_size} requests are waiting") from None
+        self.metrics.counters["requests"] += 1
+        return future
+
+    async def align(self, sausages, transcript, wait=True):
+        """
+        Align a request, see submit
+        @raise RequestError: if the request could not be aligned
+        @return: alignment records, see cli.alignment_to_records
+        @rtype: [dict]
+        """
+        return await (await self.submit(sausages, transcript, wait))
+
+    async def run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # while all workers are busy, requests pile up in the queue and make the next batch
+            await self.worker_slots.acquire()
+            items = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(items) < self.max_batch_size:
+                try:
+                    items.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    items.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            task = asyncio.create_task(self.dispatch(items))
+            self.in_flight.add(task)
+            task.add_done_callback(self.in_flight.discard)
+
+    async def dispatch(self, items):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self.align_batch, [(sausages, transcript) for sausages, transcript, _, _ in items])
+        except Exception as error:
+            results = [(None, f"{type(error).__name__}: {error}")] * len(items)
+        finally:
+            self.worker_slots.release()
+        self.metrics.record_batch(results, [submitted for _, _, submitted, _ in items])
+        for (_, _, _, future), (records, error) in zip(items, results):
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(records)
+            else:
+                future.set_exception(RequestError(error))
+
+    def metrics_snapshot(self):
+        """
+        Get the metrics of the server
+        @rtype: dict
+        """
+        counters = self.metrics.counters
+        return dict(counters, queue_depth=self.queue.qsize() if self.queue is not None else 0,
+                    max_queue_size=self.max_queue_size, in_flight_batches=len(self.in_flight),
+                    mean_batch_size=(counters["completed"] + counters["errors"]) / counters["batches"]
+                    if counters["batches"] else 0.,
+                    latency_ms=self.metrics.latency_percentiles())
+
+
+async def respond(server, request, wait=True):
+    """
+    Align a json request, see the module documentation
+    @raise ServerOverloaded: if wait is False and the queue is full
+    @rtype: dict
+    """
+    if not isinstance(request, dict):
+        return {"error": "a request must be a json object"}
+    if request.get("command") == "metrics":
+        return {"id": request.get("id"), "metrics": server.metrics_snapshot()}
+    try:
+        future = await server.submit(request.get("sausages"), request.get("transcript"), wait)
+        return {"id": request.get("id"), "alignment": await future}
+    except RequestError as error:
+        return {"id": request.get("id"), "error": str(error)}
+
+
+async def serve_jsonl(server, reader, write):
+    """
+    Answer json line requests until the end of the input
+    Responses are written as soon as their alignment is done, so they can come out of order. A request is only
+    read once the previous one is queued, which stops reading while the server is overloaded.
+    @param reader: stream of json lines
+    @type reader: asyncio.StreamReader
+    @param write: function writing a response line
+    @type write: callable
+    """
+    responses = set()
+
+    async def answer(request_id, future):
+        try:
+            response = {"id": request_id, "alignment": await future}
+        except RequestError as error:
+            response = {"id": request_id, "error": str(error)}
+        write(json.dumps(response) + "\n")
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            write(json.dumps({"error": f"invalid json: {error}"}) + "\n")
+            continue
+        if not isinstance(request, dict) or request.get("command") == "metrics":
+            write(json.dumps(await respond(server, request)) + "\n")
+            continue
+        try:
+            future = await server.submit(request.get("sausages"), request.get("transcript"))
+        except RequestError as error:
+            write(json.dumps({"id": request.get("id"), "error": str(error)}) + "\n")
+            continue
+        task = asyncio.create_task(answer(request.get("id"), future))
+        responses.add(task)
+        task.add_done_callback(responses.discard)
+    if responses:
+        await asyncio.wait(responses)
+
+
+async def http_response(server, method, target, body):
+    """
+    Answer an HTTP request, POST /align with a json request or GET /metrics
+    @return: status line and json response
+    @rtype: (str, dict)
+    """
+    if method == "GET" and target == "/metrics":
+        return "200 OK", server.metrics_snapshot()
+    if method != "POST" or target != "/align":
+        return "404 Not Found", {"error": f"no {method} {target}, use POST /align or GET /metrics"}
+    try:
+        request = json.loads(body)
+    except ValueError as error:
+        return "400 Bad Request", {"error": f"invalid json: {error}"}
+    try:
+        response = await respond(server, request, wait=False)
+    except ServerOverloaded as error:
+        return "503 Service Unavailable", {"id": request.get("id"), "error": f"overloaded, {error}"}
+    return ("400 Bad Request" if "error" in response else "200 OK"), response
+
+
+async def handle_http_connection(server, reader, writer):
+    """
+    Serve the HTTP/1.1 requests of a connection, keeping it open unless the client closes it
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            method, target, version = request_line.decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            status, response = await http_response(server, method, target, body)
+            payload = json.dumps(response).encode("utf-8")
+            # clients are asked to retry later instead of waiting on an overloaded server
+            retry = "Retry-After: 1\r\n" if status.startswith("503") else ""
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(payload)}\r\n"
+                         f"{retry}\r\n".encode("latin-1") + payload)
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close" or version == "HTTP/1.0":
+                break
+    except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def stdin_reader():
+    """
+    Get an asyncio stream of the standard input
+    Pipes are read with flow control, regular files, which cannot be watched by the event loop, from a thread.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    try:
+        await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except (ValueError, OSError):
+        def feed():
+            for line in sys.stdin.buffer:
+                loop.call_soon_threadsafe(reader.feed_data, line)
+            loop.call_soon_threadsafe(reader.feed_eof)
+
+        threading.Thread(target=feed, daemon=True).start()
+    return reader
+
+
+def write_stdout(line):
+    sys.stdout.write(line)
+    sys.stdout.flush()
+
+
+async def serve(aligner, args):
+    async with AlignmentServer(aligner, args.score_func, args.engine, args.workers or os.cpu_count() or 1,
+                               args.max_batch_size, args.max_wait_ms / 1000, args.max_queue_size,
+                               args.null_symbol) as server:
+        if args.http is None:
+            await serve_jsonl(server, await stdin_reader(), write_stdout)
+            print(json.dumps(server.metrics_snapshot()), file=sys.stderr)
+            return
+        host, _, port = args.http.rpartition(":")
+        http_server = await asyncio.start_server(functools.partial(handle_http_connection, server),
+                                                 host or "127.0.0.1", int(port))
+        print(f"listening on {args.http}", file=sys.stderr)
+        async with http_server:
+            await http_server.serve_forever()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="saucriptaligner-server",
+                                     description="Serve alignments of kaldi sausages and transcripts")
+    add_aligner_arguments(parser)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE,
+                        help="maximum number of requests aligned in one batch")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT * 1000,
+                        help="milliseconds a request waits for more requests to batch with")
+    parser.add_argument("--max-queue-size", type=int, default=DEFAULT_MAX_QUEUE_SIZE,
+                        help="requests waiting for a worker beyond which http requests are rejected with 503")
+    parser.add_argument("--http", metavar="HOST:PORT", help="serve HTTP on this address instead of stdin and stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    aligner = create_aligner(args)
+    if args.score_func not in aligner.score_functions:
+        print(f"unknown score function {args.score_func}", file=sys.stderr)
+        return 2
+    try:
+        asyncio.run(serve(aligner, args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,20 @@
 from setuptools import setup
 
-setup(name='funniest',
+setup(name='saucriptaligner',
       version='0.1',
       description='Package to align sausages (confusion networks) and transcripts',
       url='',
       author='Divyansh',
       author_email='divyansh.24888@gmail.com',
       license='MIT',
-      packages=['funniest'],
+      packages=['saucriptaligner'],
       install_requires=[
           'editdistance',
+          'numpy',
+          'tqdm',
       ],
-      zip_safe=False)
\ No newline at end of file
+      entry_points={
+          'console_scripts': ['saucriptaligner=saucriptaligner.cli:main',
+                              'saucriptaligner-server=saucriptaligner.server:main'],
+      },
+      zip_safe=False)
@@ -0,0 +1,39 @@
+import sys
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_transcripts_are_aligned_like_single_pairs_and_ranked():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    transcripts = [data.sample.transcript_text_long, data.sample.transcript_text_short,
+                   data.sample.transcript_text_short.replace("TOBACCO", "TOBACCOS"), ""]
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    for score_func_name in aligner.score_functions:
+        ranked = aligner.align_transcripts(sau, transcripts, score_func_name)
+        assert sorted(result.index for result in ranked) == list(range(len(transcripts)))
+        assert [result.cost for result in ranked] == sorted(result.cost for result in ranked)
+        for result in ranked:
+            sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau, transcripts[result.index])
+            expected = aligner.align_without_word_repeat(sau_and_text, score_func_name, engine="numpy")
+            if not expected:
+                assert result.alignment == [] and result.cost == len(sau)
+                continue
+            assert result.alignment.get_sausages_wordlist() == expected.get_sausages_wordlist()
+            assert abs(result.cost - sum(aligner.score_alignment(expected, score_func_name))) < 1e-9
+        order = [result.index for result in ranked]
+        assert order.index(1) < order.index(2)
+
+
+def test_transcripts_share_the_scoring_of_the_sausages():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    transcripts = [data.sample.transcript_text_short] * 3
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    stats = aligner.enable_instrumentation()
+    aligner.align_transcripts(sau, transcripts, "w-avg-dist")
+    assert stats.counters["alignments"] == 3
+    assert stats.counters["score_calls"] == len(sau) * len(set(data.sample.transcript_text_short.split()))
@@ -4,7 +4,7 @@ from colorama import Fore, Back, Style
 import data.sample
 from saucriptaligner.sau_text_pair import Sausages, Sausage, SausagesTranscriptPair
 from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
-from utils.create_sausages import sausages_from_kaldi_sausages_string
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
 
 sys.path.append('../')
 
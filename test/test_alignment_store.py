@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.alignment_store import AlignmentWriter, AlignmentReader, WORD_GAP, SAUSAGE_GAP
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_stored_alignments_round_trip_and_append(tmp_path):
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    alignments = {}
+    for utterance_id, transcript in [("short", data.sample.transcript_text_short),
+                                     ("long", data.sample.transcript_text_long)]:
+        alignments[utterance_id] = aligner.align_without_word_repeat(
+            SausagesTranscriptPair.create_from_sausages_sentence(sau, transcript), "w-avg-dist")
+
+    directory = os.path.join(tmp_path, "store")
+    with AlignmentWriter(directory) as writer:
+        writer.write("short", alignments["short"],
+                     aligner.score_alignment(alignments["short"], "w-avg-dist"))
+    # reopening appends
+    with AlignmentWriter(directory) as writer:
+        writer.write("long", alignments["long"])
+        writer.write("empty", [])
+
+    reader = AlignmentReader(directory)
+    assert list(reader) == ["short", "long", "empty"]
+    for utterance_id, alignment in alignments.items():
+        assert reader.get_wordlist(utterance_id) == alignment.get_wordlist()
+        assert reader.get_alignment(utterance_id, sau).get_sausages() == alignment.get_sausages()
+    columns = reader["short"]
+    assert isinstance(reader.columns["word_ids"], np.memmap)
+    words = alignments["short"].get_wordlist()
+    assert [bool(flag & WORD_GAP) for flag in columns.gap_flags] == [word == "-" for word in words]
+    assert ((columns.slot_indices == -1) == ((columns.gap_flags & SAUSAGE_GAP) != 0)).all()
+    assert np.allclose(columns.scores, aligner.score_alignment(alignments["short"], "w-avg-dist"))
+    assert np.isnan(reader["long"].scores).all()
+    assert len(reader["empty"].word_ids) == 0
+
+    # an interrupted write is ignored by readers and dropped by the next writer
+    with open(os.path.join(directory, "utterance_ids.txt"), 'a') as ids_file:
+        ids_file.write("partial")
+    with open(os.path.join(directory, "word_ids.i4"), 'ab') as word_ids_file:
+        word_ids_file.write(np.zeros(3, dtype=np.int32).tobytes())
+    assert len(AlignmentReader(directory)) == 3
+    with AlignmentWriter(directory) as writer:
+        writer.write("again", alignments["short"])
+    assert AlignmentReader(directory).get_wordlist("again") == alignments["short"].get_wordlist()
+
+
+def test_utterances_with_unwritten_words_are_incomplete(tmp_path):
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    alignment = aligner.align_without_word_repeat(
+        SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_short), "w-avg-dist")
+    directory = os.path.join(tmp_path, "store")
+    with AlignmentWriter(directory) as writer:
+        writer.write("first", [])
+        writer.write("short", alignment)
+    # the vocabulary lost its last words in an interruption, the other files were written
+    vocabulary_path = os.path.join(directory, "vocabulary.txt")
+    with open(vocabulary_path, 'r') as vocabulary_file:
+        words = vocabulary_file.read().split("\n")[:-1]
+    with open(vocabulary_path, 'w') as vocabulary_file:
+        vocabulary_file.write("".join(word + "\n" for word in words[:-1]) + words[-1][:1])
+    assert list(AlignmentReader(directory)) == ["first"]
+    with AlignmentWriter(directory) as writer:
+        writer.write("short", alignment)
+    assert AlignmentReader(directory).get_wordlist("short") == alignment.get_wordlist()
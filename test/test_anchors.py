@@ -0,0 +1,54 @@
+import sys
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.anchors import AnchorSegmenter, longest_increasing_subsequence
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_longest_increasing_subsequence():
+    assert longest_increasing_subsequence([]) == []
+    values = [3, 1, 4, 1, 5, 9, 2, 6]
+    subsequence = longest_increasing_subsequence(values)
+    assert len(subsequence) == 4
+    assert all(values[a] < values[b] for a, b in zip(subsequence, subsequence[1:]))
+
+
+def test_anchors_are_unique_and_monotonic():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_short)
+    words = sau_and_text.get_wordlist()
+    anchors = AnchorSegmenter().find_anchors(sau, words)
+    anchor_words = [words[word] for _, word in anchors]
+    assert "CLERICAL" in anchor_words and "TOBACCO" in anchor_words
+    assert all(words.count(word) == 1 for word in anchor_words)
+    assert all(a[0] < b[0] and a[1] < b[1] for a, b in zip(anchors, anchors[1:]))
+    # a word repeated in the transcript is never an anchor
+    assert AnchorSegmenter().find_anchors(sau, words + ["TOBACCO"]) == \
+           [anchor for anchor in anchors if words[anchor[1]] != "TOBACCO"]
+
+
+def test_anchored_alignment_matches_full_alignment():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_short)
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    full = aligner.align_without_word_repeat(sau_and_text, "w-avg-dist", engine="numpy")
+    anchored = aligner.align_with_anchors(sau_and_text, "w-avg-dist", engine="numpy")
+    assert anchored.get_wordlist() == full.get_wordlist()
+    assert anchored.get_sausages() == full.get_sausages()
+
+
+def test_empty_segments_are_gaps():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau[:20], "UNSEEN CLERICAL")
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    anchored = aligner.align_with_anchors(sau_and_text, "w-avg-dist", engine="numpy")
+    assert [sausage for sausage in anchored.get_sausages() if not isinstance(sausage, str)] == list(sau[:20])
+    assert [word for word in anchored.get_wordlist() if word != "-"] == ["UNSEEN", "CLERICAL"]
+    # the sausages after the anchor have no word left
+    clerical = anchored.get_wordlist().index("CLERICAL")
+    assert anchored.get_sausages()[clerical] is sau[14]
+    assert anchored.get_wordlist()[clerical + 1:] == ["-"] * 5
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_align_many_keeps_input_order():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    transcripts = [data.sample.transcript_text_short, data.sample.transcript_text_long, "THE REVEREND"] * 3
+    pairs = [SausagesTranscriptPair.create_from_sausages_sentence(sau, transcript) for transcript in transcripts]
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    expected = [aligner.align_without_word_repeat(pair, "w-avg-dist").get_wordlist() for pair in pairs]
+
+    aligned = aligner.align_many(iter(pairs), "w-avg-dist", workers=2, chunk_size=2, max_in_flight=2)
+    assert [alignment.get_wordlist() for alignment in aligned] == expected
+    aligned = aligner.align_many(pairs, "w-avg-dist", engine="numpy", workers=2, chunk_size=1, ordered=False)
+    assert sorted((index, alignment.get_wordlist()) for index, alignment in aligned) == list(enumerate(expected))
+
+
+def test_workers_import_the_aligner_without_engine_and_feature_modules():
+    lazy_modules = ["sqlite3", "concurrent.futures", "saucriptaligner.dp_engines", "saucriptaligner.batch",
+                    "saucriptaligner.distance_store", "saucriptaligner.conf2vec", "saucriptaligner.incremental",
+                    "saucriptaligner.anchors"]
+    code = ("import sys; from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner; "
+            "SausagesTranscriptAligner({'THE': 'DH AH0'}); "
+            f"print([module for module in {lazy_modules!r} if module in sys.modules])")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
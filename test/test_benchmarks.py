@@ -0,0 +1,25 @@
+import json
+import os
+import sys
+
+from benchmarks.synthetic import SyntheticCorpus
+from benchmarks.run_benchmarks import main
+
+sys.path.append('../')
+
+
+def test_synthetic_pair_rates():
+    corpus = SyntheticCorpus(vocabulary_size=50, seed=1)
+    pair = corpus.pair(slots=30, eps_density=0.0, oov_rate=0.0, insertion_rate=0.0, deletion_rate=0.0,
+                       substitution_rate=0.0)
+    sau, words = pair.get_sausages_wordlist()
+    assert len(sau) == len(words) == 30
+    assert all(sausage.get_words()[0] == word for sausage, word in zip(sau, words))
+
+
+def test_benchmark_writes_json(tmp_path):
+    output = os.path.join(tmp_path, "bench.json")
+    main(["--pairs", "2", "--slots", "5", "--repeat", "1", "--engines", "numpy", "--output", output])
+    with open(output) as output_file:
+        phases = json.load(output_file)["phases"]
+    assert {"lexicon_load", "compiled_lexicon_load", "kaldi_parse", "align/avg-dist/numpy"} <= set(phases)
@@ -0,0 +1,53 @@
+import random
+import sys
+
+import editdistance
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.bitparallel import edit_distances_packed, pack_sequences, min_variant_distances
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_bitparallel_kernel_matches_editdistance():
+    generator = random.Random(0)
+    for _ in range(200):
+        query = [generator.randrange(8) for _ in range(generator.randint(1, 64))]
+        candidates = [[generator.randrange(10) for _ in range(generator.randint(0, 70))]
+                      for _ in range(generator.randint(1, 20))]
+        expected = [editdistance.eval(query, candidate) for candidate in candidates]
+        assert edit_distances_packed(query, *pack_sequences(candidates)).tolist() == expected
+
+
+def test_distance_backends_give_the_same_alignment():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_long)
+    expected = SausagesTranscriptAligner(data.sample.sample_lexicon, distance_backend="editdistance")
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    for word in ["THE", "MEEKIN", "UNKNOWN"]:
+        assert aligner.edge_distances(word, sau[8]) == expected.edge_distances(word, sau[8])
+    for engine in ["python", "numpy"]:
+        assert aligner.align_without_word_repeat(sau_and_text, "w-avg-dist", engine).get_wordlist() == \
+               expected.align_without_word_repeat(sau_and_text, "w-avg-dist", engine).get_wordlist()
+
+
+def test_min_variant_distances_match_all_pairs():
+    generator = random.Random(1)
+
+    def pronunciations():
+        variants = []
+        for _ in range(generator.randint(1, 3)):
+            ids = [generator.randrange(6) for _ in range(generator.randint(1, 8))]
+            variants.append((ids, 2 * len(ids) - 1))
+        return variants
+
+    for _ in range(50):
+        query_variants = pronunciations()
+        candidate_variants = [pronunciations() for _ in range(generator.randint(1, 300))]
+        expected = [min(editdistance.eval(query, candidate) / max(query_length, length)
+                        for query, query_length in query_variants for candidate, length in variants)
+                    for variants in candidate_variants]
+        assert min_variant_distances(query_variants, candidate_variants) == expected
@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner import cli
+from saucriptaligner.alignment_store import AlignmentReader
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def write_inputs(directory):
+    os.makedirs(os.path.join(directory, "sausages"))
+    os.makedirs(os.path.join(directory, "text"))
+    with open(os.path.join(directory, "sausages", "part1"), 'w') as f:
+        f.write("utt1 " + data.sample.sausage_text + "\n")
+        f.write("utt2 [ THE 1 ]\n")
+    with open(os.path.join(directory, "text", "part1"), 'w') as f:
+        f.write("utt1 " + data.sample.transcript_text_long + "\n")
+        f.write("utt2 THE\n")
+
+
+def test_cli_writes_jsonl_and_ctm(tmp_path):
+    lexicon_path = os.path.join(tmp_path, "cmudict")
+    data.sample.write_cmu_dict(data.sample.sample_lexicon, lexicon_path)
+    write_inputs(os.path.join(tmp_path, "inputs"))
+    sausages_path = os.path.join(tmp_path, "inputs", "sausages", "part1")
+    transcripts_path = os.path.join(tmp_path, "inputs", "text", "part1")
+
+    output_path = os.path.join(tmp_path, "alignments.jsonl")
+    assert cli.main([sausages_path, transcripts_path, "--lexicon", lexicon_path, "--workers", "2",
+                     "--chunk-size", "1", "-o", output_path, "--no-progress"]) == 0
+    with open(output_path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["utterance_id"] for record in records] == ["utt1", "utt2"]
+
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    expected = SausagesTranscriptAligner(data.sample.sample_lexicon).align_without_word_repeat(
+        SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_long), "w-avg-dist")
+    assert [position["word"] or "-" for position in records[0]["alignment"]] == expected.get_wordlist()
+    assert records[1]["alignment"] == [{"word": "THE", "edges": [["THE", 1.0]]}]
+
+    # directories are paired by file name
+    ctm_path = os.path.join(tmp_path, "alignments.ctm")
+    assert cli.main([os.path.join(tmp_path, "inputs", "sausages"), os.path.join(tmp_path, "inputs", "text"),
+                     "--lexicon", lexicon_path,
+                     "--format", "ctm", "-o", ctm_path, "--no-progress"]) == 0
+    with open(ctm_path) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == len(data.sample.transcript_text_long.split()) + 1
+    assert lines[-1] == "utt2 1 0 1 THE 1.000000"
+
+    store_path = os.path.join(tmp_path, "store")
+    assert cli.main([sausages_path, transcripts_path, "--lexicon", lexicon_path, "--format", "columnar",
+                     "-o", store_path, "--no-progress"]) == 0
+    assert AlignmentReader(store_path).get_wordlist("utt1") == expected.get_wordlist()
@@ -0,0 +1,50 @@
+import sys
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair, CompactSausages, Vocabulary
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_compact_sausages_round_trip():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    vocabulary = Vocabulary()
+    compact = CompactSausages.create_from_sausages(sau, vocabulary)
+    assert len(compact) == len(sau)
+    assert compact[9].get_words() == sau[9].get_words()
+    assert compact[-1].get_words() == sau[-1].get_words()
+    assert all(len(compact_sausage) == len(sausage) for compact_sausage, sausage in zip(compact, sau))
+    assert [sausage.get_words() for sausage in compact.to_sausages()] == [sausage.get_words() for sausage in sau]
+    assert CompactSausages.create_from_sausages(sau, vocabulary).vocabulary is vocabulary
+    assert len(vocabulary) == len({word for sausage in sau for word in sausage.get_words()})
+
+
+def test_compact_sausages_slices():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    compact = CompactSausages.create_from_sausages(sau)
+    for index in [slice(3, 9), slice(-4, None), slice(None, 2), slice(5, 5), slice(1, 12, 3), slice(None, None, -2)]:
+        sliced = compact[index]
+        assert isinstance(sliced, CompactSausages) and sliced.vocabulary is compact.vocabulary
+        assert [sausage.get_edges() for sausage in sliced] == [sausage.get_edges() for sausage in compact][index]
+    view = compact[3:9]
+    assert view.word_ids is compact.word_ids
+    assert view[-1].get_words() == sau[8].get_words()
+    assert view[1:3] == compact[4:6]
+
+
+def test_aligner_accepts_compact_sausages():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    compact = CompactSausages.create_from_sausages(sau)
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    for score_func_name in aligner.score_functions:
+        expected = aligner.align_without_word_repeat(
+            SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_short),
+            score_func_name)
+        aligned = aligner.align_without_word_repeat(
+            SausagesTranscriptPair.create_from_sausages_sentence(compact, data.sample.transcript_text_short),
+            score_func_name, engine="numpy")
+        assert [sausage if isinstance(sausage, str) else sausage.get_words() for sausage in aligned.sausages] == \
+               [sausage if isinstance(sausage, str) else sausage.get_words() for sausage in expected.sausages]
+        assert aligned.wordlist == expected.wordlist
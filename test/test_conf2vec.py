@@ -0,0 +1,50 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+
+import data.sample
+from saucriptaligner.sau_text_pair import CompactSausages, SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.conf2vec import Conf2Vec
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def sample_vectors(words, dimension=8, seed=0):
+    rng = np.random.default_rng(seed)
+    return {word: rng.normal(size=dimension) for word in words}
+
+
+def test_embedding_engines_agree_and_fall_back_to_phonemes(tmp_path):
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    pair = SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_long)
+    words = sorted({word for sausage in sau for word in sausage.get_words()} | set(pair.get_wordlist()))
+    # leave some words without a vector
+    vectors = sample_vectors(words[::2])
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon, conf2vec=vectors)
+
+    costs = aligner.embedding_cost_matrix(sau, pair.get_wordlist())
+    for i, sausage in enumerate(sau):
+        for j, word in enumerate(pair.get_wordlist()):
+            assert np.isclose(costs[i, j], aligner.embedding_sausage_word_distance(sausage, word))
+    assert ((costs >= 0) & (costs <= 1)).all()
+    compact = CompactSausages.create_from_sausages(sau)
+    slot_vectors, known_slots = aligner.conf2vec.slot_unit_vectors(compact)
+    expected_vectors, expected_known_slots = aligner.conf2vec.slot_unit_vectors(sau)
+    assert np.allclose(slot_vectors, expected_vectors) and np.array_equal(known_slots, expected_known_slots)
+    unknown_word = next(word for word in pair.get_wordlist() if word not in aligner.conf2vec)
+    assert costs[0, pair.get_wordlist().index(unknown_word)] == \
+        aligner.weighted_average_sausage_word_edit_distance(sau[0], unknown_word)
+
+    expected = aligner.align_without_word_repeat(pair, "emb-dist").get_wordlist()
+    assert aligner.align_without_word_repeat(pair, "emb-dist", engine="numpy").get_wordlist() == expected
+
+    vectors_path = os.path.join(tmp_path, "vectors.npy")
+    words_path = os.path.join(tmp_path, "words.txt")
+    aligner.conf2vec.save(vectors_path, words_path)
+    loaded = pickle.loads(pickle.dumps(Conf2Vec.load(vectors_path, words_path)))
+    assert isinstance(loaded.vectors, np.memmap)
+    assert np.array_equal(loaded[words[0]], aligner.conf2vec[words[0]])
@@ -0,0 +1,53 @@
+import gzip
+import os
+import sys
+
+import pytest
+
+import data.sample
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string, iter_sausages_word_pairs_from_kaldi_files
+
+sys.path.append('../')
+
+
+def test_null_symbol_sausages_are_skipped():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    sau_without_eps = sausages_from_kaldi_sausages_string(data.sample.sausage_text, null_symbols=("<eps>",))
+    assert len(sau_without_eps) == len([sausage for sausage in sau if sausage.get_words() != ["<eps>"]])
+
+
+def test_pairs_are_matched_by_utterance_id(tmp_path):
+    sausages_file = os.path.join(tmp_path, "sausages.gz")
+    transcript_file = os.path.join(tmp_path, "text")
+    with gzip.open(sausages_file, 'wt') as f:
+        f.write("utt1 " + data.sample.sausage_text + "\n")
+        f.write("utt2 [ THE 1 ]\n")
+        f.write("utt3 [ OF 1 ]\n")
+    with open(transcript_file, 'w') as f:
+        f.write("utt2 THE\n")
+        f.write("utt1 " + data.sample.transcript_text_short + "\n")
+        f.write("utt4 OUT\n")
+    with pytest.warns(UserWarning, match="1 sausages and 1 transcripts"):
+        pairs = dict(iter_sausages_word_pairs_from_kaldi_files(sausages_file, transcript_file))
+    assert sorted(pairs) == ["utt1", "utt2"]
+    assert pairs["utt1"].get_sausages() == sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    assert pairs["utt1"].get_sentence() == data.sample.transcript_text_short.strip()
+    assert pairs["utt2"].get_wordlist() == ["THE"]
+
+
+def test_unmatched_utterances_are_not_buffered_after_eof(tmp_path):
+    sausages_file = os.path.join(tmp_path, "sausages")
+    transcript_file = os.path.join(tmp_path, "text")
+    with open(sausages_file, 'w') as f:
+        f.write("utt0 [ THE 1 ]\n")
+        for i in range(1, 101):
+            f.write(f"utt{i} [ OF 1 ]\n")
+    with open(transcript_file, 'w') as f:
+        f.write("utt0 THE\n")
+        f.write("utt99 OF\n")
+    reader = iter_sausages_word_pairs_from_kaldi_files(sausages_file, transcript_file)
+    assert next(reader)[0] == "utt0"
+    assert next(reader)[0] == "utt99"
+    assert len(reader.gi_frame.f_locals["pending_sausages"]) <= 2
+    with pytest.warns(UserWarning, match="99 sausages and 0 transcripts"):
+        assert list(reader) == []
@@ -0,0 +1,31 @@
+import sys
+
+import data.sample
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_cached_distance_matches_uncached_distance():
+    lexicon = data.sample.sample_lexicon
+    aligner = SausagesTranscriptAligner(lexicon)
+    for word1, word2 in [("REVEREND", "REVERENT"), ("MEEKIN", "THE"), ("THE", "THE")]:
+        expected = SausagesTranscriptAligner.average_edit_distance(lexicon[word1], lexicon[word2])
+        assert aligner.phoneme_edit_distance(word1, word2) == expected
+        assert aligner.phoneme_edit_distance(word2, word1) == expected
+    info = aligner.distance_cache_info()
+    assert info.hits == 3 and info.misses == 3 and info.currsize == 3
+
+
+def test_distance_cache_is_bounded():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    lexicon = data.sample.sample_lexicon
+    aligner = SausagesTranscriptAligner(lexicon, distance_cache_size=8)
+    for sausage in sau:
+        aligner.average_sausage_word_edit_distance(sausage, "MEEKIN")
+    assert aligner.distance_cache_info().currsize == 8
+    aligner.set_distance_cache_size(2)
+    assert aligner.distance_cache_info().currsize == 2
+    aligner.clear_distance_cache()
+    assert aligner.distance_cache_info() == (0, 0, 2, 0)
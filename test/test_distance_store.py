@@ -0,0 +1,74 @@
+import os
+import pickle
+import sys
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.distance_store import DistanceStore, LOOKUP_CHUNK_SIZE
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_store_is_symmetric_and_batched(tmp_path):
+    path = os.path.join(tmp_path, "distances.sqlite")
+    with DistanceStore(path, "v1", "phoneme-edit", batch_size=2) as store:
+        store.put("THE", "A", 0.5)
+        assert store.get("A", "THE") == 0.5
+        store.put("B", "THE", 0.25)
+        assert not store.pending
+        assert store.get_many("THE", ["A", "B", "C"]) == {"A": 0.5, "B": 0.25}
+    reader = DistanceStore(path, "v1", "phoneme-edit")
+    assert len(reader) == 2 and reader.get("THE", "B") == 0.25
+    # distances of another lexicon are kept apart
+    assert DistanceStore(path, "v2", "phoneme-edit").get("THE", "B") is None
+    assert pickle.loads(pickle.dumps(reader)).get("A", "THE") == 0.5
+
+
+def test_warm_run_reads_every_distance_from_the_store(tmp_path):
+    path = os.path.join(tmp_path, "distances.sqlite")
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_short)
+
+    cold = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    cold.open_distance_store(path)
+    stats = cold.enable_instrumentation()
+    expected = cold.align_without_word_repeat(sau_and_text, "w-avg-dist", engine="numpy")
+    assert stats.counters["distance_computations"] > 0
+    cold.distance_store.close()
+
+    for engine in ["numpy", "python", "banded"]:
+        warm = SausagesTranscriptAligner(data.sample.sample_lexicon)
+        warm.open_distance_store(path)
+        stats = warm.enable_instrumentation()
+        aligned = warm.align_without_word_repeat(sau_and_text, "w-avg-dist", engine=engine)
+        assert aligned.get_sausages_wordlist() == expected.get_sausages_wordlist()
+        assert stats.counters["distance_computations"] == 0
+        assert stats.counters["distance_store_hits"] > 0
+    assert warm.phoneme_edit_distance("MEEKIN", "THE") == cold.phoneme_edit_distance("THE", "MEEKIN")
+
+    # the store follows the lexicon of the aligner
+    warm.set_lexicon_dict(dict(data.sample.sample_lexicon, THE="DH IY0"))
+    assert warm.distance_store.get("THE", "MEEKIN") is None
+
+
+def test_alignment_queries_the_database_once_per_utterance(tmp_path):
+    path = os.path.join(tmp_path, "distances.sqlite")
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_short)
+    words = set(sau_and_text.get_wordlist())
+    sausage_words = {word for sausage in sau for word in sausage.get_words()}
+    with DistanceStore(path, "v1", "phoneme-edit") as store:
+        store.put("THE", "A", 0.5)
+
+    for engine in ["python", "numpy"]:
+        aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+        store = aligner.open_distance_store(path)
+        statements = []
+        store.connection.set_trace_callback(statements.append)
+        aligner.align_without_word_repeat(sau_and_text, "w-avg-dist", engine=engine)
+        selects = [statement for statement in statements if statement.lstrip().upper().startswith("SELECT")]
+        # both key orders, per chunk of transcript words and of sausage words
+        assert 0 < len(selects) <= 2 * -(-len(words) // LOOKUP_CHUNK_SIZE) * -(-len(sausage_words) // LOOKUP_CHUNK_SIZE)
+        store.close()
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair, CompactSausages
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.distance_table import WordPairDistanceTable
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_distance_table_gives_the_same_alignment(tmp_path):
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    pairs = [SausagesTranscriptPair.create_from_sausages_sentence(sau, transcript)
+             for transcript in (data.sample.transcript_text_short, data.sample.transcript_text_long)]
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    expected = [aligner.align_without_word_repeat(pair, "w-avg-dist").get_wordlist() for pair in pairs]
+
+    table_aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    table = table_aligner.precompute_distance_table(pairs)
+    assert table.distance("MEEKIN", "MEAKIN") == aligner.phoneme_edit_distance("MEEKIN", "MEAKIN")
+    assert [table_aligner.align_without_word_repeat(pair, "w-avg-dist").get_wordlist() for pair in pairs] == expected
+    assert table_aligner.distance_cache_info().misses == 0
+
+    path = os.path.join(tmp_path, "table.npz")
+    table.save(path)
+    loaded = WordPairDistanceTable.load(path, table_aligner.lexicon_version, "phoneme-edit")
+    table_aligner.set_distance_table(loaded)
+    compact = CompactSausages.create_from_sausages(sau, loaded.sausage_vocabulary)
+    assert loaded.edge_distances("THE", compact[1]) == table.edge_distances("THE", sau[1])
+    assert loaded.edge_distances("UNSEEN", sau[1]) is None
+
+
+def test_distance_table_of_another_lexicon_is_rejected(tmp_path):
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    pairs = [SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_short)]
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    path = os.path.join(tmp_path, "table.npz")
+    aligner.precompute_distance_table(pairs).save(path)
+
+    other_lexicon = dict(data.sample.sample_lexicon, THE="DH IY0")
+    other_aligner = SausagesTranscriptAligner(other_lexicon)
+    with pytest.raises(ValueError):
+        WordPairDistanceTable.load(path, other_aligner.lexicon_version)
+    with pytest.raises(ValueError):
+        WordPairDistanceTable.load(path, distance_name="phoneme-edit-variants")
+    with pytest.raises(ValueError):
+        other_aligner.set_distance_table(WordPairDistanceTable.load(path))
+    # a new lexicon drops the table of the previous one
+    aligner.set_lexicon_dict(other_lexicon)
+    assert aligner.distance_table is None
@@ -0,0 +1,82 @@
+import random
+import sys
+
+import numpy as np
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner import dp_engines
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def sample_pairs():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    for transcript in (data.sample.transcript_text_short, data.sample.transcript_text_long):
+        yield SausagesTranscriptPair.create_from_sausages_sentence(sau, transcript)
+
+
+def test_numpy_engine_matches_python_engine():
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    for sau_and_text in sample_pairs():
+        for score_func_name in aligner.score_functions:
+            expected = aligner.align_without_word_repeat(sau_and_text, score_func_name)
+            aligned = aligner.align_without_word_repeat(sau_and_text, score_func_name, engine="numpy")
+            assert aligned.get_sausages_wordlist() == expected.get_sausages_wordlist()
+
+
+def test_banded_and_hirschberg_engines_match_python_engine():
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    for sau_and_text in sample_pairs():
+        for score_func_name in aligner.score_functions:
+            expected = aligner.align_without_word_repeat(sau_and_text, score_func_name)
+            for engine, options in [("banded", {"band_width": 1}), ("banded", {}), ("hirschberg", {})]:
+                aligned = aligner.align_without_word_repeat(sau_and_text, score_func_name, engine=engine, **options)
+                assert aligned.get_sausages_wordlist() == expected.get_sausages_wordlist()
+
+
+def test_hirschberg_engine_runs_in_linear_number_of_cells():
+    generator = random.Random(0)
+    for n, m in [(120, 120), (200, 60), (40, 300)]:
+        # few distinct costs give many ties, which the traceback must break like the full matrix
+        sub_costs = np.array([[generator.choice([0., 0.25, 0.5, 1.]) for _ in range(m)] for _ in range(n)])
+        calls = []
+
+        def score(i, j):
+            calls.append((i, j))
+            return sub_costs[i, j]
+
+        cost, path = dp_engines.hirschberg_dp(n, m, score)
+        costs, backpointers = dp_engines.numpy_dp(sub_costs)
+        assert path == dp_engines.traceback(backpointers) and cost == costs[n, m]
+        assert len(calls) <= 4 * n * m
+
+
+def test_banded_engine_widens_only_when_a_path_can_leave_the_band():
+    generator = random.Random(1)
+    for n, m in [(800, 800), (300, 340), (60, 20)]:
+        costs = np.array([[generator.choice([0., 1.]) if abs(i - j) > 3 else 0. for j in range(m)]
+                          for i in range(n)])
+        matrix, backpointers = dp_engines.numpy_dp(costs)
+        expected_cost, expected_path = matrix[n, m], dp_engines.traceback(backpointers)
+        band = None
+        calls = []
+        widenings = 0
+        band_width = 4
+        while True:
+            def score(i, j):
+                calls.append((i, j))
+                return costs[i, j]
+            cost, path, is_optimal, band = dp_engines.banded_dp(n, m, score, band_width, previous_band=band)
+            if is_optimal or band_width >= max(n, m):
+                break
+            band_width *= 2
+            widenings += 1
+        assert cost == expected_cost
+        assert path == expected_path
+        # no cell is scored twice across widenings
+        assert len(calls) == len(set(calls))
+        if n == m:
+            assert widenings == 0
@@ -0,0 +1,53 @@
+import sys
+
+import data.sample
+from benchmarks.synthetic import SyntheticCorpus
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_exact_incremental_alignment_matches_python_engine():
+    sau = list(sausages_from_kaldi_sausages_string(data.sample.sausage_text))
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    for transcript in (data.sample.transcript_text_short, data.sample.transcript_text_long):
+        words = transcript.split()
+        expected = aligner.align_without_word_repeat(SausagesTranscriptPair.create_from_sausages_wordlist(sau, words),
+                                                     "w-avg-dist")
+        incremental = aligner.align_incrementally("w-avg-dist", words, beam=None, window=None)
+        for start in range(0, len(sau), 4):
+            incremental.add_sausages(sau[start:start + 4])
+        incremental.finish()
+        assert incremental.get_alignment().get_wordlist() == expected.get_wordlist()
+        assert incremental.get_alignment().get_sausages() == expected.get_sausages()
+
+        # words appended along with the sausages
+        incremental = aligner.align_incrementally("w-avg-dist", words_complete=False, beam=None, window=None)
+        for start in range(0, len(sau), 4):
+            incremental.add_words(words[start // 2:start // 2 + 2])
+            incremental.add_sausages(sau[start:start + 4])
+        incremental.add_words(words[(len(sau) + 3) // 4 * 2:], complete=True)
+        incremental.finish()
+        assert incremental.get_alignment().get_wordlist() == expected.get_wordlist()
+
+
+def test_windowed_alignment_keeps_few_rows_pending():
+    corpus = SyntheticCorpus(500, seed=3)
+    aligner = SausagesTranscriptAligner(corpus.lexicon)
+    sau, words = corpus.pair(150).get_sausages_wordlist()
+    sau = list(sau)
+    expected = aligner.align_without_word_repeat(SausagesTranscriptPair.create_from_sausages_wordlist(sau, words),
+                                                 "w-avg-dist", engine="numpy")
+    incremental = aligner.align_incrementally("w-avg-dist", words, window=16)
+    emitted_words = []
+    for start in range(0, len(sau), 5):
+        emitted_words.extend(incremental.add_sausages(sau[start:start + 5]).get_wordlist())
+        assert len(incremental.sausages) < 2 * 16
+    emitted_words.extend(incremental.finish().get_wordlist())
+    alignment = incremental.get_alignment()
+    assert emitted_words == alignment.get_wordlist()
+    assert [word for word in alignment.get_wordlist() if word != "-"] == words
+    assert [sausage for sausage in alignment.get_sausages() if not isinstance(sausage, str)] == sau
+    assert alignment.get_wordlist() == expected.get_wordlist()
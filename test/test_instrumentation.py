@@ -0,0 +1,32 @@
+import json
+import sys
+import warnings
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_instrumentation_counts_alignment_work():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_short + " ZZZ")
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    assert aligner.get_stats() is None
+    stats = aligner.enable_instrumentation()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        aligner.align_without_word_repeat(sau_and_text, "avg-dist", engine="numpy")
+        list(aligner.align_many([sau_and_text] * 2, "avg-dist", workers=2))
+    # every out of vocabulary word is only reported once
+    assert len(caught) == 2 and aligner.warned_oov_words == {"ZZZ", "<eps>"}
+    report = json.loads(stats.dump_json(top_n=2))
+    assert report["counters"]["alignments"] == 3
+    assert report["counters"]["dp_cells"] == 3 * len(sau) * len(sau_and_text.get_wordlist())
+    assert report["counters"]["distance_computations"] > 0
+    assert report["counters"]["lexicon_misses"] > 0
+    assert {word for word, _ in report["top_missing_words"]} == {"ZZZ", "<eps>"}
+    assert report["seconds"]["dp_fill"] > 0
+    assert aligner.disable_instrumentation() is stats and aligner.get_stats() is None
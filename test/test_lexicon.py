@@ -0,0 +1,77 @@
+import os
+import pickle
+import sys
+
+import data.sample
+from saucriptaligner.lexicon import read_cmu_dict, load_compiled_lexicon, CompiledLexicon, group_variants, \
+    lexicon_version
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair, Sausage
+
+sys.path.append('../')
+
+
+def test_compiled_lexicon_matches_text_lexicon(tmp_path):
+    source_path = os.path.join(tmp_path, "cmudict")
+    data.sample.write_cmu_dict(data.sample.sample_lexicon, source_path)
+    compiled = load_compiled_lexicon(source_path)
+    assert read_cmu_dict(source_path) == data.sample.sample_lexicon
+    assert dict(compiled.items()) == data.sample.sample_lexicon
+    assert "MEEKIN" in compiled and "NOT-A-WORD" not in compiled and 1 not in compiled
+    assert [compiled.inventory[i] for i in compiled.phoneme_ids("THE")] == ["T", "H", "E"]
+    assert dict(pickle.loads(pickle.dumps(compiled)).items()) == data.sample.sample_lexicon
+
+
+def test_compiled_lexicon_is_recompiled_when_source_changes(tmp_path):
+    source_path = os.path.join(tmp_path, "cmudict")
+    data.sample.write_cmu_dict({"THE": "DH AH0"}, source_path)
+    assert load_compiled_lexicon(source_path)["THE"] == "DH AH0"
+    data.sample.write_cmu_dict({"THE": "DH IY0", "A": "AH0"}, source_path)
+    os.utime(source_path, ns=(0, 0))
+    compiled = load_compiled_lexicon(source_path)
+    assert compiled["THE"] == "DH IY0" and len(compiled) == 2
+    assert not CompiledLexicon(source_path + ".saulex").is_stale(source_path)
+
+
+VARIANT_LEXICON = {"READ": "R IY1 D", "READ(1)": "R EH1 D", "RED": "R EH1 D", "READER": "R IY1 D ER0",
+                   "READ'S": "R IY1 D Z", "LIVE": "L IH1 V", "LIVE(2)": "L AY1 V", "ALIVE(1)": "AH0 L AY1 V"}
+
+
+def test_lexicon_version_is_computed_once_per_lexicon(tmp_path):
+    source_path = os.path.join(tmp_path, "cmudict")
+    data.sample.write_cmu_dict(data.sample.sample_lexicon, source_path)
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    assert aligner.lexicon_version == lexicon_version(load_compiled_lexicon(source_path))
+    aligner.set_lexicon_dict({1: "AH0", "THE": "DH AH0"})
+    assert aligner.lexicon_version == lexicon_version({"THE": "DH AH0", 1: "AH0"})
+    aligner.set_lexicon_dict(None)
+    assert aligner.lexicon_version is None
+
+
+def test_variants_are_grouped_by_headword(tmp_path):
+    assert group_variants(VARIANT_LEXICON) == {"READ": ("READ", "READ(1)"), "LIVE": ("LIVE", "LIVE(2)")}
+    source_path = os.path.join(tmp_path, "cmudict")
+    data.sample.write_cmu_dict(VARIANT_LEXICON, source_path)
+    compiled = load_compiled_lexicon(source_path)
+    assert compiled.variant_words("READ") == ("READ", "READ(1)")
+    assert compiled.variant_words("LIVE") == ("LIVE", "LIVE(2)")
+    assert compiled.variant_words("RED") == ("RED",)
+    assert compiled.variant_words("NOT-A-WORD") == ("NOT-A-WORD",)
+
+
+def test_distance_is_the_minimum_over_pronunciation_variants(tmp_path):
+    source_path = os.path.join(tmp_path, "cmudict")
+    data.sample.write_cmu_dict(VARIANT_LEXICON, source_path)
+    for lexicon_dict in [VARIANT_LEXICON, load_compiled_lexicon(source_path)]:
+        for backend in ["bitparallel", "editdistance"]:
+            aligner = SausagesTranscriptAligner(lexicon_dict, distance_backend=backend)
+            variant_aligner = SausagesTranscriptAligner(lexicon_dict, distance_backend=backend,
+                                                        pronunciation_variants=True)
+            assert aligner.phoneme_edit_distance("READ", "RED") > 0
+            assert variant_aligner.phoneme_edit_distance("READ", "RED") == 0
+            assert variant_aligner.phoneme_edit_distances("RED", ["READ", "READER", "LIVE"]) == \
+                   [0, aligner.phoneme_edit_distance("RED", "READER"), aligner.phoneme_edit_distance("RED", "LIVE")]
+            table = variant_aligner.precompute_distance_table(
+                [SausagesTranscriptPair.create_from_sausages_sentence(
+                    [Sausage.create_from_edges([("READ", 1.)])], "RED LIVE")])
+            assert table.distance("RED", "READ") == 0
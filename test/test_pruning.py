@@ -0,0 +1,44 @@
+import sys
+
+import data.sample
+from saucriptaligner.sau_text_pair import Sausages, SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.pruning import SausagePruner
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def test_prune_edges():
+    pruner = SausagePruner(cumulative_mass=0.9)
+    edges = [("AN", 0.2), ("<eps>", 0.6), ("AND", 0.15), ("IN", 0.05)]
+    assert [word for word, _ in pruner.prune_edges(edges)] == ["<eps>", "AN", "AND"]
+    assert abs(sum(weight for _, weight in pruner.prune_edges(edges)) - 1) < 1e-9
+    assert [word for word, _ in SausagePruner(top_k=2).prune_edges(edges)] == ["<eps>", "AN"]
+    assert [word for word, _ in SausagePruner(min_weight=0.1).prune_edges(edges)] == ["<eps>", "AN", "AND"]
+    assert SausagePruner(min_weight=0.9, renormalize=False).prune_edges(edges) == [("<eps>", 0.6)]
+
+
+def test_pruned_alignment_is_restored_on_original_sausages():
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau, data.sample.transcript_text_short)
+    pruner = SausagePruner(top_k=3)
+    pruned = pruner.prune(sau)
+    assert len(pruned.sausages) < len(sau)
+    assert all(sau[index].get_words()[0] == sausage.get_words()[0]
+               for index, sausage in zip(pruned.slot_indices, pruned.sausages))
+
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    aligned = aligner.align_without_word_repeat(sau_and_text, "w-avg-dist", engine="numpy", pruner=pruner)
+    aligned_sau = [sausage for sausage in aligned.get_sausages() if not isinstance(sausage, str)]
+    assert aligned_sau == list(sau)
+    assert [word for word in aligned.get_wordlist() if word != "-"] == sau_and_text.get_wordlist()
+
+
+def test_transcript_is_kept_when_every_sausage_is_pruned():
+    sau = Sausages.create_from_edges_array([[("<eps>", 1.)], [("<eps>", 0.7), ("<eps>", 0.3)]])
+    sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau, "THE REVEREND")
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    aligned = aligner.align_without_word_repeat(sau_and_text, "w-avg-dist", pruner=SausagePruner())
+    assert [word for word in aligned.get_wordlist() if word != "-"] == ["THE", "REVEREND"]
+    assert [sausage for sausage in aligned.get_sausages() if not isinstance(sausage, str)] == list(sau)
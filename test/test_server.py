@@ -0,0 +1,89 @@
+import asyncio
+import json
+import sys
+
+import data.sample
+from saucriptaligner.sau_text_pair import SausagesTranscriptPair
+from saucriptaligner.align_sau_text_pair import SausagesTranscriptAligner
+from saucriptaligner.cli import alignment_to_records
+from saucriptaligner.server import AlignmentServer, ServerOverloaded, serve_jsonl, handle_http_connection
+from saucriptaligner.create_sausages import sausages_from_kaldi_sausages_string
+
+sys.path.append('../')
+
+
+def expected_records(aligner, transcript):
+    sau = sausages_from_kaldi_sausages_string(data.sample.sausage_text)
+    sau_and_text = SausagesTranscriptPair.create_from_sausages_sentence(sau, transcript)
+    return alignment_to_records(aligner.align_without_word_repeat(sau_and_text, "w-avg-dist", engine="numpy"))
+
+
+def test_concurrent_requests_are_batched():
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    transcripts = [data.sample.transcript_text_short, data.sample.transcript_text_long] * 4
+
+    async def run():
+        async with AlignmentServer(aligner, max_batch_size=4, max_wait=0.05) as server:
+            results = await asyncio.gather(*[server.align(data.sample.sausage_text, transcript)
+                                             for transcript in transcripts])
+            return results, server.metrics_snapshot()
+
+    results, metrics = asyncio.run(run())
+    assert results == [expected_records(aligner, transcript) for transcript in transcripts]
+    assert metrics["completed"] == len(transcripts) and metrics["batches"] < len(transcripts)
+    assert metrics["queue_depth"] == 0 and set(metrics["latency_ms"]) == {"p50", "p90", "p99", "max"}
+
+
+def test_full_queue_rejects_requests():
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+
+    async def run():
+        async with AlignmentServer(aligner, max_queue_size=1) as server:
+            first = await server.submit(data.sample.sausage_text, data.sample.transcript_text_short, wait=False)
+            try:
+                await server.submit(data.sample.sausage_text, data.sample.transcript_text_short, wait=False)
+            except ServerOverloaded:
+                rejected = True
+            else:
+                rejected = False
+            await first
+            return rejected, server.metrics_snapshot()
+
+    rejected, metrics = asyncio.run(run())
+    assert rejected and metrics["rejected"] == 1 and metrics["completed"] == 1
+
+
+def test_jsonl_and_http_front_ends():
+    aligner = SausagesTranscriptAligner(data.sample.sample_lexicon)
+    lines = [json.dumps({"id": 1, "sausages": data.sample.sausage_text, "transcript": data.sample.transcript_text_short}),
+             "not json", json.dumps({"id": 2, "transcript": "THE"}), json.dumps({"command": "metrics"})]
+
+    async def run():
+        async with AlignmentServer(aligner) as server:
+            reader = asyncio.StreamReader()
+            reader.feed_data("".join(line + "\n" for line in lines).encode("utf-8"))
+            reader.feed_eof()
+            output = []
+            await serve_jsonl(server, reader, output.append)
+
+            http_server = await asyncio.start_server(lambda r, w: handle_http_connection(server, r, w), "127.0.0.1", 0)
+            port = http_server.sockets[0].getsockname()[1]
+            http_reader, http_writer = await asyncio.open_connection("127.0.0.1", port)
+            body = json.dumps({"id": "a", "sausages": data.sample.sausage_text,
+                               "transcript": data.sample.transcript_text_short}).encode("utf-8")
+            http_writer.write(b"POST /align HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+            http_writer.write(b"GET /metrics HTTP/1.1\r\nConnection: close\r\n\r\n")
+            await http_writer.drain()
+            http_output = await http_reader.read()
+            http_writer.close()
+            http_server.close()
+            await http_server.wait_closed()
+            return output, http_output.decode("utf-8")
+
+    output, http_output = asyncio.run(run())
+    responses = [json.loads(line) for line in output]
+    assert {"id": 1, "alignment": expected_records(aligner, data.sample.transcript_text_short)} in responses
+    assert sum("error" in response for response in responses) == 2
+    assert any(response.get("metrics", {}).get("requests") == 1 for response in responses)
+    assert http_output.count("HTTP/1.1 200 OK") == 2
+    assert json.dumps(expected_records(aligner, data.sample.transcript_text_short)) in http_output